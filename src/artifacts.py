@@ -0,0 +1,282 @@
+"""
+Artifacts Module - Content-addressed store for job outputs with manifest-based GC.
+
+Every job writes images, audio (MP3 plus WAV working copy), subtitles and a
+video under output/. The store keeps one copy of each file content in
+output/store/objects/<sha1[:2]>/<sha1><ext> and turns the human-readable
+path into a hardlink to it, so identical images downloaded by different
+jobs share one inode. Each job records what it produced in a manifest
+(output/store/manifests/<job>.json); garbage collection expires
+intermediates by age, drops the oldest jobs while the store is over its
+size budget, and deletes objects no manifest references any more.
+
+Stored files must not be rewritten in place (the inode is shared):
+writable(path) unlinks a stored name before a stage writes to it again.
+
+Usage:
+    python src/artifacts.py stats
+    python src/artifacts.py gc --max-gb 50 --max-age-days 7
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+from typing import Dict, List
+
+# Roles kept until the size budget needs the space; everything else expires by age
+DELIVERABLE_ROLES = ('video', 'summary')
+# Roles whose files are rewritten in place (tracked by path, never content-addressed)
+MUTABLE_ROLES = ('summary',)
+
+
+def file_digest(path: str) -> str:
+    '''SHA-1 of file contents.'''
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ArtifactStore:
+    '''
+    Content-addressed artifact store with hardlinked names and job manifests.
+
+    Responsibilities:
+    - Store each file content once and hardlink readable names to it
+    - Record per-job manifests of produced artifacts
+    - Expire intermediates by age and whole jobs by total size
+    - Delete objects that no manifest references
+    '''
+
+    def __init__(self, root: str = "output/store", orphan_grace: float = 3600):
+        '''
+        Initialize the store.
+
+        Args:
+            root: Store directory (objects/ and manifests/ live below it)
+            orphan_grace: Seconds an unreferenced object is kept (covers jobs that have
+                stored files but not written their manifest yet)
+        '''
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.manifests_dir = os.path.join(root, 'manifests')
+        self.orphan_grace = orphan_grace
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    def _object_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest + ext.lower())
+
+    def put(self, path: str) -> Dict:
+        '''
+        Store a file and replace it with a hardlink to its object.
+
+        If the object already exists (stored earlier, or by another process
+        between hashing and linking), the name is relinked to it. Falls back to
+        keeping a separate copy when hardlinks are not possible (e.g. the name
+        is on another filesystem).
+
+        Returns:
+            Manifest entry with path, sha1 and bytes
+        '''
+        digest = file_digest(path)
+        obj = self._object_path(digest, os.path.splitext(path)[1])
+        with self._lock:
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            try:
+                os.link(path, obj)
+            except FileExistsError:
+                if not os.path.samefile(path, obj):
+                    self._relink(obj, path)
+            except OSError:
+                shutil.copy2(path, obj)
+        return {'path': path, 'sha1': digest, 'bytes': os.path.getsize(obj)}
+
+    @staticmethod
+    def _relink(obj: str, path: str):
+        '''Atomically replace path with a hardlink to obj (path stays a separate copy if that fails).'''
+        tmp = f"{path}.{os.getpid()}.link"
+        try:
+            os.link(obj, tmp)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @staticmethod
+    def writable(*paths: str):
+        '''Unlink stored names so the next write creates a new file instead of changing the object.'''
+        for path in paths:
+            try:
+                if os.stat(path).st_nlink > 1:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def record(self, job: str, artifacts: Dict[str, List[str]]) -> Dict:
+        '''
+        Store a job's files and merge them into its manifest.
+
+        Args:
+            job: Job name (output name)
+            artifacts: Role -> file paths (missing files are skipped)
+
+        Returns:
+            The updated manifest
+        '''
+        manifest = self._load(job) or {'job': job, 'created': time.time(), 'artifacts': []}
+        entries = {(e['role'], e['path']): e for e in manifest['artifacts']}
+        for role, paths in artifacts.items():
+            for path in paths:
+                if not path or not os.path.exists(path):
+                    continue
+                if role in MUTABLE_ROLES:
+                    entry = {'path': path, 'sha1': None, 'bytes': os.path.getsize(path)}
+                else:
+                    entry = self.put(path)
+                entries[(role, path)] = dict(entry, role=role)
+        manifest['artifacts'] = list(entries.values())
+        manifest['updated'] = time.time()
+        self._save(manifest)
+        return manifest
+
+    def _manifest_path(self, job: str) -> str:
+        return os.path.join(self.manifests_dir, f"{job}.json")
+
+    def _load(self, job: str) -> Dict:
+        try:
+            with open(self._manifest_path(job), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _save(self, manifest: Dict):
+        path = self._manifest_path(manifest['job'])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def manifests(self) -> List[Dict]:
+        '''All manifests, oldest first.'''
+        jobs = [name[:-5] for name in os.listdir(self.manifests_dir) if name.endswith('.json')]
+        manifests = [m for m in (self._load(job) for job in jobs) if m]
+        return sorted(manifests, key=lambda m: m.get('updated', m['created']))
+
+    def _objects(self) -> Dict[str, tuple]:
+        '''sha1 -> (object path, bytes, mtime) for every stored object.'''
+        objects = {}
+        for sub in os.listdir(self.objects_dir):
+            folder = os.path.join(self.objects_dir, sub)
+            for name in os.listdir(folder) if os.path.isdir(folder) else []:
+                full = os.path.join(folder, name)
+                try:
+                    stat = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                objects[os.path.splitext(name)[0]] = (full, stat.st_size, stat.st_mtime)
+        return objects
+
+    def _drop(self, manifest: Dict, roles=None) -> int:
+        '''Unlink a manifest's named files (all or only roles) and rewrite or delete it. Returns entries dropped.'''
+        live_paths = {e['path'] for m in self.manifests() if m['job'] != manifest['job'] for e in m['artifacts']}
+        keep, dropped = [], 0
+        for entry in manifest['artifacts']:
+            if roles is not None and entry['role'] not in roles:
+                keep.append(entry)
+                continue
+            if entry['path'] not in live_paths:
+                try:
+                    os.remove(entry['path'])
+                except FileNotFoundError:
+                    pass
+            dropped += 1
+        manifest['artifacts'] = keep
+        if keep:
+            self._save(manifest)
+        else:
+            os.remove(self._manifest_path(manifest['job']))
+        return dropped
+
+    def gc(self, max_bytes: int = None, max_age_days: float = None) -> Dict:
+        '''
+        Collect garbage.
+
+        1. Jobs older than max_age_days lose their intermediates (images, audio, subtitles)
+        2. While stored objects exceed max_bytes, the oldest jobs are dropped entirely
+        3. Objects no manifest references (after orphan_grace) are deleted
+
+        Args:
+            max_bytes: Size budget for stored objects (None = no limit)
+            max_age_days: Age after which intermediates expire (None = never)
+
+        Returns:
+            Counts of expired entries, dropped jobs, deleted objects and freed bytes
+        '''
+        with self._lock:
+            result = {'expired_entries': 0, 'dropped_jobs': 0, 'deleted_objects': 0, 'freed_bytes': 0}
+            now = time.time()
+            if max_age_days is not None:
+                cutoff = now - max_age_days * 86400
+                for manifest in self.manifests():
+                    if manifest.get('updated', manifest['created']) < cutoff:
+                        roles = {e['role'] for e in manifest['artifacts']} - set(DELIVERABLE_ROLES)
+                        result['expired_entries'] += self._drop(manifest, roles)
+
+            objects = self._objects()
+            manifests = self.manifests()
+            if max_bytes is not None:
+                def referenced_bytes():
+                    referenced = {e['sha1'] for m in manifests for e in m['artifacts']}
+                    return sum(size for digest, (_, size, _) in objects.items() if digest in referenced)
+
+                while manifests and referenced_bytes() > max_bytes:
+                    self._drop(manifests.pop(0))
+                    result['dropped_jobs'] += 1
+
+            referenced = {e['sha1'] for m in self.manifests() for e in m['artifacts']}
+            for digest, (path, size, mtime) in objects.items():
+                if digest not in referenced and now - mtime > self.orphan_grace:
+                    os.remove(path)
+                    result['deleted_objects'] += 1
+                    result['freed_bytes'] += size
+            return result
+
+    def stats(self) -> Dict:
+        '''Stored vs referenced bytes (the difference is what deduplication saves).'''
+        objects = self._objects()
+        manifests = self.manifests()
+        logical = sum(e['bytes'] for m in manifests for e in m['artifacts'] if e['sha1'])
+        stored = sum(size for _, size, _ in objects.values())
+        return {'jobs': len(manifests), 'objects': len(objects), 'stored_mb': round(stored / 1024**2, 1),
+                'referenced_mb': round(logical / 1024**2, 1),
+                'dedup_saved_mb': round(max(0, logical - stored) / 1024**2, 1)}
+
+
+def main():
+    '''CLI entry point.'''
+    parser = argparse.ArgumentParser(description='Content-addressed artifact store')
+    parser.add_argument('--root', type=str, default='output/store')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help='Show store size and deduplication savings')
+    gc = sub.add_parser('gc', help='Expire old intermediates and enforce the size budget')
+    gc.add_argument('--max-gb', type=float, help='Size budget for stored objects')
+    gc.add_argument('--max-age-days', type=float, help='Age after which intermediates expire')
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.root)
+    if args.command == 'stats':
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == 'gc':
+        result = store.gc(int(args.max_gb * 1024**3) if args.max_gb else None, args.max_age_days)
+        print(f"✓ Expired {result['expired_entries']} intermediates, dropped {result['dropped_jobs']} jobs, "
+              f"deleted {result['deleted_objects']} objects ({result['freed_bytes'] / 1024**2:.1f} MB freed)")
+
+
+if __name__ == "__main__":
+    main()
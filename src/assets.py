@@ -0,0 +1,108 @@
+"""
+Assets Module - Process-wide registry of decoded static assets.
+
+Fonts, overlay images and sound effects are the same for every video, but
+were loaded, resized or decoded again for every subtitle, intro and mix. The
+registry keeps each derived asset in memory once per process, keyed by file
+and parameters, and reloads it only when the file's size or mtime changes.
+All MediaGenerator instances share the module-level registry by default.
+"""
+import os
+import threading
+import numpy as np
+import soundfile as sf
+from typing import Callable, Dict, List, Tuple
+from PIL import Image, ImageFont
+
+FONT_PATHS = ['/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+              '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf']
+
+
+def _stamp(path: str) -> tuple:
+    '''File identity for invalidation: (size, mtime_ns), or None if missing.'''
+    try:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+
+class AssetRegistry:
+    '''
+    In-memory cache of fonts, overlays and decoded audio.
+
+    Responsibilities:
+    - Load each asset once per process (fonts by size, overlays by target size)
+    - Hold overlays as pre-scaled RGBA arrays and audio as decoded PCM
+    - Reload an asset when its source file changes
+    - Count decodes so batch runs can verify nothing is loaded twice
+    '''
+
+    def __init__(self, font_paths: List[str] = None):
+        '''
+        Initialize an empty registry.
+
+        Args:
+            font_paths: TrueType candidates, first existing one wins (default: FONT_PATHS)
+        '''
+        self.font_paths = font_paths or FONT_PATHS
+        self.hits = 0
+        self.loads = 0
+        self._entries: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: tuple, path: str, build: Callable):
+        '''Return the cached value for key, rebuilding it if path changed since it was loaded.'''
+        stamp = _stamp(path) if path else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+            value = build()
+            self._entries[key] = (stamp, value)
+            self.loads += 1
+            return value
+
+    def font(self, size: int):
+        '''Bold TrueType font at size (PIL default font if none is installed).'''
+        path = next((p for p in self.font_paths if os.path.exists(p)), None)
+        if path is None:
+            return self._get(('font', None, size), None, ImageFont.load_default)
+        return self._get(('font', path, size), path, lambda: ImageFont.truetype(path, size))
+
+    def overlay(self, path: str, size: Tuple[int, int]) -> np.ndarray:
+        '''Image at path as an RGBA array resized to size (read-only).'''
+        def build():
+            with Image.open(path) as img:
+                array = np.asarray(img.convert('RGBA').resize(size, Image.Resampling.LANCZOS))
+            array.flags.writeable = False
+            return array
+        return self._get(('overlay', os.path.abspath(path), tuple(size)), path, build)
+
+    def audio(self, path: str) -> Tuple[np.ndarray, int]:
+        '''Decoded float32 PCM (frames x channels, read-only) and its sample rate.'''
+        def build():
+            pcm, rate = sf.read(path, dtype='float32', always_2d=True)
+            pcm.flags.writeable = False
+            return pcm, rate
+        return self._get(('audio', os.path.abspath(path)), path, build)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            nbytes = sum(v.nbytes if isinstance(v, np.ndarray) else v[0].nbytes if isinstance(v, tuple) else 0
+                         for _, v in self._entries.values())
+        return {'entries': len(self._entries), 'loads': self.loads, 'hits': self.hits,
+                'mb': round(nbytes / 1024**2, 1)}
+
+
+_shared = AssetRegistry()
+
+
+def shared_assets() -> AssetRegistry:
+    '''The process-wide registry used by default.'''
+    return _shared
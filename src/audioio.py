@@ -0,0 +1,171 @@
+"""
+Audio IO Module - Encode voice-over audio from memory and probe durations from headers.
+
+TTS produces PCM in memory. The MP3 deliverable is encoded straight from that
+buffer (libsndfile in-process when it supports MP3, otherwise an ffmpeg pipe)
+and a WAV working copy is kept next to it, so Whisper and the compositor read
+uncompressed audio instead of decoding the MP3 again. Durations come from
+file headers without decoding samples.
+"""
+import os
+import struct
+import subprocess
+import numpy as np
+import soundfile as sf
+
+# MPEG audio layer III tables
+_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 25: [11025, 12000, 8000]}
+_VERSIONS = {0b11: 1, 0b10: 2, 0b00: 25}
+
+
+def working_copy(audio_path: str) -> str:
+    '''Uncompressed working copy of an encoded audio file, if one was kept.'''
+    wav = os.path.splitext(audio_path)[0] + '.wav'
+    return wav if os.path.exists(wav) else audio_path
+
+
+def write_audio(pcm: np.ndarray, sample_rate: int, output_path: str, keep_wav: bool = True) -> str:
+    '''
+    Write PCM to output_path, encoding from memory.
+
+    Args:
+        pcm: Mono float PCM
+        sample_rate: Sample rate in Hz
+        output_path: Target file (.mp3 is encoded; other extensions are written by soundfile)
+        keep_wav: Keep a .wav working copy next to an encoded file
+
+    Returns:
+        Path of the written deliverable (the WAV if MP3 encoding is unavailable)
+    '''
+    pcm = np.ascontiguousarray(pcm, dtype=np.float32)
+    base, ext = os.path.splitext(output_path)
+    if ext.lower() != '.mp3':
+        sf.write(output_path, pcm, sample_rate)
+        return output_path
+
+    if keep_wav:
+        sf.write(base + '.wav', pcm, sample_rate, subtype='PCM_16')
+    try:
+        if 'MP3' in sf.available_formats():
+            try:
+                # bitrate_mode/compression_level need soundfile >= 0.13
+                sf.write(output_path, pcm, sample_rate, format='MP3', bitrate_mode='VARIABLE',
+                         compression_level=0.2)
+                return output_path
+            except Exception as e:
+                print(f"   ⚠ In-process MP3 encoding failed ({e}); using ffmpeg")
+        _ffmpeg_mp3(pcm, sample_rate, output_path)
+        return output_path
+    except Exception as e:
+        wav = base + '.wav'
+        if not keep_wav:
+            sf.write(wav, pcm, sample_rate, subtype='PCM_16')
+        print(f"   ⚠ MP3 encoding failed ({e}); keeping {wav}")
+        return wav
+
+
+def _ffmpeg_mp3(pcm: np.ndarray, sample_rate: int, output_path: str):
+    '''Encode float32 PCM to MP3 through ffmpeg's stdin.'''
+    proc = subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'f32le', '-ar', str(sample_rate),
+                           '-ac', '1', '-i', 'pipe:0', '-codec:a', 'libmp3lame', '-qscale:a', '2', output_path],
+                          input=memoryview(pcm).cast('B'), capture_output=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode('utf-8', 'ignore').strip()[-300:])
+
+
+def resample(pcm: np.ndarray, src_rate: int, dst_rate: int, taps: int = 64) -> np.ndarray:
+    '''Polyphase-style resampling: zero-stuff, windowed-sinc low-pass, decimate.'''
+    if src_rate == dst_rate:
+        return pcm
+    g = np.gcd(src_rate, dst_rate)
+    up, down = dst_rate // g, src_rate // g
+    cutoff = 0.5 / max(up, down)
+    n = np.arange(taps * max(up, down)) - (taps * max(up, down) - 1) / 2
+    kernel = (2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(len(n)) * up).astype(np.float32)
+    stuffed = np.zeros(len(pcm) * up, dtype=np.float32)
+    stuffed[::up] = pcm
+    return np.convolve(stuffed, kernel, mode='same')[::down].astype(np.float32)
+
+
+def read_pcm(path: str, sample_rate: int = None) -> np.ndarray:
+    '''Read a file as mono float32 PCM, optionally resampled (e.g. 16 kHz for Whisper).'''
+    pcm, rate = sf.read(path, dtype='float32', always_2d=True)
+    pcm = pcm.mean(axis=1) if pcm.shape[1] > 1 else pcm[:, 0]
+    return resample(pcm, rate, sample_rate) if sample_rate else pcm
+
+
+def audio_duration(path: str) -> float:
+    '''Duration in seconds read from the file header (no sample decoding).'''
+    if path.lower().endswith('.mp3'):
+        duration = mp3_duration(path)
+        if duration:
+            return duration
+    try:
+        return sf.info(path).duration
+    except Exception:
+        result = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                                 '-of', 'default=noprint_wrappers=1:nokey=1', path],
+                                capture_output=True, text=True)
+        return float(result.stdout.strip())
+
+
+def _frame_header(header: bytes):
+    '''Parse a 4-byte MPEG layer III frame header into (version, sample_rate, frame_bytes, samples, mono).'''
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = _VERSIONS.get((header[1] >> 3) & 0b11)
+    layer = (header[1] >> 1) & 0b11
+    bitrate_idx, rate_idx = header[2] >> 4, (header[2] >> 2) & 0b11
+    if version is None or layer != 0b01 or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+    bitrate = _BITRATES[1 if version == 1 else 2][bitrate_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_idx]
+    padding = (header[2] >> 1) & 1
+    samples = 1152 if version == 1 else 576
+    frame_bytes = samples // 8 * bitrate // sample_rate + padding
+    return version, sample_rate, frame_bytes, samples, (header[3] >> 6) == 0b11
+
+
+def mp3_duration(path: str) -> float:
+    '''
+    MP3 duration from the Xing/Info frame count, or by walking frame headers.
+
+    Reads only headers (4 bytes per frame), so memory use is constant.
+    '''
+    with open(path, 'rb') as f:
+        head = f.read(10)
+        offset = 0
+        if head[:3] == b'ID3':
+            size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+            offset = 10 + size + (10 if head[5] & 0x10 else 0)
+        f.seek(offset)
+        window = f.read(4096)
+        start = next((i for i in range(len(window) - 3) if _frame_header(window[i:i + 4])), None)
+        if start is None:
+            return None
+        offset += start
+        f.seek(offset)
+        first = f.read(200)
+        version, sample_rate, frame_bytes, samples, mono = _frame_header(first[:4])
+
+        side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+        tag = first[4 + side_info:8 + side_info]
+        if tag in (b'Xing', b'Info'):
+            flags = struct.unpack('>I', first[8 + side_info:12 + side_info])[0]
+            if flags & 1:
+                frames = struct.unpack('>I', first[12 + side_info:16 + side_info])[0]
+                return frames * samples / sample_rate
+
+        total = 0
+        while True:
+            f.seek(offset)
+            parsed = _frame_header(f.read(4))
+            if parsed is None:
+                break
+            total += parsed[3] / parsed[1]
+            offset += parsed[2]
+        return total
@@ -7,11 +7,25 @@ cohesive class for efficient news article processing.
 import os
 import re
 import requests
-from bs4 import BeautifulSoup
 from typing import Dict, List
-from urllib.parse import urlparse
 import torch
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from llm import OllamaClient
+from extractors import get_extractor, image_filename
+from imageselect import ImageSelector
+from models import ModelRegistry
+from scheduler import ResourceScheduler, shared_scheduler
+from extractive import compress, TOKENS_PER_WORD
+from quality import QualityGate, split_sentences, regions, new_stats
+from onnxcorrector import OnnxCorrector, ORT_AVAILABLE, EXPORT_DIR, is_exported
+
+# Shared by every LLM call so the server's prompt cache reuses this prefix
+SYSTEM_PROMPT = """Bạn là biên tập viên tin tức tiếng Việt. Chỉ trả lời bằng tiếng Việt, không giải thích.
+QUY TẮC CHUNG:
+- Số viết liền: 1.890 → 1890
+- Ngày viết chữ: 8/1 → mùng 8 tháng 1
+- Mỗi từ cách nhau bằng dấu cách
+- Câu hoàn chỉnh, kết thúc bằng dấu chấm"""
 
 
 class NewsProcessor:
@@ -19,14 +33,17 @@ class NewsProcessor:
     Unified news processing class that handles crawling, summarization, and text correction.
     
     Responsibilities:
-    - Crawl articles from Vietnamese news sites (VnExpress, TienPhong)
+    - Crawl articles from Vietnamese news sites (see extractors registry)
     - Summarize content using Qwen3:4B via Ollama
     - Correct Vietnamese spelling and diacritics
     - Normalize text for TTS
     '''
     
     def __init__(self, ollama_url: str = "http://172.18.96.1:11434", 
-                 ollama_model: str = "qwen3-vl:4b", output_dir: str = "output/images"):
+                 ollama_model: str = "qwen3-vl:4b", output_dir: str = "output/images",
+                 models: ModelRegistry = None, precompress_ratio: float = 3.0, quality_gate: bool = True,
+                 corrector_backend: str = 'auto', scheduler: ResourceScheduler = None,
+                 load_corrector: bool = True):
         '''
         Initialize the news processor with all required components.
         
@@ -34,18 +51,37 @@ class NewsProcessor:
             ollama_url: URL for Ollama API server
             ollama_model: Model name for summarization
             output_dir: Directory to save downloaded images
+            models: Shared model registry (models load lazily when it has a memory budget)
+            precompress_ratio: Article words kept per target summary word by the extractive
+                pre-pass before a single summarization call (None = chunked map-reduce)
+            quality_gate: Only send sentences that fail the quality checks to the corrector/refiner
+            corrector_backend: 'torch', 'onnx' (exported int8 model), or 'auto' (ONNX on CPU when exported)
+            scheduler: Core/device scheduler (default: the process-wide one) that picks the corrector device
+            load_corrector: Load the corrector at startup (False: load on first correction, e.g. for
+                summarize-only use)
         '''
         # Try to connect to Ollama, fallback to localhost if needed
         self.ollama_model = ollama_model
         self.output_dir = output_dir
         self.headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+        self.models = models or ModelRegistry()
+        self.precompress_ratio = precompress_ratio
+        self.corrector_backend = corrector_backend
+        self.scheduler = scheduler or shared_scheduler()
+        self.image_selector = ImageSelector()
+        self.quality_gate = QualityGate() if quality_gate else None
+        self.quality_stats = new_stats()
+        self.last_quality = new_stats()
+        self._corrected = set()
         os.makedirs(output_dir, exist_ok=True)
         
         # Test connection and fallback to localhost if needed
         self.ollama_url = self._test_ollama_connection(ollama_url)
+        self.llm = OllamaClient(self.ollama_url, ollama_model, system=SYSTEM_PROMPT)
+        self._warmup_llm()
         
         # Initialize text correction model
-        self._init_corrector()
+        self._init_corrector(load_corrector)
         
         print(f"✓ NewsProcessor initialized (Ollama: {self.ollama_url}, Model: {ollama_model})")
     
@@ -66,14 +102,45 @@ class NewsProcessor:
         print(f"   Using: {primary_url} (may fail if not available)")
         return primary_url
     
-    def _init_corrector(self):
-        '''Initialize Vietnamese text correction model.'''
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    def _warmup_llm(self):
+        '''Load the model and cache the system prompt before the first article arrives.'''
+        try:
+            timings = self.llm.warmup()
+            print(f"   ✓ LLM warmed up in {timings['seconds']:.1f}s "
+                  f"(load {timings.get('load_s') or 0:.1f}s, keep_alive {self.llm.keep_alive})")
+        except Exception as e:
+            print(f"   ⚠ LLM warm-up failed: {e}")
+    
+    def _init_corrector(self, load: bool = True):
+        '''Register Vietnamese text correction model.'''
+        self.models.register('corrector', self._load_corrector, stages=['correct'])
+        if load and self.models.budget is None:
+            self.models.get('corrector')
+    
+    def _load_corrector(self) -> tuple:
+        '''Load the corrector; returns (tokenizer, model, device).'''
+        if self._use_onnx_corrector():
+            model = OnnxCorrector(EXPORT_DIR, threads=self.scheduler.budget('correct'))
+            tokenizer = AutoTokenizer.from_pretrained(EXPORT_DIR)
+            print(f"   ✓ Text corrector loaded (ONNX {'int8' if model.meta['quantized'] else 'fp32'}, CPU)")
+            return tokenizer, model, torch.device("cpu")
+        device = torch.device(self.scheduler.device_for('correct'))
         model_path = "models/protonx-legal-tc" if os.path.exists("models/protonx-legal-tc") else "protonx-models/protonx-legal-tc"
-        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-        self.corrector_model = AutoModelForSeq2SeqLM.from_pretrained(model_path).to(self.device)
-        self.corrector_model.eval()
-        print(f"   ✓ Text corrector loaded on {self.device}")
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_path).to(device)
+        model.eval()
+        print(f"   ✓ Text corrector loaded on {device}")
+        return tokenizer, model, device
+    
+    def _use_onnx_corrector(self) -> bool:
+        '''ONNX Runtime only pays off on CPU, and only once the model has been exported.'''
+        if self.corrector_backend == 'onnx':
+            if not (ORT_AVAILABLE and is_exported()):
+                raise RuntimeError(f"ONNX corrector requested but onnxruntime or {EXPORT_DIR} is missing "
+                                   f"(run: python src/onnxcorrector.py export)")
+            return True
+        return (self.corrector_backend == 'auto' and ORT_AVAILABLE and is_exported()
+                and self.scheduler.device_for('correct') == 'cpu')
     
     def crawl_article(self, url: str) -> Dict:
         '''
@@ -83,91 +150,48 @@ class NewsProcessor:
             url: Article URL
             
         Returns:
-            Dictionary with title, description, content, images, source, url
+            Dictionary with title, description, content, images, image_stats, source, url
         '''
-        domain = urlparse(url).netloc
-        if 'vnexpress' in domain:
-            return self._crawl_vnexpress(url)
-        elif 'tienphong' in domain:
-            return self._crawl_tienphong(url)
-        raise ValueError(f"Unsupported news site: {domain}")
-    
-    def _crawl_vnexpress(self, url: str) -> Dict:
-        '''Crawl VnExpress article.'''
+        extractor = get_extractor(url)
         response = requests.get(url, headers=self.headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        title = soup.find('h1', class_='title-detail')
-        desc = soup.find('p', class_='description')
-        content_div = soup.find('article', class_='fck_detail')
-        paragraphs = content_div.find_all('p', class_='Normal') if content_div else []
+        article = extractor.parse(response.content, url)
         
+        # Probe candidates and download only the images that pass size and duplicate checks
+        selected, article['image_stats'] = self.image_selector.select(article.pop('image_urls'), self._get)
         images = []
-        if content_div:
-            for idx, img in enumerate(content_div.find_all('img')[:8]):
-                img_url = img.get('data-src') or img.get('src')
-                if img_url:
-                    img_path = self._download_image(img_url, f"vnexpress_{idx}")
-                    if img_path:
-                        images.append(img_path)
-        
-        return {
-            'title': title.get_text(strip=True) if title else "",
-            'description': desc.get_text(strip=True) if desc else "",
-            'content': ' '.join([p.get_text(strip=True) for p in paragraphs]),
-            'images': images,
-            'source': 'VnExpress',
-            'url': url
-        }
+        for idx, (img_url, data) in enumerate(selected):
+            img_path = self._save_image(img_url, data, f"{extractor.name}_{idx}")
+            if img_path:
+                images.append(img_path)
+        article['images'] = images
+        return article
     
-    def _crawl_tienphong(self, url: str) -> Dict:
-        '''Crawl TienPhong article.'''
-        response = requests.get(url, headers=self.headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        title = soup.find('h1', class_='article-title')
-        desc = soup.find('h2', class_='article-sapo')
-        content_div = soup.find('div', class_='article-body')
-        paragraphs = content_div.find_all('p') if content_div else []
-        
-        images = []
-        if content_div:
-            for idx, img in enumerate(content_div.find_all('img')[:8]):
-                img_url = img.get('data-src') or img.get('src')
-                if img_url:
-                    img_path = self._download_image(img_url, f"tienphong_{idx}")
-                    if img_path:
-                        images.append(img_path)
-        
-        return {
-            'title': title.get_text(strip=True) if title else "",
-            'description': desc.get_text(strip=True) if desc else "",
-            'content': ' '.join([p.get_text(strip=True) for p in paragraphs]),
-            'images': images,
-            'source': 'Tien Phong',
-            'url': url
-        }
+    def _get(self, url: str, headers: Dict) -> tuple:
+        '''GET url with extra headers and return (status, body).'''
+        response = requests.get(url, headers={**self.headers, **headers}, timeout=10)
+        return response.status_code, response.content
     
-    def _download_image(self, img_url: str, prefix: str) -> str:
-        '''Download image and return local path.'''
+    def _save_image(self, img_url: str, data: bytes, prefix: str) -> str:
+        '''Save downloaded image bytes and return local path.'''
         try:
-            if not img_url.startswith('http'):
-                return None
-            response = requests.get(img_url, headers=self.headers, timeout=10)
-            if response.status_code == 200:
-                ext = img_url.split('.')[-1].split('?')[0][:4]
-                filename = f"{prefix}_{hash(img_url) % 10000}.{ext}"
-                filepath = os.path.join(self.output_dir, filename)
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                return filepath
+            filepath = os.path.join(self.output_dir, image_filename(img_url, prefix))
+            # Replace rather than overwrite: the name may be a hardlink into the artifact store
+            with open(filepath + '.part', 'wb') as f:
+                f.write(data)
+            os.replace(filepath + '.part', filepath)
+            return filepath
         except Exception as e:
-            print(f"Failed to download image: {e}")
+            print(f"Failed to save image: {e}")
         return None
     
     def summarize(self, article: Dict, target_words: int = 350) -> str:
         '''
-        Summarize article using Qwen3:4B with chunked processing.
+        Summarize article using Qwen3:4B.
+        
+        Long articles are first compressed extractively to the most relevant
+        sentences and summarized in one _summarize_direct call; with
+        precompress_ratio unset they fall back to per-chunk summaries merged
+        by a final call.
         
         Args:
             article: Article dictionary from crawl_article
@@ -181,6 +205,13 @@ class NewsProcessor:
         if len(content) < 1500:
             return self._summarize_direct(article, target_words)
         
+        if self.precompress_ratio:
+            result = compress(content, int(target_words * self.precompress_ratio * TOKENS_PER_WORD))
+            if result['kept'] < result['total']:
+                print(f"   Pre-compressed: {result['kept']}/{result['total']} sentences, "
+                      f"~{result['tokens_before']} → {result['tokens_after']} tokens")
+            return self._summarize_direct({**article, 'description': '', 'content': result['text']}, target_words)
+        
         chunks = self._split_into_chunks(content)
         print(f"   Splitting into {len(chunks)} chunks...")
         
@@ -220,14 +251,8 @@ class NewsProcessor:
 
 Tóm tắt:"""
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={"model": self.ollama_model, "prompt": prompt, "stream": False,
-                      "options": {"temperature": 0.2, "num_predict": 500}},
-                timeout=60
-            )
-            if response.status_code == 200:
-                return re.sub(r'<think>.*?</think>', '', response.json().get('response', ''), flags=re.DOTALL).strip()
+            return self.llm.generate(prompt, {"temperature": 0.2, "num_predict": 500},
+                                     target_words=60, timeout=60)
         except Exception as e:
             print(f"Chunk {chunk_num} error: {e}")
         return ""
@@ -240,19 +265,10 @@ Tóm tắt:"""
 Tiêu đề: {title}
 Nội dung: {combined}
 
-QUY TẮC: Số viết liền (1890), ngày viết chữ (mùng 8 tháng 1), câu hoàn chỉnh.
-
 Bài tin:"""
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={"model": self.ollama_model, "prompt": prompt, "stream": False,
-                      "options": {"temperature": 0.3, "num_predict": 2000}},
-                timeout=120
-            )
-            if response.status_code == 200:
-                final = response.json().get('response', '').strip()
-                return self._clean_text(final) if final and len(final.split()) >= 80 else self._clean_text(combined)
+            final = self.llm.generate(prompt, {"temperature": 0.3, "num_predict": 2000}, target_words=target_words)
+            return self._clean_text(final) if final and len(final.split()) >= 80 else self._clean_text(combined)
         except Exception as e:
             print(f"Combine error: {e}")
         return self._clean_text(combined)
@@ -264,18 +280,11 @@ Bài tin:"""
 Tiêu đề: {article['title']}
 Nội dung: {article.get('description', '')} {article.get('content', '')}
 
-QUY TẮC: Số viết liền, ngày viết chữ, câu hoàn chỉnh.
-
 Tóm tắt:"""
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={"model": self.ollama_model, "prompt": prompt, "stream": False,
-                      "options": {"temperature": 0.2, "num_predict": 2000}},
-                timeout=120
-            )
-            if response.status_code == 200:
-                return self._clean_text(response.json().get('response', '').strip())
+            summary = self.llm.generate(prompt, {"temperature": 0.2, "num_predict": 2000}, target_words=target_words)
+            if summary:
+                return self._clean_text(summary)
         except Exception as e:
             print(f"Direct summarize error: {e}")
         return self._fallback_summarize(article)
@@ -322,16 +331,40 @@ Tóm tắt:"""
         '''
         if not text or len(text.strip()) == 0:
             return text
+        if not self.quality_gate:
+            return self._run_corrector(text)
+        
+        sentences = split_sentences(text)
+        flags = self.quality_gate.flag(sentences)
+        self.last_quality = new_stats()
+        self._count(sentences=len(sentences), corrected=sum(flags), skipped_correct=len(flags) - sum(flags))
+        self._corrected = set()
+        if not any(flags):
+            return text
+        
+        out, pos = [], 0
+        for start, end in regions(flags):
+            out.extend(sentences[pos:start])
+            corrected = split_sentences(self._run_corrector(' '.join(sentences[start:end])))
+            self._corrected.update(set(corrected) - set(sentences[start:end]))
+            out.extend(corrected)
+            pos = end
+        out.extend(sentences[pos:])
+        return ' '.join(out)
+    
+    def _run_corrector(self, text: str) -> str:
+        '''Run the seq2seq corrector over text in 120-word chunks.'''
+        tokenizer, model, device = self.models.get('corrector')
         words = text.split()
         max_words = int(160 * 0.75)
         corrected_chunks = []
         for i in range(0, len(words), max_words):
             chunk = ' '.join(words[i:i+max_words])
             try:
-                inputs = self.tokenizer(chunk, return_tensors="pt", truncation=True, max_length=160).to(self.device)
+                inputs = tokenizer(chunk, return_tensors="pt", truncation=True, max_length=160).to(device)
                 with torch.no_grad():
-                    outputs = self.corrector_model.generate(**inputs, num_beams=10, max_new_tokens=160, early_stopping=True)
-                corrected_chunks.append(self.tokenizer.decode(outputs[0], skip_special_tokens=True))
+                    outputs = model.generate(**inputs, num_beams=10, max_new_tokens=160, early_stopping=True)
+                corrected_chunks.append(tokenizer.decode(outputs[0], skip_special_tokens=True))
             except Exception as e:
                 print(f"Correction failed: {e}")
                 corrected_chunks.append(chunk)
@@ -347,30 +380,44 @@ Tóm tắt:"""
         Returns:
             Refined text
         '''
-        prompt = f"""Chỉnh sửa văn bản tin tức sau:
-
-QUY TẮC:
-1. Sửa lỗi ngữ pháp và chính tả
-2. Mỗi từ PHẢI cách nhau bằng dấu cách
-3. Số viết liền: 1.890 → 1890
-4. Ngày viết chữ: 8/1 → mùng 8 tháng 1
-5. Giữ nguyên nội dung
-6. Kết thúc bằng câu hoàn chỉnh
+        if not self.quality_gate:
+            return self._run_refiner(text)
+        
+        # Only sentences that still look wrong or were just rewritten by the corrector
+        sentences = split_sentences(text)
+        flags = [s in self._corrected or bool(self.quality_gate.issues(s)) for s in sentences]
+        self._count(refined=sum(flags), skipped_refine=len(flags) - sum(flags))
+        if not any(flags):
+            return text
+        if sum(flags) * 2 > len(flags):
+            return self._run_refiner(text)
+        
+        out, pos = [], 0
+        for start, end in regions(flags):
+            out.extend(sentences[pos:start])
+            out.append(self._run_refiner(' '.join(sentences[start:end])))
+            pos = end
+        out.extend(sentences[pos:])
+        return ' '.join(out)
+    
+    def _count(self, **counts):
+        '''Add quality gate counts to the per-body and cumulative stats.'''
+        for key, value in counts.items():
+            self.last_quality[key] += value
+            self.quality_stats[key] += value
+    
+    def _run_refiner(self, text: str) -> str:
+        '''Refine text with one LLM call; keeps the input if the output length is off.'''
+        prompt = f"""Chỉnh sửa văn bản tin tức sau: sửa lỗi ngữ pháp và chính tả, giữ nguyên nội dung.
 
 Văn bản: "{text}"
 
 Văn bản đã sửa:"""
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={"model": self.ollama_model, "prompt": prompt, "stream": False,
-                      "options": {"temperature": 0.2, "num_predict": 2000}},
-                timeout=120
-            )
-            if response.status_code == 200:
-                refined = response.json().get('response', '').strip()
-                if refined and 0.5 < len(refined)/len(text) < 1.5:
-                    return self._clean_text(refined)
+            refined = self.llm.generate(prompt, {"temperature": 0.2, "num_predict": 2000},
+                                        target_words=len(text.split()))
+            if refined and 0.5 < len(refined)/len(text) < 1.5:
+                return self._clean_text(refined)
         except Exception as e:
             print(f"Refine error: {e}")
         return text
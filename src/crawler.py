@@ -0,0 +1,224 @@
+"""
+Crawler Module - Asyncio multi-source article harvesting.
+
+Discovers article URLs from category/RSS listing pages of the supported sites,
+fetches them concurrently over one shared connection pool with per-host rate
+limits, deduplicates by canonical URL and feeds crawled articles into a job
+queue for video generation: an in-process queue.Queue (generate_batch) or,
+through JobQueueSink, the durable queue that QueueWorker processes consume.
+
+Usage (harvest listings into the durable queue):
+    python src/worker.py harvest https://vnexpress.net/rss/tin-moi-nhat.rss --limit 20
+"""
+import os
+import time
+import queue
+import asyncio
+import aiohttp
+from typing import Dict, List
+from urllib.parse import urlparse
+from extractors import get_extractor, canonical_url, image_filename
+from imageselect import ImageSelector, new_stats
+from jobqueue import JobQueue
+
+
+class JobQueueSink:
+    '''Enqueue crawled articles as video jobs on a JobQueue (same put() as queue.Queue).'''
+
+    def __init__(self, job_queue: JobQueue, options: Dict = None, priority: int = 1, max_attempts: int = 3):
+        self.job_queue = job_queue
+        self.options = options
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.jobs = []
+
+    def put(self, article: Dict):
+        '''Enqueue the article URL (idempotent: a URL already queued keeps its job).'''
+        job = self.job_queue.enqueue(article['url'], self.options, self.priority, self.max_attempts)
+        self.jobs.append(job)
+        return job
+
+
+class _HostLimiter:
+    '''Limit concurrent requests and request spacing for one host.'''
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.lock = asyncio.Lock()
+        self.min_interval = min_interval
+        self.last_request = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        async with self.lock:
+            wait = self.last_request + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.last_request = time.monotonic()
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+class AsyncCrawler:
+    '''
+    Concurrent crawler for listing pages and articles.
+
+    Responsibilities:
+    - Discover article URLs from category pages and RSS feeds
+    - Fetch articles and images concurrently with per-host limits
+    - Probe image headers and download only the images that will be used
+    - Deduplicate articles by canonical URL
+    - Push crawled articles to a job queue (queue.Queue or JobQueueSink)
+    '''
+
+    def __init__(self, output_dir: str = "output/images", concurrency: int = 16,
+                 per_host: int = 4, min_interval: float = 0.25, timeout: float = 10):
+        '''
+        Initialize the crawler.
+
+        Args:
+            output_dir: Directory to save downloaded images
+            concurrency: Total connection pool size
+            per_host: Max concurrent requests per host
+            min_interval: Minimum seconds between requests to one host
+            timeout: Per-request timeout in seconds
+        '''
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+        self.seen = set()
+        self.image_selector = ImageSelector()
+        self._limiters = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _limiter(self, url: str) -> _HostLimiter:
+        host = urlparse(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = _HostLimiter(self.per_host, self.min_interval)
+        return self._limiters[host]
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        '''Fetch URL body respecting the host's rate limit.'''
+        async with self._limiter(url):
+            async with session.get(url) as response:
+                response.raise_for_status()
+                return await response.read()
+
+    async def _get(self, session: aiohttp.ClientSession, url: str, headers: Dict = None) -> tuple:
+        '''GET url respecting the host's rate limit; returns (status, body), or (0, b'') on errors.'''
+        try:
+            async with self._limiter(url):
+                async with session.get(url, headers=headers) as response:
+                    return response.status, await response.read()
+        except Exception:
+            return 0, b''
+
+    async def discover(self, session: aiohttp.ClientSession, listing_url: str) -> List[str]:
+        '''Return article URLs linked from a listing page or RSS feed.'''
+        try:
+            content = await self._fetch(session, listing_url)
+            return get_extractor(listing_url).discover(content, listing_url)
+        except Exception as e:
+            print(f"Listing error ({listing_url}): {e}")
+            return []
+
+    async def crawl(self, session: aiohttp.ClientSession, url: str) -> Dict:
+        '''Fetch and parse one article, downloading its images. Returns None on duplicates.'''
+        extractor = get_extractor(url)
+        content = await self._fetch(session, url)
+        article = extractor.parse(content, url)
+        if article['canonical_url'] in self.seen and article['canonical_url'] != canonical_url(url):
+            return None
+        self.seen.add(article['canonical_url'])
+
+        selected, article['image_stats'] = await self._select_images(session, article.pop('image_urls'))
+        paths = []
+        for idx, (img_url, data) in enumerate(selected):
+            filepath = os.path.join(self.output_dir, image_filename(img_url, f"{extractor.name}_{idx}"))
+            try:
+                await asyncio.to_thread(self._write, filepath, data)
+                paths.append(filepath)
+            except Exception as e:
+                print(f"Failed to save image: {e}")
+        article['images'] = paths
+        return article
+
+    async def _select_images(self, session: aiohttp.ClientSession, urls: List[str]) -> tuple:
+        '''Probe candidates concurrently, then download and admit them in waves (see ImageSelector.select).'''
+        selector, stats = self.image_selector, new_stats()
+        stats['candidates'] = len(urls)
+        probes = await asyncio.gather(*[self._get(session, url, selector.range_header) for url in urls])
+        passed = []
+        for url, (status, data) in zip(urls, probes):
+            keep, body = selector.screen(status, data, stats)
+            if keep:
+                passed.append((url, body))
+
+        selected, hashes = [], []
+        while passed and len(selected) < selector.max_images:
+            needed = selector.max_images - len(selected)
+            wave, passed = passed[:needed], passed[needed:]
+            fetched = iter(await asyncio.gather(*[self._get(session, url) for url, body in wave if body is None]))
+            responses = [None if body is not None else next(fetched) for _, body in wave]
+            # Hashing decodes images; keep it off the event loop
+            await asyncio.to_thread(selector.take, wave, responses, selected, hashes, stats)
+        stats['selected'] = len(selected)
+        return selected, stats
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        # Replace rather than overwrite: the name may be a hardlink into the artifact store
+        with open(path + '.part', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.part', path)
+
+    async def harvest(self, listing_urls: List[str], job_queue: queue.Queue = None,
+                      limit: int = None) -> List[Dict]:
+        '''
+        Discover and crawl articles from listing pages.
+
+        Args:
+            listing_urls: Category or RSS URLs of supported sites
+            job_queue: Optional queue receiving each article as soon as it is crawled; put()
+                runs off the event loop, so bounded queues and database sinks may block
+            limit: Max number of articles to crawl
+
+        Returns:
+            List of crawled articles
+        '''
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers) as session:
+            found = await asyncio.gather(*[self.discover(session, u) for u in listing_urls])
+            urls = []
+            for url in (u for batch in found for u in batch):
+                key = canonical_url(url)
+                if key not in self.seen:
+                    self.seen.add(key)
+                    urls.append(url)
+            urls = urls[:limit] if limit else urls
+            print(f"   ✓ Discovered {len(urls)} new articles from {len(listing_urls)} listings")
+
+            articles = []
+
+            async def worker(url):
+                try:
+                    article = await self.crawl(session, url)
+                except Exception as e:
+                    print(f"Crawl error ({url}): {e}")
+                    return
+                if article:
+                    articles.append(article)
+                    if job_queue is not None:
+                        await asyncio.to_thread(job_queue.put, article)
+
+            await asyncio.gather(*[worker(u) for u in urls])
+            return articles
+
+    def run(self, listing_urls: List[str], job_queue: queue.Queue = None, limit: int = None) -> List[Dict]:
+        '''Blocking wrapper around harvest().'''
+        return asyncio.run(self.harvest(listing_urls, job_queue, limit))
@@ -0,0 +1,279 @@
+"""
+Dedup Module - Near-duplicate article detection with MinHash/LSH.
+
+Different outlets often cover the same event. Each crawled article is reduced
+to a MinHash signature over word shingles; signatures are split into LSH
+bands whose hashes are stored in an indexed SQLite table, so a lookup is a
+single indexed query regardless of how many articles are stored. Candidates
+are confirmed by the estimated Jaccard similarity of their signatures.
+
+Usage:
+    python src/dedup.py stats
+    python src/dedup.py prune --days 30
+"""
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+import threading
+import numpy as np
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+class DuplicateArticle(Exception):
+    '''Raised when an article is a near-duplicate of a recently processed one.'''
+
+    def __init__(self, url: str, match: Dict):
+        super().__init__(f"Near-duplicate of {match['url']} (similarity {match['similarity']:.2f})")
+        self.url = url
+        self.match = match
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    '''
+    Choose (bands, rows) so the LSH candidate threshold sits just below the similarity threshold.
+
+    Candidates are confirmed afterwards, so erring low trades a few extra
+    signature comparisons for fewer missed duplicates.
+    '''
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold * 0.9:
+            best = (bands, rows)
+    return best
+
+
+class DuplicateIndex:
+    '''
+    Persistent MinHash/LSH index over article text.
+
+    Responsibilities:
+    - Compute MinHash signatures of article text
+    - Store signatures and band hashes on disk
+    - Find near-duplicates within a time window
+    - Prune articles older than the retention period
+    '''
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT UNIQUE NOT NULL,
+            source TEXT,
+            title TEXT,
+            created REAL NOT NULL,
+            signature BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS bands (
+            bucket INTEGER NOT NULL,
+            article_id INTEGER NOT NULL,
+            PRIMARY KEY (bucket, article_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS bands_article ON bands (article_id);
+        CREATE INDEX IF NOT EXISTS articles_created ON articles (created);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    '''
+
+    def __init__(self, path: str = "output/dedup.db", threshold: float = 0.5, num_perm: int = 128,
+                 shingle_size: int = 3, window_days: float = 3, seed: int = 1):
+        '''
+        Initialize the index, creating the database if needed.
+
+        Args:
+            path: SQLite database file
+            threshold: Estimated Jaccard similarity at which articles count as duplicates
+            num_perm: MinHash permutations (signature length)
+            shingle_size: Words per shingle
+            window_days: Only match articles added within this many days
+            seed: Permutation seed (fixed per database)
+        '''
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.window = window_days * 86400
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+        self._check_params(seed)
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def _check_params(self, seed: int):
+        '''Signatures are only comparable with the same permutations and banding.'''
+        params = json.dumps({'num_perm': self.num_perm, 'shingle_size': self.shingle_size,
+                             'bands': self.bands, 'seed': seed})
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'params'").fetchone()
+        if row is None:
+            with self._db:
+                self._db.execute("INSERT INTO meta VALUES ('params', ?)", (params,))
+        elif row[0] != params:
+            raise ValueError(f"{self.path} was built with different MinHash parameters: {row[0]}")
+
+    @contextmanager
+    def _tx(self, immediate: bool = False):
+        '''
+        Serialized transaction on the shared connection (used by worker threads).
+
+        immediate takes SQLite's write lock up front, so a read followed by a
+        write cannot interleave with another process doing the same.
+        '''
+        with self._lock, self._db:
+            if immediate:
+                self._db.execute("BEGIN IMMEDIATE")
+            yield self._db
+
+    def close(self):
+        self._db.close()
+
+    def shingles(self, text: str) -> set:
+        '''Lowercased word n-grams of the text.'''
+        words = _WORD.findall(text.lower())
+        n = self.shingle_size
+        if len(words) < n:
+            return {' '.join(words)} if words else set()
+        return {' '.join(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        '''MinHash signature (uint32 per permutation) of the text.'''
+        shingles = self.shingles(text)
+        if not shingles:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _buckets(self, signature: np.ndarray) -> List[int]:
+        '''One signed 64-bit bucket key per band.'''
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+            keys.append(int.from_bytes(digest, 'little', signed=True))
+        return keys
+
+    @staticmethod
+    def _text(article: Dict) -> str:
+        return f"{article.get('title', '')}\n{article.get('content', '')}"
+
+    def query(self, text: str, exclude_url: str = None, now: float = None) -> List[Dict]:
+        '''
+        Find stored articles similar to text within the window.
+
+        Args:
+            text: Article text
+            exclude_url: URL to ignore (the article itself on re-processing)
+            now: Reference time for the window (default: current time)
+
+        Returns:
+            Matches sorted by similarity, each with url, source, title, similarity
+        '''
+        signature = self.signature(text)
+        with self._tx() as db:
+            return self._query(db, signature, self._buckets(signature), exclude_url, now)
+
+    def _query(self, db: sqlite3.Connection, signature: np.ndarray, buckets: List[int], exclude_url: str,
+               now: float) -> List[Dict]:
+        since = (now or time.time()) - self.window
+        rows = db.execute(
+            f"SELECT DISTINCT a.url, a.source, a.title, a.signature FROM bands b "
+            f"JOIN articles a ON a.id = b.article_id "
+            f"WHERE b.bucket IN ({','.join('?' * len(buckets))}) AND a.created >= ?",
+            (*buckets, since)).fetchall()
+        matches = []
+        for url, source, title, blob in rows:
+            if url == exclude_url:
+                continue
+            similarity = float(np.mean(np.frombuffer(blob, dtype=np.uint32) == signature))
+            if similarity >= self.threshold:
+                matches.append({'url': url, 'source': source, 'title': title, 'similarity': similarity})
+        return sorted(matches, key=lambda m: -m['similarity'])
+
+    def add(self, article: Dict, signature: np.ndarray = None, now: float = None):
+        '''Store an article (re-adding a URL replaces its signature).'''
+        signature = self.signature(self._text(article)) if signature is None else signature
+        with self._tx(immediate=True) as db:
+            self._insert(db, article, signature, now)
+
+    def _insert(self, db: sqlite3.Connection, article: Dict, signature: np.ndarray, now: float):
+        url = article.get('canonical_url') or article['url']
+        row = db.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()
+        if row:
+            db.execute("DELETE FROM bands WHERE article_id = ?", (row[0],))
+            db.execute("DELETE FROM articles WHERE id = ?", (row[0],))
+        cur = db.execute("INSERT INTO articles (url, source, title, created, signature) VALUES (?, ?, ?, ?, ?)",
+                         (url, article.get('source'), article.get('title'), now or time.time(),
+                          signature.tobytes()))
+        db.executemany("INSERT INTO bands (bucket, article_id) VALUES (?, ?)",
+                       [(key, cur.lastrowid) for key in self._buckets(signature)])
+
+    def check(self, article: Dict, now: float = None) -> Dict:
+        '''
+        Look up an article and record it.
+
+        The lookup and the insert share one transaction, so two workers checking
+        copies of the same story cannot both miss each other.
+
+        Returns:
+            Best match if the article is a near-duplicate, else None
+        '''
+        url = article.get('canonical_url') or article['url']
+        signature = self.signature(self._text(article))
+        with self._tx(immediate=True) as db:
+            matches = self._query(db, signature, self._buckets(signature), url, now)
+            if not matches:
+                self._insert(db, article, signature, now)
+        return matches[0] if matches else None
+
+    def prune(self, max_age_days: float = 30) -> int:
+        '''Delete articles older than max_age_days. Returns the number removed.'''
+        cutoff = time.time() - max_age_days * 86400
+        with self._tx() as db:
+            db.execute("DELETE FROM bands WHERE article_id IN (SELECT id FROM articles WHERE created < ?)", (cutoff,))
+            return db.execute("DELETE FROM articles WHERE created < ?", (cutoff,)).rowcount
+
+    def stats(self) -> Dict:
+        with self._tx() as db:
+            count = db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        return {'articles': count, 'bands': self.bands, 'rows': self.rows, 'threshold': self.threshold,
+                'window_days': self.window / 86400,
+                'db_mb': round(os.path.getsize(self.path) / 1024**2, 1) if os.path.exists(self.path) else 0}
+
+
+def main():
+    '''CLI entry point.'''
+    parser = argparse.ArgumentParser(description='Near-duplicate article index')
+    parser.add_argument('--db', type=str, default='output/dedup.db')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help='Show index size')
+    prune = sub.add_parser('prune', help='Remove old articles')
+    prune.add_argument('--days', type=float, default=30)
+    args = parser.parse_args()
+
+    index = DuplicateIndex(args.db)
+    if args.command == 'stats':
+        print(json.dumps(index.stats(), indent=2))
+    elif args.command == 'prune':
+        print(f"✓ Pruned {index.prune(args.days)} articles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Extractive Module - Salient-sentence pre-compression before LLM summarization.
+
+Scores sentences with TextRank over TF-IDF sentence vectors (NumPy, no model)
+and keeps the best ones, in original order, up to a token budget. Long
+articles then fit a single summarization call instead of one LLM call per
+1500-character chunk.
+
+Usage (benchmark against the chunked map-reduce path):
+    python src/extractive.py tests/fixtures/articles/*.txt
+    python src/extractive.py article1.json article2.txt --ollama http://localhost:11434
+
+Recorded results for the fixture articles (FakeOllama, target 350 words,
+ratio 3.0) are in tests/fixtures/articles/precompress_results.json.
+"""
+import re
+import json
+import time
+import argparse
+import numpy as np
+from typing import Dict, List
+
+# Same ratio OllamaClient uses for num_predict budgets
+TOKENS_PER_WORD = 2.0
+
+_SENTENCE = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def split_sentences(text: str) -> List[str]:
+    '''Split text at sentence-ending punctuation.'''
+    return [s.strip() for s in _SENTENCE.split(text) if s.strip()]
+
+
+def estimate_tokens(text: str) -> int:
+    '''Approximate LLM token count of text.'''
+    return int(len(text.split()) * TOKENS_PER_WORD)
+
+
+def tfidf_matrix(sentences: List[str]) -> np.ndarray:
+    '''L2-normalized TF-IDF vectors, one row per sentence.'''
+    vocab, rows, cols = {}, [], []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD.findall(sentence.lower()):
+            rows.append(i)
+            cols.append(vocab.setdefault(word, len(vocab)))
+    tf = np.zeros((len(sentences), max(1, len(vocab))), dtype=np.float32)
+    np.add.at(tf, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + df)) + 1.0
+    weights = tf * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.maximum(norms, 1e-9)
+
+
+def textrank(sentences: List[str], damping: float = 0.85, lead_bias: float = 0.5,
+             iterations: int = 50, tol: float = 1e-6) -> np.ndarray:
+    '''
+    TextRank scores over cosine similarity of TF-IDF vectors.
+
+    Args:
+        sentences: Sentences in article order
+        damping: PageRank damping factor
+        lead_bias: Share of the teleport mass given to earlier sentences (news lead)
+        iterations: Maximum power iterations
+        tol: Convergence tolerance
+
+    Returns:
+        Score per sentence (sums to 1)
+    '''
+    n = len(sentences)
+    if n <= 2:
+        return np.full(n, 1.0 / max(n, 1))
+    vectors = tfidf_matrix(sentences)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    out = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out, out=np.full_like(similarity, 1.0 / n), where=out > 0)
+
+    lead = 1.0 / np.sqrt(np.arange(1, n + 1))
+    teleport = (1 - lead_bias) / n + lead_bias * lead / lead.sum()
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        updated = (1 - damping) * teleport + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tol:
+            scores = updated
+            break
+        scores = updated
+    return scores
+
+
+def compress(text: str, max_tokens: int) -> Dict:
+    '''
+    Keep the most salient sentences, in article order, within max_tokens.
+
+    Args:
+        text: Article text
+        max_tokens: Token budget for the kept sentences
+
+    Returns:
+        Dict with text, sentences kept/total and tokens before/after
+    '''
+    sentences = split_sentences(text)
+    tokens_before = estimate_tokens(text)
+    if tokens_before <= max_tokens:
+        return {'text': text, 'kept': len(sentences), 'total': len(sentences),
+                'tokens_before': tokens_before, 'tokens_after': tokens_before}
+
+    scores = textrank(sentences)
+    costs = [estimate_tokens(s) for s in sentences]
+    keep, used = [], 0
+    for i in np.argsort(-scores, kind='stable'):
+        if used + costs[i] <= max_tokens:
+            keep.append(i)
+            used += costs[i]
+    keep.sort()
+    return {'text': ' '.join(sentences[i] for i in keep), 'kept': len(keep), 'total': len(sentences),
+            'tokens_before': tokens_before, 'tokens_after': used}
+
+
+def _load_fixture(path: str) -> Dict:
+    '''Article dict from a crawl_article JSON dump or a plain text file (first line = title).'''
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            data = json.load(f)
+            content = data.get('content') or data.get('body') or data.get('full_script', '')
+            return {'title': data.get('title', ''), 'description': data.get('description', ''), 'content': content}
+        lines = f.read().strip().split('\n')
+    return {'title': lines[0], 'description': '', 'content': ' '.join(lines[1:])}
+
+
+def benchmark(paths: List[str], ollama_url: str = None, target_words: int = 350, ratio: float = 3.0,
+              output: str = None) -> List[Dict]:
+    '''
+    Compare LLM calls, prompt tokens and latency of summarize() with and without pre-compression.
+
+    Runs against a local FakeOllama unless ollama_url is given. The corrector
+    is not loaded, so only the LLM runs. Results are written to output as JSON
+    when given.
+    '''
+    from core import NewsProcessor
+    from stubs import FakeOllama
+
+    stub = None
+    if not ollama_url:
+        stub = FakeOllama(token_delay=0.002, prompt_delay=0.0005).start()
+        ollama_url = stub.url
+    processor = NewsProcessor(ollama_url=ollama_url, load_corrector=False)
+    results = []
+    try:
+        for path in paths:
+            article = _load_fixture(path)
+            row = {'article': path, 'words': len(f"{article['description']} {article['content']}".split())}
+            for label, value in (('chunked', None), ('precompressed', ratio)):
+                processor.precompress_ratio = value
+                before = processor.llm.summary()
+                start = time.perf_counter()
+                processor.summarize(article, target_words)
+                elapsed = time.perf_counter() - start
+                calls = processor.llm.summary(since=before)
+                row[label] = {'calls': calls['calls'], 'seconds': round(elapsed, 2),
+                              'prompt_tokens': calls['prompt_tokens'], 'output_tokens': calls['tokens']}
+            results.append(row)
+    finally:
+        if stub:
+            stub.stop()
+
+    print(f"\n{'article':<40} {'words':>6} {'calls':>9} {'prompt tok':>15} {'seconds':>15}")
+    for r in results:
+        a, b = r['chunked'], r['precompressed']
+        print(f"{r['article'][-40:]:<40} {r['words']:>6} {a['calls']:>4}→{b['calls']:<4} "
+              f"{a['prompt_tokens']:>7}→{b['prompt_tokens']:<7} {a['seconds']:>7}→{b['seconds']:<7}")
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'ollama': 'FakeOllama' if stub else ollama_url, 'target_words': target_words,
+                       'ratio': ratio, 'articles': results}, f, ensure_ascii=False, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark extractive pre-compression before summarization')
+    parser.add_argument('articles', nargs='+', help='crawl_article JSON dumps or text files (first line = title)')
+    parser.add_argument('--ollama', type=str, help='Ollama URL (default: local FakeOllama stub)')
+    parser.add_argument('--target-words', type=int, default=350)
+    parser.add_argument('--ratio', type=float, default=3.0, help='Input words kept per target summary word')
+    parser.add_argument('--output', type=str, help='Write results as JSON')
+    args = parser.parse_args()
+    benchmark(args.articles, args.ollama, args.target_words, args.ratio, args.output)
@@ -0,0 +1,283 @@
+"""
+Extractors Module - Per-site article parsers behind a pluggable registry.
+
+Each supported news site registers one extractor that knows how to parse an
+article page, discover article links on listing/RSS pages and recognise its
+own article URLs. Sites are described declaratively in SITES (simple
+`tag.class` selectors compiled once to lxml XPath objects); only the article
+region of the page is parsed when the site defines region markers.
+
+Usage (parse-time benchmark over saved pages):
+    python src/extractors.py tests/fixtures/pages/*.html --repeat 20
+    python src/extractors.py saved.html --site vnexpress
+"""
+import os
+import re
+import time
+import argparse
+from abc import ABC, abstractmethod
+from typing import Dict, List
+from urllib.parse import urlparse, urljoin, urlunparse
+from lxml import html as lxml_html, etree
+from imageselect import pick_source
+
+
+# Declarative selector table. Selectors are `tag.class` steps separated by
+# spaces (descendant). `region` holds byte regexes bounding the part of the
+# page that contains title, description and body; parsing falls back to the
+# full page if the markers are missing.
+SITES = [
+    {
+        'name': "vnexpress",
+        'source': "VnExpress",
+        'domains': ("vnexpress",),
+        'article_pattern': r'-\d+\.html$',
+        'title': "h1.title-detail",
+        'description': "p.description",
+        'body': "article.fck_detail",
+        'paragraphs': "p.Normal",
+        'region': (rb'<h1[^>]*class="[^"]*title-detail', rb'</article>'),
+    },
+    {
+        'name': "tienphong",
+        'source': "Tien Phong",
+        'domains': ("tienphong",),
+        'article_pattern': r'post\d+\.tpo$',
+        'title': "h1.article-title",
+        'description': "h2.article-sapo",
+        'body': "div.article-body",
+        'paragraphs': "p",
+        'region': (rb'<h1[^>]*class="[^"]*article-title', None),
+    },
+]
+
+_REGISTRY = []
+_UTF8_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+_CANONICAL = re.compile(rb'<link[^>]+rel=["\']canonical["\'][^>]*href=["\']([^"\']+)', re.I)
+
+
+def register_site(config: Dict) -> 'SelectorExtractor':
+    '''Register a selector-table site configuration.'''
+    extractor = SelectorExtractor(config)
+    _REGISTRY.append(extractor)
+    return extractor
+
+
+def get_extractor(url: str) -> 'SiteExtractor':
+    '''Return the extractor registered for the URL's domain.'''
+    domain = urlparse(url).netloc
+    for extractor in _REGISTRY:
+        if any(d in domain for d in extractor.domains):
+            return extractor
+    raise ValueError(f"Unsupported news site: {domain}")
+
+
+def supported_sites() -> List[str]:
+    '''List registered extractor names.'''
+    return [e.name for e in _REGISTRY]
+
+
+def canonical_url(url: str) -> str:
+    '''Normalize URL for deduplication (https, lowercase host, no query/fragment).'''
+    parts = urlparse(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('m.'):
+        host = host[2:]
+    return urlunparse(('https', host, parts.path.rstrip('/') or '/', '', '', ''))
+
+
+def image_filename(img_url: str, prefix: str) -> str:
+    '''Local filename used for a downloaded article image.'''
+    ext = img_url.split('.')[-1].split('?')[0][:4]
+    return f"{prefix}_{hash(img_url) % 10000}.{ext}"
+
+
+def selector_to_xpath(selector: str, relative: bool = False) -> str:
+    '''Convert `tag.class tag2.class2` into an XPath matching whole class tokens.'''
+    steps = []
+    for step in selector.split():
+        tag, _, cls = step.partition('.')
+        pred = f"[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]" if cls else ""
+        steps.append(f"{tag or '*'}{pred}")
+    return ('.//' if relative else '//') + '//'.join(steps)
+
+
+def _text(nodes) -> str:
+    '''Stripped text of the first matched node.'''
+    return nodes[0].text_content().strip() if nodes else ""
+
+
+class SiteExtractor(ABC):
+    '''
+    Base class for site extractors.
+
+    Subclasses set name/source/domains and article_pattern, and implement
+    parse() for article pages.
+    '''
+
+    name = ""
+    source = ""
+    domains = ()
+    article_pattern = None
+    max_candidates = 24
+
+    @abstractmethod
+    def parse(self, content: bytes, url: str) -> Dict:
+        '''
+        Parse an article page.
+
+        Returns:
+            Dictionary with title, description, content, image_urls (candidates in page
+            order, narrowed down by ImageSelector), source, url, canonical_url
+        '''
+
+    def is_article_url(self, url: str) -> bool:
+        '''Check whether URL points to an article on this site.'''
+        parts = urlparse(url)
+        return (any(d in parts.netloc for d in self.domains)
+                and bool(self.article_pattern and self.article_pattern.search(parts.path)))
+
+    def discover(self, content: bytes, base_url: str) -> List[str]:
+        '''Extract article URLs from a category page or RSS feed.'''
+        if content.lstrip()[:5] == b'<?xml' or b'<rss' in content[:512]:
+            root = etree.fromstring(content, parser=etree.XMLParser(recover=True))
+            links = [l.strip() for l in root.xpath('//item/link/text()')]
+        else:
+            links = lxml_html.fromstring(content).xpath('//a/@href')
+        urls, seen = [], set()
+        for link in links:
+            absolute = urljoin(base_url, link)
+            key = canonical_url(absolute)
+            if self.is_article_url(absolute) and key not in seen:
+                seen.add(key)
+                urls.append(absolute)
+        return urls
+
+    def _result(self, content: bytes, url: str, title: str, desc: str, paragraphs: List[str], images) -> Dict:
+        '''Assemble the article dictionary.'''
+        canonical = _CANONICAL.search(content)
+        image_urls = []
+        for img in images:
+            img_url = pick_source(img, url)
+            if img_url and img_url not in image_urls:
+                image_urls.append(img_url)
+            if len(image_urls) >= self.max_candidates:
+                break
+        return {
+            'title': title,
+            'description': desc,
+            'content': ' '.join(p for p in paragraphs if p),
+            'image_urls': image_urls,
+            'source': self.source,
+            'url': url,
+            'canonical_url': canonical_url(canonical.group(1).decode('utf-8', 'ignore') if canonical else url)
+        }
+
+
+class SelectorExtractor(SiteExtractor):
+    '''Extractor driven by one SITES table entry with precompiled XPath selectors.'''
+
+    def __init__(self, config: Dict):
+        self.name = config['name']
+        self.source = config['source']
+        self.domains = tuple(config['domains'])
+        self.article_pattern = re.compile(config['article_pattern'])
+        self.title_xp = etree.XPath(selector_to_xpath(config['title']))
+        self.desc_xp = etree.XPath(selector_to_xpath(config['description']))
+        self.body_xp = etree.XPath(selector_to_xpath(config['body']))
+        self.para_xp = etree.XPath(selector_to_xpath(config['paragraphs'], relative=True))
+        start, end = config.get('region') or (None, None)
+        self.region_start = re.compile(start) if start else None
+        self.region_end = re.compile(end) if end else None
+
+    def _region(self, content: bytes) -> bytes:
+        '''Slice of the page holding the article, or None to parse everything.'''
+        if not self.region_start:
+            return None
+        start = self.region_start.search(content)
+        if not start:
+            return None
+        end = self.region_end.search(content, start.start()) if self.region_end else None
+        return content[start.start():end.end() if end else len(content)]
+
+    def parse(self, content: bytes, url: str, partial: bool = True) -> Dict:
+        region = self._region(content) if partial else None
+        # Region slices lose the page's <meta charset>; both supported sites serve UTF-8
+        tree = lxml_html.fromstring(region, parser=_UTF8_PARSER) if region is not None else lxml_html.fromstring(content)
+        body = self.body_xp(tree)
+        if region is not None and not body:
+            return self.parse(content, url, partial=False)
+        paragraphs = self.para_xp(body[0]) if body else []
+        return self._result(
+            content, url,
+            _text(self.title_xp(tree)),
+            _text(self.desc_xp(tree)),
+            [p.text_content().strip() for p in paragraphs],
+            body[0].iter('img') if body else []
+        )
+
+
+for _site in SITES:
+    register_site(_site)
+
+
+def get_site(name: str) -> 'SiteExtractor':
+    '''Return the extractor registered under a site name.'''
+    for extractor in _REGISTRY:
+        if extractor.name == name:
+            return extractor
+    raise ValueError(f"Unknown site: {name} (known: {', '.join(supported_sites())})")
+
+
+def benchmark(paths: List[str], repeat: int = 10, site: str = None) -> Dict:
+    '''
+    Compare parse time of BeautifulSoup (html.parser), full lxml and region-only lxml.
+
+    Args:
+        paths: Saved article pages
+        repeat: Parses per page per method
+        site: Site name for every page (default: inferred from each page's canonical link)
+
+    Returns:
+        Mean milliseconds per page for each method
+    '''
+    from bs4 import BeautifulSoup
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read()
+        canonical = _CANONICAL.search(content)
+        url = canonical.group(1).decode('utf-8', 'ignore') if canonical else None
+        if site:
+            extractor = get_site(site)
+            url = url or f"https://{extractor.domains[0]}/{os.path.basename(path)}"
+        elif url:
+            extractor = get_extractor(url)
+        else:
+            raise ValueError(f"{path} has no canonical link; pass --site")
+        pages.append((extractor, content, url))
+
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for extractor, content, url in pages:
+                fn(extractor, content, url)
+        return (time.perf_counter() - start) * 1000 / (repeat * len(pages))
+
+    results = {
+        'bs4_html_parser': timed(lambda e, c, u: BeautifulSoup(c, 'html.parser')),
+        'lxml_full': timed(lambda e, c, u: e.parse(c, u, partial=False)),
+        'lxml_region': timed(lambda e, c, u: e.parse(c, u)),
+    }
+    for name, ms in results.items():
+        print(f"   {name:<16} {ms:8.2f} ms/page  ({results['bs4_html_parser'] / ms:.1f}x)")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark article parsing on saved pages')
+    parser.add_argument('pages', nargs='+', help='Saved HTML pages')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--site', type=str, help='Site of every page (default: from the canonical link)')
+    args = parser.parse_args()
+    benchmark(args.pages, args.repeat, args.site)
@@ -0,0 +1,356 @@
+"""
+Frame Writer Module - Raw frame pipe to ffmpeg without per-frame copies.
+
+Frame generators render in place into one of two preallocated uint8 buffers;
+a writer thread pipes the filled buffer to ffmpeg's stdin through a
+memoryview while the next frame is being rendered into the other buffer.
+Static content skips per-frame work: still segments are encoded with
+ffmpeg's image loop and static overlays are pre-multiplied and blended only
+over their bounding box.
+
+Usage (benchmark against MoviePy's write_videofile):
+    python src/framewriter.py --seconds 10 --width 1080 --height 1920
+"""
+import os
+import time
+import queue
+import tempfile
+import argparse
+import threading
+import subprocess
+import numpy as np
+from typing import Callable, Tuple
+from PIL import Image
+
+
+class FFmpegFrameWriter:
+    '''
+    Double-buffered rgb24 writer to an ffmpeg subprocess.
+
+    Responsibilities:
+    - Own preallocated frame buffers and hand them to renderers
+    - Write frames to ffmpeg stdin via memoryview on a background thread
+    - Mux an optional audio track
+    '''
+
+    def __init__(self, output_path: str, size: Tuple[int, int], fps: float, audio_path: str = None,
+                 codec: str = 'libx264', preset: str = 'medium', bitrate: str = '6000k',
+                 threads: int = 4, audio_codec: str = 'aac', buffers: int = 2):
+        '''
+        Initialize the writer (ffmpeg starts on open()).
+
+        Args:
+            output_path: Output video file
+            size: Frame size (width, height)
+            fps: Frames per second
+            audio_path: Optional audio file to mux
+            codec: Video codec
+            preset: Encoder preset
+            bitrate: Video bitrate
+            threads: Encoder threads
+            audio_codec: Audio codec when audio_path is given
+            buffers: Number of frame buffers (2 = double buffering)
+        '''
+        self.output_path = output_path
+        self.width, self.height = size
+        self.fps = fps
+        self.audio_path = audio_path
+        self.codec = codec
+        self.preset = preset
+        self.bitrate = bitrate
+        self.threads = threads
+        self.audio_codec = audio_codec
+        self.buffers = [np.empty((self.height, self.width, 3), dtype=np.uint8) for _ in range(buffers)]
+        self.frames_written = 0
+        self.bytes_written = 0
+        self._free = queue.Queue()
+        self._filled = queue.Queue()
+        self._error = None
+        self._pending = None
+        self._proc = None
+        self._thread = None
+
+    def _command(self) -> list:
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{self.width}x{self.height}",
+               '-r', str(self.fps), '-i', '-']
+        if self.audio_path:
+            cmd += ['-i', self.audio_path, '-c:a', self.audio_codec, '-shortest']
+        cmd += ['-c:v', self.codec, '-preset', self.preset, '-b:v', self.bitrate,
+                '-pix_fmt', 'yuv420p', '-threads', str(self.threads), self.output_path]
+        return cmd
+
+    def open(self):
+        '''Start ffmpeg and the writer thread.'''
+        # Unbuffered stdin: the memoryview goes straight to write(2) without a copy into a BufferedWriter
+        self._proc = subprocess.Popen(self._command(), stdin=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+        for i in range(len(self.buffers)):
+            self._free.put(i)
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+        return self
+
+    def _pump(self):
+        '''Writer thread: pipe filled buffers to ffmpeg and recycle them.'''
+        stdin = self._proc.stdin
+        while True:
+            idx = self._filled.get()
+            if idx is None:
+                return
+            try:
+                if self._error is None:
+                    stdin.write(memoryview(self.buffers[idx]).cast('B'))
+                    self.bytes_written += self.buffers[idx].nbytes
+                    self.frames_written += 1
+            except (BrokenPipeError, OSError) as e:
+                self._error = e
+            finally:
+                self._free.put(idx)
+
+    def acquire(self) -> np.ndarray:
+        '''Get a free buffer to render the next frame into.'''
+        if self._error:
+            raise RuntimeError(f"ffmpeg pipe failed: {self._error}")
+        self._pending = self._free.get()
+        return self.buffers[self._pending]
+
+    def commit(self):
+        '''Queue the buffer returned by the last acquire() for writing.'''
+        self._filled.put(self._pending)
+
+    def write(self, frame: np.ndarray):
+        '''Copy an externally produced frame into a buffer and queue it.'''
+        np.copyto(self.acquire(), frame, casting='unsafe')
+        self.commit()
+
+    def render(self, render_into: Callable, duration: float, start: float = 0.0):
+        '''
+        Render a clip by calling render_into(t, out) for each frame time.
+
+        Args:
+            render_into: Callable filling `out` (H x W x 3 uint8) for time t
+            duration: Clip duration in seconds
+            start: Clip-local start time
+        '''
+        for i in range(int(round(duration * self.fps))):
+            out = self.acquire()
+            render_into(start + i / self.fps, out)
+            self.commit()
+
+    def close(self):
+        '''Flush remaining frames and wait for ffmpeg to finish.'''
+        if self._thread:
+            self._filled.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._proc:
+            self._proc.stdin.close()
+            stderr = self._proc.stderr.read().decode('utf-8', 'ignore')
+            code = self._proc.wait()
+            self._proc = None
+            if code != 0:
+                raise RuntimeError(f"ffmpeg exited with {code}: {stderr.strip()[-500:]}")
+        if self._error:
+            raise RuntimeError(f"ffmpeg pipe failed: {self._error}")
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pan_renderer(bg: np.ndarray, fg, pan_size: Tuple[int, int], duration: float) -> Callable:
+    '''
+    In-place renderer for the blurred-background pan effect.
+
+    Args:
+        bg: Full-frame background (H x W x 3)
+        fg: Pan layer array, or callable(t) returning it (video B-roll)
+        pan_size: Pan layer size (width, height)
+        duration: Clip duration used for easing
+
+    Returns:
+        render_into(t, out) writing the frame for time t into out
+    '''
+    height, width = bg.shape[:2]
+    pan_w, pan_h = pan_size
+    max_pan = max(0, pan_w - width)
+    y = (height - pan_h) // 2
+
+    def render_into(t: float, out: np.ndarray):
+        progress = min(1.0, max(0.0, t / duration))
+        eased = progress * progress * (3 - 2 * progress)
+        x = -int(max_pan * eased)
+        layer = fg(t) if callable(fg) else fg
+        np.copyto(out, bg)
+        sx1, sy1 = max(0, -x), max(0, -y)
+        sx2, sy2 = min(pan_w, width - x), min(pan_h, height - y)
+        dx1, dy1 = max(0, x), max(0, y)
+        dx2, dy2 = min(width, x + pan_w), min(height, y + pan_h)
+        if sx2 > sx1 and sy2 > sy1:
+            out[dy1:dy2, dx1:dx2] = layer[sy1:sy2, sx1:sx2]
+
+    return render_into
+
+
+class StaticOverlay:
+    '''
+    Pre-multiplied RGBA overlay blended only over its bounding box.
+
+    The overlay is cropped to the pixels with non-zero alpha and stored as
+    premultiplied color plus inverse alpha, so compositing a frame is one
+    integer multiply-add over that slice instead of a full-frame float blend.
+    '''
+
+    def __init__(self, rgba: np.ndarray, position: Tuple[int, int] = (0, 0)):
+        '''
+        Args:
+            rgba: Overlay image (H x W x 4 uint8, or H x W x 3 for an opaque layer)
+            position: Top-left corner (x, y) of the overlay in the frame
+        '''
+        if rgba.shape[2] == 3:
+            rgba = np.dstack([rgba, np.full(rgba.shape[:2], 255, dtype=np.uint8)])
+        rows = np.flatnonzero(rgba[..., 3].any(axis=1))
+        cols = np.flatnonzero(rgba[..., 3].any(axis=0))
+        if rows.size == 0:
+            self.bbox = None
+            return
+        y1, y2, x1, x2 = int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1
+        crop = rgba[y1:y2, x1:x2]
+        alpha = crop[..., 3:].astype(np.uint16)
+        self.opaque = bool((alpha == 255).all())
+        self.color = crop[..., :3] if self.opaque else crop[..., :3].astype(np.uint16) * alpha + 127
+        self.inverse = 255 - alpha
+        x, y = position
+        self.bbox = (x + x1, y + y1, x + x2, y + y2)
+
+    def blend(self, frame: np.ndarray) -> np.ndarray:
+        '''Composite the overlay onto frame in place (frame must be writable).'''
+        if self.bbox is None:
+            return frame
+        x1, y1, x2, y2 = self.bbox
+        # Clip to the frame for overlays positioned partly outside it
+        fx1, fy1 = max(0, x1), max(0, y1)
+        fx2, fy2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
+        if fx2 <= fx1 or fy2 <= fy1:
+            return frame
+        src = (slice(fy1 - y1, fy2 - y1), slice(fx1 - x1, fx2 - x1))
+        region = frame[fy1:fy2, fx1:fx2]
+        if self.opaque:
+            region[...] = self.color[src]
+        else:
+            region[...] = (region * self.inverse[src] + self.color[src]) // 255
+        return frame
+
+
+def encode_still(image: np.ndarray, duration: float, output_path: str, fps: float, preset: str = 'medium',
+                 bitrate: str = '6000k', fade_out: float = 0.0, threads: int = 4):
+    '''
+    Encode a static frame as a video segment with ffmpeg's still-image loop.
+
+    The frame is decoded once by ffmpeg and repeated; identical frames cost
+    the encoder almost nothing, and no frame is composited in Python.
+
+    Args:
+        image: Frame (H x W x 3 uint8)
+        duration: Segment duration in seconds
+        output_path: Output video file
+        fps: Frames per second (must match the segments it is concatenated with)
+        preset: x264 encoder preset
+        bitrate: Video bitrate
+        fade_out: Seconds of fade to black at the end
+        threads: Encoder threads
+    '''
+    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
+        still = tmp.name
+    try:
+        Image.fromarray(image).save(still, compress_level=1)
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-loop', '1', '-framerate', str(fps), '-i', still,
+               '-t', f"{duration:.3f}", '-c:v', 'libx264', '-preset', preset, '-b:v', bitrate,
+               '-pix_fmt', 'yuv420p', '-threads', str(threads)]
+        if fade_out > 0:
+            cmd += ['-vf', f"fade=t=out:st={max(0.0, duration - fade_out):.3f}:d={fade_out:.3f}"]
+        proc = subprocess.run(cmd + [output_path], capture_output=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg still encode failed: {proc.stderr.decode('utf-8', 'ignore').strip()[-500:]}")
+    finally:
+        os.unlink(still)
+
+
+def concat_segments(segments: list, output_path: str, audio_path: str = None, audio_codec: str = 'aac'):
+    '''
+    Join same-format video segments without re-encoding and mux an optional audio track.
+
+    Args:
+        segments: Video files with identical codec, size and frame rate
+        output_path: Output video file
+        audio_path: Audio track covering the joined duration
+        audio_codec: Audio codec when audio_path is given
+    '''
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as listing:
+        for segment in segments:
+            path = os.path.abspath(segment).replace("'", "'\\''")
+            listing.write(f"file '{path}'\n")
+    try:
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', listing.name]
+        if audio_path:
+            cmd += ['-i', audio_path, '-map', '0:v', '-map', '1:a', '-c:a', audio_codec, '-shortest']
+        proc = subprocess.run(cmd + ['-c:v', 'copy', '-movflags', '+faststart', output_path], capture_output=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg concat failed: {proc.stderr.decode('utf-8', 'ignore').strip()[-500:]}")
+    finally:
+        os.unlink(listing.name)
+
+
+def benchmark(seconds: float = 10, size: Tuple[int, int] = (1080, 1920), fps: int = 30,
+              preset: str = 'ultrafast') -> dict:
+    '''
+    Compare FFmpegFrameWriter with MoviePy's write_videofile on a synthetic pan clip.
+
+    Returns:
+        Frames/sec and MB/s of raw frame data for each writer
+    '''
+    from media import VideoClip
+
+    width, height = size
+    rng = np.random.default_rng(0)
+    bg = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    fg = rng.integers(0, 255, (int(height * 0.6), int(width * 1.3), 3), dtype=np.uint8)
+    render_into = pan_renderer(bg, fg, (fg.shape[1], fg.shape[0]), seconds)
+    frames = int(seconds * fps)
+    frame_mb = width * height * 3 / 1024**2
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        with FFmpegFrameWriter(os.path.join(tmp, 'raw.mp4'), size, fps, preset=preset) as writer:
+            writer.render(render_into, seconds)
+        elapsed = time.perf_counter() - start
+        results['frame_writer'] = {'fps': frames / elapsed, 'mb_per_s': frames * frame_mb / elapsed}
+
+        def make_frame(t):
+            out = np.empty((height, width, 3), dtype=np.uint8)
+            render_into(t, out)
+            return out
+
+        start = time.perf_counter()
+        VideoClip(make_frame, duration=seconds).write_videofile(
+            os.path.join(tmp, 'moviepy.mp4'), fps=fps, codec='libx264', preset=preset, threads=4, logger=None)
+        elapsed = time.perf_counter() - start
+        results['write_videofile'] = {'fps': frames / elapsed, 'mb_per_s': frames * frame_mb / elapsed}
+
+    for name, r in results.items():
+        print(f"   {name:<16} {r['fps']:7.1f} frames/s  {r['mb_per_s']:8.1f} MB/s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark raw frame pipe vs write_videofile')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--width', type=int, default=1080)
+    parser.add_argument('--height', type=int, default=1920)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--preset', type=str, default='ultrafast')
+    args = parser.parse_args()
+    benchmark(args.seconds, (args.width, args.height), args.fps, args.preset)
@@ -0,0 +1,286 @@
+"""
+Image Select Module - Pick, probe and deduplicate article images before downloading.
+
+Article pages list thumbnails, icons and several-megapixel originals side by
+side. Selection works in three steps so only images that end up in the video
+are downloaded in full:
+
+1. pick_source chooses the srcset/data-src variant closest to the target width
+2. a ranged GET of the first bytes reads the dimensions from the header and
+   drops images below the size threshold
+3. downloaded images are difference-hashed and near-duplicates are dropped
+
+Usage (select images from URLs and report what was skipped):
+    python src/imageselect.py https://.../a.jpg https://.../b.jpg --max-images 8
+"""
+import io
+import re
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+from PIL import Image
+
+TARGET_WIDTH = 1080
+_DESCRIPTOR = re.compile(r'^(\d+(?:\.\d+)?)([wx])$')
+
+
+def parse_srcset(srcset: str) -> List[Tuple[str, Optional[float], str]]:
+    '''
+    Split a srcset attribute into (url, value, unit) with unit 'w', 'x' or '' (no descriptor).
+
+    Follows the HTML srcset parsing rules: a URL runs up to whitespace (commas
+    inside it, e.g. CDN resize params, are kept; trailing commas end the
+    candidate) and its descriptors run up to the next comma outside
+    parentheses, so compact lists like 'a.jpg 300w,b.jpg 1080w' parse too.
+    '''
+    candidates, pos, end = [], 0, len(srcset)
+    while True:
+        while pos < end and (srcset[pos].isspace() or srcset[pos] == ','):
+            pos += 1
+        if pos >= end:
+            return candidates
+        start = pos
+        while pos < end and not srcset[pos].isspace():
+            pos += 1
+        url, descriptors = srcset[start:pos], []
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            start, depth = pos, 0
+            while pos < end and (srcset[pos] != ',' or depth):
+                if srcset[pos] == '(':
+                    depth += 1
+                elif srcset[pos] == ')' and depth:
+                    depth -= 1
+                pos += 1
+            descriptors = srcset[start:pos].split()
+        match = next((m for m in map(_DESCRIPTOR.match, descriptors) if m), None)
+        candidates.append((url, float(match.group(1)), match.group(2)) if match else (url, None, ''))
+
+
+def pick_source(img, base_url: str, target_width: int = TARGET_WIDTH) -> Optional[str]:
+    '''
+    Choose the URL of an <img> whose declared width is closest to target_width.
+
+    Considers srcset/data-srcset width descriptors first (density descriptors
+    are ranked by the highest density), then data-src/data-original/src.
+
+    Args:
+        img: Element or mapping with .get(attribute)
+        base_url: Page URL for resolving relative and protocol-relative URLs
+
+    Returns:
+        Absolute http(s) URL, or None if the element has no usable source
+    '''
+    for attr in ('data-srcset', 'srcset'):
+        candidates = parse_srcset(img.get(attr) or '')
+        widths = [c for c in candidates if c[2] == 'w']
+        if widths:
+            url = min(widths, key=lambda c: (abs(c[1] - target_width), -c[1]))[0]
+        elif candidates:
+            url = max(candidates, key=lambda c: c[1] or 1.0)[0]
+        else:
+            continue
+        url = urljoin(base_url, url)
+        if url.startswith('http'):
+            return url
+    for attr in ('data-src', 'data-original', 'src'):
+        url = img.get(attr)
+        if url and not url.startswith('data:'):
+            url = urljoin(base_url, url.strip())
+            if url.startswith('http'):
+                return url
+    return None
+
+
+def image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    '''(width, height) from the first bytes of an image, or None if the header is incomplete.'''
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def dhash(data: bytes, size: int = 8) -> Optional[int]:
+    '''64-bit difference hash of an encoded image (JPEGs are decoded in draft mode).'''
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.draft('L', (size * 8, size * 8))
+            pixels = list(img.convert('L').resize((size + 1, size), Image.Resampling.BILINEAR).getdata())
+    except Exception:
+        return None
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left, right = pixels[row * (size + 1) + col], pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def new_stats() -> Dict:
+    return {'candidates': 0, 'selected': 0, 'too_small': 0, 'duplicates': 0, 'failed': 0,
+            'probe_bytes': 0, 'download_bytes': 0}
+
+
+class ImageSelector:
+    '''
+    Size- and duplicate-aware image selection.
+
+    Responsibilities:
+    - Probe candidate dimensions with ranged GETs of the header bytes
+    - Skip images below the size threshold without downloading them
+    - Skip near-duplicates by perceptual (difference) hash
+    - Download only the images that will be used, in page order
+    '''
+
+    def __init__(self, max_images: int = 8, min_side: int = 320, max_distance: int = 6,
+                 probe_bytes: int = 32768, workers: int = 8):
+        '''
+        Args:
+            max_images: Images to keep per article
+            min_side: Minimum width and height in pixels
+            max_distance: Hamming distance at or below which two hashes are duplicates
+            probe_bytes: Bytes requested to read an image header
+            workers: Parallel requests for the synchronous select()
+        '''
+        self.max_images = max_images
+        self.min_side = min_side
+        self.max_distance = max_distance
+        self.probe_bytes = probe_bytes
+        self.workers = workers
+
+    @property
+    def range_header(self) -> Dict:
+        return {'Range': f'bytes=0-{self.probe_bytes - 1}'}
+
+    def too_small(self, size: Optional[Tuple[int, int]]) -> bool:
+        '''Whether known dimensions fall below the threshold (unknown sizes pass).'''
+        return size is not None and min(size) < self.min_side
+
+    def admit(self, data: bytes, hashes: List[int], stats: Dict) -> bool:
+        '''
+        Check a fully downloaded image and record its hash if it is kept.
+
+        Args:
+            data: Encoded image
+            hashes: Hashes of images kept so far for this article (appended to)
+            stats: Counters updated in place
+        '''
+        size = image_size(data)
+        if size is None:
+            stats['failed'] += 1
+            return False
+        if self.too_small(size):
+            stats['too_small'] += 1
+            return False
+        digest = dhash(data)
+        if digest is not None and any(bin(digest ^ h).count('1') <= self.max_distance for h in hashes):
+            stats['duplicates'] += 1
+            return False
+        if digest is not None:
+            hashes.append(digest)
+        return True
+
+    def screen(self, status: int, data: bytes, stats: Dict) -> Tuple[bool, Optional[bytes]]:
+        '''
+        Decide on a candidate from its probe response.
+
+        Returns:
+            (keep, body) where body is the full image if the probe already returned all of it, else None
+        '''
+        stats['probe_bytes'] += len(data or b'')
+        if status not in (200, 206):
+            stats['failed'] += 1
+            return False, None
+        if self.too_small(image_size(data)):
+            stats['too_small'] += 1
+            return False, None
+        return True, data if status == 200 or len(data) < self.probe_bytes else None
+
+    def take(self, wave: List[Tuple[str, Optional[bytes]]], responses: List, selected: List, hashes: List[int],
+             stats: Dict):
+        '''
+        Admit a wave of screened candidates in order.
+
+        Args:
+            wave: (url, body) pairs from screen(); body is set when the probe already returned the full image
+            responses: Full GET (status, body) per candidate, or None where the probe body is used
+            selected: Kept (url, data) pairs (appended to)
+            hashes: Hashes of kept images (appended to)
+            stats: Counters updated in place
+        '''
+        for (url, data), response in zip(wave, responses):
+            if response is not None:
+                status, data = response
+                stats['download_bytes'] += len(data or b'')
+                data = data if status == 200 else None
+            if not data:
+                stats['failed'] += 1
+            elif self.admit(data, hashes, stats):
+                selected.append((url, data))
+
+    def select(self, urls: List[str], get) -> Tuple[List[Tuple[str, bytes]], Dict]:
+        '''
+        Select and download images with a blocking HTTP function.
+
+        Args:
+            urls: Candidate URLs in page order
+            get: get(url, headers) -> (status, body); should raise or return a non-2xx status on failure
+
+        Returns:
+            ([(url, data), ...] in page order, stats)
+        '''
+        stats = new_stats()
+        stats['candidates'] = len(urls)
+
+        def fetch(url, headers=None):
+            try:
+                return get(url, headers or {})
+            except Exception:
+                return 0, b''
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            probes = list(pool.map(lambda u: fetch(u, self.range_header), urls))
+            passed = []
+            for url, (status, data) in zip(urls, probes):
+                keep, body = self.screen(status, data, stats)
+                if keep:
+                    passed.append((url, body))
+
+            selected, hashes = [], []
+            while passed and len(selected) < self.max_images:
+                # Download in waves of the number still needed so unused candidates are never fetched
+                needed = self.max_images - len(selected)
+                wave, passed = passed[:needed], passed[needed:]
+                responses = list(pool.map(lambda c: None if c[1] is not None else fetch(c[0]), wave))
+                self.take(wave, responses, selected, hashes, stats)
+        stats['selected'] = len(selected)
+        return selected, stats
+
+
+def describe(stats: Dict) -> str:
+    '''One-line summary of a selection.'''
+    return (f"{stats['selected']}/{stats['candidates']} images kept ({stats['too_small']} too small, "
+            f"{stats['duplicates']} duplicates, {stats['failed']} failed), "
+            f"{(stats['probe_bytes'] + stats['download_bytes']) / 1024**2:.1f} MB fetched")
+
+
+if __name__ == "__main__":
+    import requests
+    parser = argparse.ArgumentParser(description='Probe, filter and deduplicate image URLs')
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--max-images', type=int, default=8)
+    parser.add_argument('--min-side', type=int, default=320)
+    args = parser.parse_args()
+    session = requests.Session()
+
+    def get(url, headers):
+        response = session.get(url, headers=headers, timeout=10)
+        return response.status_code, response.content
+
+    selected, stats = ImageSelector(args.max_images, args.min_side).select(args.urls, get)
+    for url, data in selected:
+        print(f"   ✓ {image_size(data)} {url}")
+    print(f"✓ {describe(stats)}")
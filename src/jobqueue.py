@@ -0,0 +1,215 @@
+"""
+Job Queue Module - Durable job queue with leasing for multi-worker rendering.
+
+Workers lease jobs for a limited time and extend the lease with heartbeats
+while rendering; a lease that expires (crashed or stalled worker) makes the
+job available again. Failures are retried with exponential backoff and moved
+to the dead-letter state after max_attempts. The SQLite backend is safe to
+share between processes on one machine; other backends implement JobQueue.
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+import hashlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+def job_key(url: str, options: Dict = None) -> str:
+    '''Idempotency key for a job: same URL and options always map to the same key.'''
+    payload = json.dumps({'url': url.strip(), 'options': options or {}}, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class JobQueue(ABC):
+    '''
+    Interface for durable job queues.
+
+    Jobs are dictionaries with id, key, url, options, priority, status,
+    attempts and output_name. Status moves pending → leased → done, or back to
+    pending on retry, or to dead after max_attempts.
+    '''
+
+    @abstractmethod
+    def enqueue(self, url: str, options: Dict = None, priority: int = 1, max_attempts: int = 3) -> Dict:
+        '''Add a job (no-op if an identical job exists) and return it.'''
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float = 300) -> Dict:
+        '''Lease the next available job, or return None.'''
+
+    @abstractmethod
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float = 300) -> bool:
+        '''Extend a lease. Returns False if the worker no longer holds it.'''
+
+    @abstractmethod
+    def complete(self, job_id: int, worker_id: str, result: Dict = None) -> bool:
+        '''Mark a leased job done.'''
+
+    @abstractmethod
+    def fail(self, job_id: int, worker_id: str, error: str) -> str:
+        '''Record a failure; returns the new status (pending or dead).'''
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        '''Job counts by status.'''
+
+
+class SQLiteJobQueue(JobQueue):
+    '''
+    SQLite implementation of JobQueue.
+
+    Every operation runs in its own short IMMEDIATE transaction on a fresh
+    connection, so the queue can be shared by threads and processes.
+    '''
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE NOT NULL,
+            url TEXT NOT NULL,
+            options TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 1,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            available_at REAL NOT NULL,
+            lease_owner TEXT,
+            lease_expires REAL,
+            result TEXT,
+            error TEXT,
+            created REAL NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority, available_at);
+    '''
+
+    def __init__(self, path: str = "output/queue.db", backoff_base: float = 30, backoff_max: float = 1800):
+        '''
+        Initialize the queue, creating the database if needed.
+
+        Args:
+            path: SQLite database file
+            backoff_base: Retry delay after the first failure (doubles each attempt)
+            backoff_max: Maximum retry delay in seconds
+        '''
+        self.path = path
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.executescript(self.SCHEMA)
+        finally:
+            db.close()
+
+    @contextmanager
+    def _tx(self):
+        '''Short write transaction on a fresh connection.'''
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA busy_timeout=30000")
+            db.execute("BEGIN IMMEDIATE")
+            yield db
+            db.execute("COMMIT")
+        except Exception:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _job(row) -> Dict:
+        if row is None:
+            return None
+        job = dict(row)
+        job['options'] = json.loads(job['options'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['output_name'] = f"job_{job['key'][:12]}"
+        return job
+
+    def enqueue(self, url: str, options: Dict = None, priority: int = 1, max_attempts: int = 3) -> Dict:
+        key, now = job_key(url, options), time.time()
+        with self._tx() as db:
+            db.execute(
+                "INSERT OR IGNORE INTO jobs (key, url, options, priority, max_attempts, available_at, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, json.dumps(options or {}, sort_keys=True), priority, max_attempts, now, now, now))
+            return self._job(db.execute("SELECT * FROM jobs WHERE key = ?", (key,)).fetchone())
+
+    def lease(self, worker_id: str, lease_seconds: float = 300) -> Dict:
+        now = time.time()
+        with self._tx() as db:
+            # Expired leases that used up their attempts go straight to dead-letter
+            db.execute("UPDATE jobs SET status = 'dead', error = COALESCE(error, 'lease expired'), "
+                       "lease_owner = NULL, updated = ? "
+                       "WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts", (now, now))
+            row = db.execute(
+                "SELECT * FROM jobs WHERE (status = 'pending' AND available_at <= ?) "
+                "OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY priority, available_at, id LIMIT 1", (now, now)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                       "attempts = attempts + 1, updated = ? WHERE id = ?",
+                       (worker_id, now + lease_seconds, now, row['id']))
+            return self._job(db.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone())
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float = 300) -> bool:
+        now = time.time()
+        with self._tx() as db:
+            cur = db.execute("UPDATE jobs SET lease_expires = ?, updated = ? "
+                             "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                             (now + lease_seconds, now, job_id, worker_id))
+            return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Dict = None) -> bool:
+        with self._tx() as db:
+            cur = db.execute("UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_owner = NULL, "
+                             "updated = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                             (json.dumps(result or {}), time.time(), job_id, worker_id))
+            return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> str:
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = 'leased' "
+                             "AND lease_owner = ?", (job_id, worker_id)).fetchone()
+            if row is None:
+                return None
+            if row['attempts'] >= row['max_attempts']:
+                status, available = 'dead', now
+            else:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (row['attempts'] - 1))
+                status, available = 'pending', now + delay * random.uniform(0.8, 1.2)
+            db.execute("UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_owner = NULL, "
+                       "lease_expires = NULL, updated = ? WHERE id = ?", (status, error, available, now, job_id))
+            return status
+
+    def requeue_dead(self) -> int:
+        '''Move dead-lettered jobs back to pending with a fresh attempt budget.'''
+        now = time.time()
+        with self._tx() as db:
+            return db.execute("UPDATE jobs SET status = 'pending', attempts = 0, available_at = ?, updated = ? "
+                              "WHERE status = 'dead'", (now, now)).rowcount
+
+    def dead_letters(self) -> List[Dict]:
+        '''Jobs that exhausted their attempts.'''
+        with self._tx() as db:
+            return [self._job(r) for r in db.execute("SELECT * FROM jobs WHERE status = 'dead' ORDER BY id")]
+
+    def get(self, job_id: int) -> Dict:
+        with self._tx() as db:
+            return self._job(db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def stats(self) -> Dict[str, int]:
+        with self._tx() as db:
+            counts = {r['status']: r['n'] for r in
+                      db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+        return {s: counts.get(s, 0) for s in ('pending', 'leased', 'done', 'dead')}
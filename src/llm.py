@@ -0,0 +1,233 @@
+"""
+LLM Module - Streaming Ollama client shared by all text generation steps.
+
+Consumes the NDJSON token stream from /api/generate so callers can stop as soon
+as enough text has been produced, instead of waiting for the full completion.
+The model is preloaded and kept resident with keep_alive, and every call sends
+the same system prompt first so the server's prompt cache reuses that prefix.
+"""
+import re
+import json
+import time
+import requests
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List
+
+_NS = 1e9
+# Running totals kept by OllamaClient (summary() adds avg_ttft)
+_TOTALS = ('calls', 'ttft_calls', 'ttft_sum', 'total_duration', 'tokens', 'prompt_tokens', 'stopped_early',
+           'prompt_eval_s', 'eval_s', 'prompt_eval_tokens', 'load_s')
+
+
+class ThinkingAborted(RuntimeError):
+    '''The model kept emitting thinking tokens past max_think_tokens.'''
+
+
+class OllamaClient:
+    '''
+    Streaming client for the Ollama /api/generate endpoint.
+
+    Responsibilities:
+    - Stream tokens and assemble the response incrementally
+    - Disable or suppress <think> reasoning output
+    - Stop early once a target word count and sentence boundary are reached
+    - Record time-to-first-token and generation metrics per call
+    - Preload the model and pin it in memory with keep_alive
+    - Send a shared system prompt so consecutive calls share a cached prefix
+    '''
+
+    # Rough Qwen tokenizer ratio for Vietnamese syllables, used for num_predict budgets
+    TOKENS_PER_WORD = 2.0
+    SENTENCE_END = re.compile(r'[.!?]["\')\]]?\s*$')
+
+    def __init__(self, url: str, model: str, timeout: float = 120, max_think_tokens: int = 200,
+                 system: str = None, keep_alive: str = "10m", history_size: int = 100):
+        '''
+        Initialize the client.
+
+        Args:
+            url: Ollama server base URL
+            model: Model name
+            timeout: Read timeout between streamed chunks (seconds)
+            max_think_tokens: Abort a call whose model keeps emitting thinking tokens past this
+            system: System prompt sent with every call (shared, cacheable prefix)
+            keep_alive: How long the server keeps the model loaded after a call
+            history_size: Per-call metrics kept for inspection (totals cover every call)
+        '''
+        self.url = url
+        self.model = model
+        self.timeout = timeout
+        self.max_think_tokens = max_think_tokens
+        self.system = system
+        self.keep_alive = keep_alive
+        self.session = requests.Session()
+        self.last_metrics = {}
+        self.history = deque(maxlen=history_size)
+        self.totals = dict.fromkeys(_TOTALS, 0)
+
+    def token_budget(self, target_words: int, slack: float = 1.3) -> int:
+        '''Estimate num_predict needed to produce target_words words.'''
+        return int(target_words * self.TOKENS_PER_WORD * slack) + 32
+
+    def generate(self, prompt: str, options: Dict = None, target_words: int = None,
+                 timeout: float = None) -> str:
+        '''
+        Generate text with streaming and early termination.
+
+        Args:
+            prompt: Prompt text
+            options: Ollama sampling options (temperature, num_predict, ...)
+            target_words: Stop once this many words and a sentence end are produced
+            timeout: Override read timeout for this call
+
+        Returns:
+            Generated text without thinking blocks
+
+        Raises:
+            ThinkingAborted: the model was still thinking after max_think_tokens
+        '''
+        options = dict(options or {})
+        if target_words:
+            options['num_predict'] = min(options.get('num_predict', 2000), self.token_budget(target_words))
+        payload = {"model": self.model, "prompt": prompt, "stream": True, "think": False, "options": options,
+                   "keep_alive": self.keep_alive}
+        if self.system:
+            payload["system"] = self.system
+
+        start = time.perf_counter()
+        metrics = {'ttft': None, 'duration': 0.0, 'tokens': 0, 'think_tokens': 0,
+                   'prompt_tokens': int(len(prompt.split()) * self.TOKENS_PER_WORD),
+                   'words': 0, 'stopped_early': False, 'aborted_thinking': False,
+                   'prompt_eval_count': None, 'prompt_eval_s': None, 'eval_count': None, 'eval_s': None,
+                   'load_s': None}
+        parts, in_think = [], False
+
+        with self.session.post(f"{self.url}/api/generate", json=payload, stream=True,
+                               timeout=(5, timeout or self.timeout)) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                token = chunk.get('response', '')
+
+                if chunk.get('thinking') or in_think or '<think>' in token:
+                    metrics['think_tokens'] += 1
+                    if '<think>' in token:
+                        in_think = True
+                        parts.append(token.split('<think>')[0])
+                    if in_think and '</think>' in token:
+                        in_think = False
+                        token = token.split('</think>', 1)[1]
+                    else:
+                        token = ''
+                    if metrics['think_tokens'] > self.max_think_tokens and (in_think or chunk.get('thinking')):
+                        metrics['aborted_thinking'] = True
+                        break
+
+                if token:
+                    if metrics['ttft'] is None:
+                        metrics['ttft'] = time.perf_counter() - start
+                    metrics['tokens'] += 1
+                    parts.append(token)
+                    if target_words and self._reached_target(parts, target_words):
+                        metrics['stopped_early'] = not chunk.get('done', False)
+                        break
+                if chunk.get('done'):
+                    self._server_timings(chunk, metrics)
+                    break
+
+        text = re.sub(r'<think>.*?</think>', '', ''.join(parts), flags=re.DOTALL).strip()
+        metrics['duration'] = time.perf_counter() - start
+        metrics['words'] = len(text.split())
+        self.last_metrics = metrics
+        self.history.append(metrics)
+        self._accumulate(metrics)
+        if metrics['aborted_thinking']:
+            raise ThinkingAborted(f"model still thinking after {self.max_think_tokens} tokens "
+                                  f"(partial answer: {len(text.split())} words)")
+        return text
+
+    def _accumulate(self, metrics: Dict):
+        '''Add one call to the running totals (the client may live for the whole service).'''
+        totals = self.totals
+        totals['calls'] += 1
+        if metrics['ttft'] is not None:
+            totals['ttft_calls'] += 1
+            totals['ttft_sum'] += metrics['ttft']
+        totals['total_duration'] += metrics['duration']
+        totals['tokens'] += metrics['tokens']
+        totals['prompt_tokens'] += metrics['prompt_tokens']
+        totals['stopped_early'] += metrics['stopped_early']
+        # Server-side split; calls stopped early report no final timings
+        totals['prompt_eval_s'] += metrics['prompt_eval_s'] or 0
+        totals['eval_s'] += metrics['eval_s'] or 0
+        totals['prompt_eval_tokens'] += metrics['prompt_eval_count'] or 0
+        totals['load_s'] += metrics['load_s'] or 0
+
+    @staticmethod
+    def _server_timings(chunk: Dict, metrics: Dict):
+        '''Copy prompt-eval vs eval counts and durations from the final chunk (absent if stopped early).'''
+        metrics['prompt_eval_count'] = chunk.get('prompt_eval_count')
+        metrics['eval_count'] = chunk.get('eval_count')
+        for key, field in (('prompt_eval_s', 'prompt_eval_duration'), ('eval_s', 'eval_duration'),
+                           ('load_s', 'load_duration')):
+            if field in chunk:
+                metrics[key] = chunk[field] / _NS
+
+    def warmup(self) -> Dict:
+        '''
+        Load the model and prefill the system prompt before the first real call.
+
+        Returns:
+            Server timings of the warm-up (load and prompt-eval seconds)
+        '''
+        payload = {"model": self.model, "prompt": "", "stream": False, "keep_alive": self.keep_alive}
+        if self.system:
+            # One generated token makes the server evaluate (and cache) the system prefix
+            payload.update(prompt=".", system=self.system, think=False, options={"num_predict": 1})
+        start = time.perf_counter()
+        response = self.session.post(f"{self.url}/api/generate", json=payload, timeout=(5, self.timeout))
+        response.raise_for_status()
+        timings = {}
+        self._server_timings(response.json(), timings)
+        timings['seconds'] = time.perf_counter() - start
+        return timings
+
+    def set_keep_alive(self, keep_alive):
+        '''Change keep_alive and apply it to the loaded model right away (0 unloads it).'''
+        self.keep_alive = keep_alive
+        self.session.post(f"{self.url}/api/generate", timeout=(5, self.timeout),
+                          json={"model": self.model, "prompt": "", "stream": False, "keep_alive": keep_alive})
+
+    @contextmanager
+    def pinned(self):
+        '''Keep the model loaded indefinitely for the duration of a batch, then restore keep_alive.'''
+        previous = self.keep_alive
+        self.keep_alive = -1
+        try:
+            yield self
+        finally:
+            try:
+                self.set_keep_alive(previous)
+            except requests.RequestException:
+                self.keep_alive = previous
+
+    def _reached_target(self, parts: List[str], target_words: int) -> bool:
+        '''Check if the streamed text has enough words and ends a sentence.'''
+        # Only inspect the tail on each token; full word count only near boundaries
+        if not self.SENTENCE_END.search(parts[-1]):
+            return False
+        return len(''.join(parts).split()) >= target_words
+
+    def summary(self, since: Dict = None) -> Dict:
+        '''
+        Aggregate metrics over all calls made by this client.
+
+        Args:
+            since: An earlier summary(); only calls made after it are counted
+        '''
+        result = {key: self.totals[key] - (since[key] if since else 0) for key in _TOTALS}
+        result['avg_ttft'] = result['ttft_sum'] / result['ttft_calls'] if result['ttft_calls'] else None
+        return result
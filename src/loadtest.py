@@ -0,0 +1,399 @@
+"""
+Load Test Module - Throughput, stage latency and soak testing of the job service.
+
+Drives a JobService with a Poisson stream of fixture articles at one or more
+arrival rates and records, per job, the time spent queued and in each
+pipeline stage (from the progress events), plus queue depth and RSS over
+time. Each rate step reports its sustained throughput and whether the queue
+kept growing (saturation). Long runs double as soak tests: RSS after each
+completed job is fitted against the job count, and with --tracemalloc the
+allocations that grew between warm-up and the end are listed.
+
+In-process runs use warm TikTokNewsGenerator workers talking to offline
+stand-ins (FakeOllama and FakeNewsSite from stubs.py); --service drives a
+running job service over HTTP with URLs it can crawl. --synthetic replaces
+the generator with fixed stage delays to check the harness itself.
+
+Usage:
+    python src/loadtest.py --rates 20 40 80 --step-minutes 30 --concurrency 2 --mode preview
+    python src/loadtest.py --rates 30 --step-minutes 480 --tracemalloc
+    python src/loadtest.py --service http://127.0.0.1:8080 --urls-file urls.txt --rates 30
+    python src/loadtest.py --synthetic --rates 1800 3600 --step-minutes 1
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import requests
+from datetime import datetime
+from typing import Dict, List
+from server import JobService, QueueFull, percentiles
+
+TERMINAL = ('done', 'failed')
+# Poll status of a job the service dropped from its table before the harness
+# collected it: it left the system, but its outcome and finish time are unknown
+EVICTED = 'evicted'
+# Finished jobs the in-process service keeps. The harness collects each job on
+# the next sample, and a small cap holds the service's job table at a constant
+# size, so it does not show up as per-job RSS growth in the leak fit.
+SERVICE_FINISHED_KEPT = 64
+# Events that are not pipeline stages
+MARKERS = ('queued', 'started', 'rendered') + TERMINAL
+
+
+def stage_durations(events: List[Dict]) -> Dict[str, float]:
+    '''Seconds per stage from a job's progress events (each stage runs until the next event).'''
+    durations = {}
+    times = {e['stage']: e['time'] for e in events if e['stage'] in MARKERS}
+    if 'started' in times:
+        durations['queue_wait'] = times['started'] - times.get('queued', 0.0)
+    for event, following in zip(events, events[1:]):
+        if event['stage'] not in MARKERS:
+            durations[event['stage']] = durations.get(event['stage'], 0.0) + following['time'] - event['time']
+    if 'started' in times and events[-1]['stage'] in TERMINAL:
+        durations['run'] = events[-1]['time'] - times['started']
+    return durations
+
+
+def slope(points: List[tuple]) -> float:
+    '''Least-squares slope of (x, y) points (0 for fewer than two points).'''
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var if var else 0.0
+
+
+class SyntheticGenerator:
+    '''Stand-in generator with fixed stage delays, used to check the harness (optionally leaking).'''
+
+    STAGES = {'crawl': 0.2, 'summarize': 1.0, 'refine': 0.5, 'script': 0.01, 'export': 0.01,
+              'tts': 1.5, 'subtitles': 0.8, 'compose': 2.0}
+
+    def __init__(self, scale: float = 1.0, leak_kb: int = 0):
+        self.scale = scale
+        self.leak_kb = leak_kb
+        self._leaked = []
+
+    def generate_video(self, news_url: str, output_name: str = None, mode: str = 'final', progress=None) -> str:
+        for stage, seconds in self.STAGES.items():
+            progress(stage, {})
+            time.sleep(seconds * self.scale * random.uniform(0.8, 1.2))
+        if self.leak_kb:
+            self._leaked.append(bytearray(self.leak_kb * 1024))
+        os.makedirs("output/summaries", exist_ok=True)
+        with open(f"output/summaries/{output_name}.json", 'w', encoding='utf-8') as f:
+            json.dump({'video_path': None}, f)
+        progress('rendered', {})
+        return None
+
+
+class _LocalTarget:
+    '''Submit to and observe an in-process JobService.'''
+
+    def __init__(self, service: JobService):
+        self.service = service
+
+    def submit(self, url: str, options: Dict) -> str:
+        return self.service.submit(url, 'backlog', options).id
+
+    def poll(self, job_id: str) -> Dict:
+        job = self.service.get(job_id)
+        if job is None:
+            return {'status': EVICTED, 'events': []}
+        return {'status': job.status, 'events': list(job.events)} if job.status in TERMINAL else None
+
+    def metrics(self) -> Dict:
+        metrics = self.service.metrics()
+        return {'queue': sum(metrics['queue_depth'].values()), 'running': metrics['running'],
+                'rss_mb': metrics['rss_mb']}
+
+
+class _RemoteTarget:
+    '''Submit to and observe a job service over HTTP.'''
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+
+    def submit(self, url: str, options: Dict) -> str:
+        response = requests.post(f"{self.base_url}/jobs", json={'url': url, 'lane': 'backlog', 'options': options},
+                                 timeout=10)
+        if response.status_code == 429:
+            raise QueueFull(response.json().get('error'))
+        response.raise_for_status()
+        return response.json()['id']
+
+    def poll(self, job_id: str) -> Dict:
+        response = requests.get(f"{self.base_url}/jobs/{job_id}", timeout=10)
+        if response.status_code == 404:
+            return {'status': EVICTED, 'events': []}
+        status = response.json()['status']
+        if status not in TERMINAL:
+            return None
+        lines = requests.get(f"{self.base_url}/jobs/{job_id}/events", timeout=30).text.splitlines()
+        return {'status': status, 'events': [json.loads(line) for line in lines if line]}
+
+    def metrics(self) -> Dict:
+        metrics = requests.get(f"{self.base_url}/metrics", timeout=10).json()
+        return {'queue': sum(metrics['queue_depth'].values()), 'running': metrics['running'],
+                'rss_mb': metrics.get('rss_mb')}
+
+
+class LoadTest:
+    '''
+    Open-loop load generator and recorder.
+
+    Responsibilities:
+    - Submit jobs with exponential inter-arrival times per rate step
+    - Sample queue depth, running jobs and RSS at a fixed interval
+    - Collect per-job stage durations and RSS at completion
+    - Report throughput, stage percentiles, queue growth and leak indicators
+    '''
+
+    def __init__(self, target, urls: List[str], rates: List[float], step_seconds: float,
+                 options: Dict = None, sample_interval: float = 5.0, warmup_jobs: int = 2,
+                 leak_mb_per_job: float = 1.0, trace: bool = False, seed: int = 0):
+        '''
+        Args:
+            target: _LocalTarget or _RemoteTarget
+            urls: Article URLs, used round-robin
+            rates: Arrival rates in jobs per hour, one step each
+            step_seconds: Duration of each rate step
+            options: Job options (e.g. {'mode': 'preview'})
+            sample_interval: Seconds between queue/RSS samples
+            warmup_jobs: Completed jobs excluded from leak fitting and tracemalloc baseline
+            leak_mb_per_job: RSS growth per job above which a leak is reported
+            trace: Compare tracemalloc snapshots (in-process only)
+            seed: Arrival process seed
+        '''
+        self.target = target
+        self.urls = urls
+        self.rates = rates
+        self.step_seconds = step_seconds
+        self.options = options or {}
+        self.sample_interval = sample_interval
+        self.warmup_jobs = warmup_jobs
+        self.leak_mb_per_job = leak_mb_per_job
+        self.trace = trace
+        self.random = random.Random(seed)
+        self.submitted: Dict[str, Dict] = {}
+        self.finished: List[Dict] = []
+        self.rejected: List[tuple] = []
+        self.samples: List[Dict] = []
+        self._baseline = None
+        self._lock = threading.Lock()
+        self._start = 0.0
+
+    def _now(self) -> float:
+        return time.perf_counter() - self._start
+
+    def _arrivals(self):
+        '''Submit jobs step by step with Poisson arrivals.'''
+        count = 0
+        for step, rate in enumerate(self.rates):
+            end = (step + 1) * self.step_seconds
+            next_at = self._now() + self.random.expovariate(rate / 3600)
+            while next_at < end:
+                time.sleep(max(0.0, next_at - self._now()))
+                url = self.urls[count % len(self.urls)]
+                count += 1
+                try:
+                    job_id = self.target.submit(url, self.options)
+                    with self._lock:
+                        self.submitted[job_id] = {'step': step, 'submitted': self._now(), 'url': url}
+                except QueueFull:
+                    self.rejected.append((step, self._now()))
+                next_at += self.random.expovariate(rate / 3600)
+            time.sleep(max(0.0, end - self._now()))
+
+    def _sample(self):
+        '''Record metrics and collect finished jobs.'''
+        metrics = self.target.metrics()
+        with self._lock:
+            pending = [job_id for job_id in self.submitted if 'finished' not in self.submitted[job_id]]
+        for job_id in pending:
+            result = self.target.poll(job_id)
+            if result is None:
+                continue
+            record = self.submitted[job_id]
+            record.update(finished=self._now(), status=result['status'], rss_mb=metrics['rss_mb'],
+                          stages=stage_durations(result['events']))
+            self.finished.append(dict(record, id=job_id))
+            if self.trace and self._baseline is None and len(self.finished) >= self.warmup_jobs:
+                self._baseline = tracemalloc.take_snapshot()
+        self.samples.append({'t': round(self._now(), 1), 'queue': metrics['queue'], 'running': metrics['running'],
+                             'completed': len(self.finished), 'rss_mb': metrics['rss_mb']})
+
+    def run(self, drain_timeout: float = 3600) -> Dict:
+        '''Run every rate step, wait for outstanding jobs, and return the report.'''
+        if self.trace:
+            tracemalloc.start(10)
+        self._start = time.perf_counter()
+        arrivals = threading.Thread(target=self._arrivals, name='loadtest-arrivals', daemon=True)
+        arrivals.start()
+        deadline = None
+        while True:
+            self._sample()
+            if not arrivals.is_alive():
+                deadline = deadline or time.perf_counter() + drain_timeout
+                if len(self.finished) == len(self.submitted) or time.perf_counter() > deadline:
+                    break
+            time.sleep(self.sample_interval)
+        return self.report()
+
+    def report(self) -> Dict:
+        '''Aggregate recorded jobs and samples.'''
+        steps = []
+        for step, rate in enumerate(self.rates):
+            start, end = step * self.step_seconds, (step + 1) * self.step_seconds
+            done = [j for j in self.finished if start <= j['finished'] < end]
+            window = [(s['t'] / 60, s['queue']) for s in self.samples if start <= s['t'] < end]
+            queue_slope = slope(window)
+            rejected = sum(1 for s, _ in self.rejected if s == step)
+            steps.append({'offered_per_hour': rate,
+                          'submitted': sum(1 for j in self.submitted.values() if j['step'] == step),
+                          'rejected': rejected,
+                          'completed_per_hour': round(len(done) * 3600 / self.step_seconds, 1),
+                          'queue_growth_per_min': round(queue_slope, 3),
+                          'saturated': queue_slope > 0.05 or rejected > 0})
+
+        stage_names = []
+        for job in self.finished:
+            stage_names.extend(s for s in job['stages'] if s not in stage_names)
+        stages = {name: {k: round(v, 2) if v is not None else None for k, v in
+                         percentiles([j['stages'][name] for j in self.finished if name in j['stages']]).items()}
+                  for name in stage_names}
+
+        ok = [j for j in self.finished if j['status'] == 'done']
+        evicted = [j for j in self.finished if j['status'] == EVICTED]
+        elapsed = max((j['finished'] for j in self.finished), default=0.0)
+        rss = [s['rss_mb'] for s in self.samples if s['rss_mb'] is not None]
+        # Evicted jobs are seen late (at an unknown point after completion), so their RSS is left out of the fit
+        known = sorted((j for j in self.finished if j['status'] != EVICTED), key=lambda j: j['finished'])
+        fitted = [(i, j['rss_mb']) for i, j in enumerate(known) if i >= self.warmup_jobs and j['rss_mb'] is not None]
+        growth = slope(fitted)
+        report = {
+            'completed': len(ok), 'failed': len(self.finished) - len(ok) - len(evicted), 'evicted': len(evicted),
+            'rejected': len(self.rejected),
+            'unfinished': len(self.submitted) - len(self.finished),
+            'throughput_per_hour': round(len(ok) * 3600 / elapsed, 1) if elapsed else 0.0,
+            'steps': steps,
+            'saturation_per_hour': next((s['offered_per_hour'] for s in steps if s['saturated']), None),
+            'stages': stages,
+            'rss_mb': {'start': rss[0] if rss else None, 'peak': max(rss) if rss else None,
+                       'end': rss[-1] if rss else None},
+            'rss_growth_mb_per_job': round(growth, 2),
+            'leak_suspected': len(fitted) >= 5 and growth > self.leak_mb_per_job,
+        }
+        if self.trace and self._baseline is not None:
+            diff = tracemalloc.take_snapshot().compare_to(self._baseline, 'lineno')
+            report['allocation_growth'] = [{'where': str(stat.traceback[0]), 'kb': round(stat.size_diff / 1024, 1),
+                                            'count': stat.count_diff} for stat in diff[:10] if stat.size_diff > 0]
+        return report
+
+    def save(self, report: Dict, output_dir: str = "output/loadtest") -> str:
+        '''Write the report with raw samples and job records.'''
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"loadtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'report': report, 'samples': self.samples, 'jobs': self.finished}, f, ensure_ascii=False,
+                      indent=2)
+        return path
+
+
+def print_report(report: Dict):
+    '''Print a load test report.'''
+    print(f"\n{'='*60}")
+    print("LOAD TEST")
+    print(f"{'='*60}")
+    print(f"Completed: {report['completed']} ({report['failed']} failed, {report['rejected']} rejected, "
+          f"{report['unfinished']} unfinished)")
+    if report['evicted']:
+        print(f"   ⚠ {report['evicted']} jobs evicted by the service before collection (outcome unknown; "
+              f"raise its finished-job cap or lower --sample-interval)")
+    print(f"Throughput: {report['throughput_per_hour']} videos/hour")
+    for step in report['steps']:
+        flag = '⚠ saturated' if step['saturated'] else '✓'
+        print(f"   {flag} offered {step['offered_per_hour']:g}/h → completed {step['completed_per_hour']}/h, "
+              f"queue {step['queue_growth_per_min']:+.2f} jobs/min, {step['rejected']} rejected")
+    print("Stages (p50 / p95 / p99 seconds):")
+    for name, p in report['stages'].items():
+        print(f"   {name:<11} {p['p50']:>8} {p['p95']:>8} {p['p99']:>8}")
+    rss = report['rss_mb']
+    print(f"RSS: start {rss['start']} MB, peak {rss['peak']} MB, end {rss['end']} MB, "
+          f"{report['rss_growth_mb_per_job']:+.2f} MB/job after warm-up")
+    if report['leak_suspected']:
+        print("❌ Memory grows with every job: leak suspected")
+    for row in report.get('allocation_growth', []):
+        print(f"   {row['kb']:>10.1f} KB {row['count']:>+8}  {row['where']}")
+    print(f"{'='*60}\n")
+
+
+def main():
+    '''CLI entry point.'''
+    parser = argparse.ArgumentParser(description='Load and soak test the video job service')
+    parser.add_argument('--rates', type=float, nargs='+', default=[30], help='Arrival rates (jobs/hour), one step each')
+    parser.add_argument('--step-minutes', type=float, default=30, help='Duration of each rate step')
+    parser.add_argument('--concurrency', type=int, default=1, help='Job service workers (in-process runs)')
+    parser.add_argument('--backlog-limit', type=int, default=64, help='Queued jobs before submissions are rejected')
+    parser.add_argument('--mode', type=str, default='final', choices=['final', 'preview'])
+    parser.add_argument('--articles', type=int, default=200, help='Distinct fixture articles')
+    parser.add_argument('--token-delay', type=float, default=0.01, help='Fake Ollama seconds per generated word')
+    parser.add_argument('--sample-interval', type=float, default=5)
+    parser.add_argument('--warmup-jobs', type=int, default=2)
+    parser.add_argument('--leak-mb-per-job', type=float, default=1.0)
+    parser.add_argument('--tracemalloc', action='store_true', help='Report allocation growth (in-process only)')
+    parser.add_argument('--service', type=str, help='Drive a running job service at this URL instead')
+    parser.add_argument('--urls-file', type=str, help='Article URLs for --service (one per line)')
+    parser.add_argument('--synthetic', action='store_true', help='Fixed stage delays instead of the generator')
+    parser.add_argument('--synthetic-leak-kb', type=int, default=0, help='Memory the synthetic generator leaks per job')
+    args = parser.parse_args()
+
+    stubs, service = [], None
+    if args.service:
+        with open(args.urls_file, encoding='utf-8') as f:
+            urls = [line.strip() for line in f if line.strip()]
+        target = _RemoteTarget(args.service)
+    else:
+        from stubs import FakeOllama, FakeNewsSite
+        site = FakeNewsSite(articles=args.articles).start()
+        site.register_fixture_site()
+        ollama = FakeOllama(token_delay=args.token_delay, words=300).start()
+        stubs = [site, ollama]
+        urls = [site.article_url(i) for i in range(args.articles)]
+        if args.synthetic:
+            os.chdir(tempfile.mkdtemp(prefix='loadtest_'))
+            factory = lambda: SyntheticGenerator(leak_kb=args.synthetic_leak_kb)
+        else:
+            from main import TikTokNewsGenerator
+            factory = lambda: TikTokNewsGenerator(ollama_url=ollama.url)
+        service = JobService(factory, workers=args.concurrency,
+                             lane_limits={'breaking': 1, 'backlog': args.backlog_limit},
+                             max_finished=SERVICE_FINISHED_KEPT)
+        print("Loading models...")
+        service.start()
+        target = _LocalTarget(service)
+
+    test = LoadTest(target, urls, args.rates, args.step_minutes * 60, options={'mode': args.mode},
+                    sample_interval=args.sample_interval, warmup_jobs=args.warmup_jobs,
+                    leak_mb_per_job=args.leak_mb_per_job, trace=args.tracemalloc and not args.service)
+    try:
+        report = test.run()
+    finally:
+        if service:
+            service.stop()
+        for stub in stubs:
+            stub.stop()
+    print_report(report)
+    print(f"✓ Report: {os.path.abspath(test.save(report))}")
+    raise SystemExit(1 if report['leak_suspected'] else 0)
+
+
+if __name__ == "__main__":
+    main()
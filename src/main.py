@@ -7,9 +7,20 @@ import os
 import sys
 import argparse
 import json
+import queue
+import threading
+import time
 from datetime import datetime
 from core import NewsProcessor
 from media import MediaGenerator
+from crawler import AsyncCrawler
+from models import ModelRegistry
+from dedup import DuplicateIndex, DuplicateArticle
+from profiling import StageProfiler
+from imageselect import describe as describe_selection
+from artifacts import ArtifactStore
+from scheduler import configure as configure_scheduler, shared_scheduler
+from audioio import working_copy
 
 
 class TikTokNewsGenerator:
@@ -26,7 +37,11 @@ class TikTokNewsGenerator:
     '''
     
     def __init__(self, voice: str = "binh", image_dir: str = None, broll_dir: str = None,
-                 template: str = None, intro_duration: float = 3.0):
+                 template: str = None, intro_duration: float = 3.0, render_only: bool = False,
+                 memory_budget_gb: float = None, dedup: str = None, dedup_window_days: float = 3,
+                 tts_workers: int = 1, corrector_backend: str = 'auto', profile_dir: str = None,
+                 store_max_gb: float = None, store_max_age_days: float = None, ollama_url: str = None,
+                 models: ModelRegistry = None):
         '''
         Initialize the video generator.
         
@@ -36,28 +51,57 @@ class TikTokNewsGenerator:
             broll_dir: Directory containing B-roll videos
             template: PowerPoint template slide name/index
             intro_duration: Intro duration in seconds (None = full video)
+            render_only: Skip loading text/TTS models (only render_from_summary is usable)
+            memory_budget_gb: Memory budget for models; idle models are unloaded per stage to fit it
+            dedup: Near-duplicate handling: None (off), 'flag' (record and continue) or 'skip'
+            dedup_window_days: Only compare against articles seen within this many days
+            tts_workers: CPU TTS worker processes (1 = in-process, 0 = one per 2 cores of the TTS budget)
+            corrector_backend: Text corrector backend: 'auto', 'torch' or 'onnx'
+            profile_dir: Profile each pipeline stage and write the results here (None = off)
+            store_max_gb: Artifact store size budget; oldest jobs are dropped above it (None = no limit)
+            store_max_age_days: Age after which stored intermediates (images, audio, SRT) expire
+            ollama_url: Ollama server URL (default: NewsProcessor's default with localhost fallback)
+            models: Model registry shared with other generators (default: a new one; memory_budget_gb is then ignored)
         '''
         self.custom_image_dir = image_dir
         self.broll_dir = broll_dir
         self.template = template
         self.intro_duration = intro_duration
+        self.dedup = dedup
+        self.dedup_index = DuplicateIndex(window_days=dedup_window_days) if dedup else None
+        self.profiler = StageProfiler(profile_dir) if profile_dir else None
+        self.store = ArtifactStore()
+        self.store_max_bytes = int(store_max_gb * 1024**3) if store_max_gb else None
+        self.store_max_age_days = store_max_age_days
+        self.scheduler = shared_scheduler()
         
         print("\n" + "="*60)
         print("Initializing TikTok News Generator...")
         print("="*60)
         
-        self.processor = NewsProcessor()
-        self.media = MediaGenerator(voice=voice)
+        budget = int(memory_budget_gb * 1024**3) if memory_budget_gb else None
+        self.models = models or ModelRegistry(budget, offload_gpu=budget is not None)
+        llm_options = {'ollama_url': ollama_url} if ollama_url else {}
+        self.processor = None if render_only else NewsProcessor(models=self.models,
+                                                                       corrector_backend=corrector_backend,
+                                                                       scheduler=self.scheduler,
+                                                                       **llm_options)
+        self.media = MediaGenerator(voice=voice, load_tts=not render_only, models=self.models,
+                                    tts_workers=tts_workers, scheduler=self.scheduler)
         
         print("✓ All modules initialized!\n")
     
-    def generate_video(self, news_url: str, output_name: str = None) -> str:
+    def generate_video(self, news_url: str, output_name: str = None, article: dict = None,
+                       mode: str = 'final', progress=None) -> str:
         '''
         Complete pipeline: URL → TikTok Video.
         
         Args:
             news_url: URL of news article
             output_name: Output filename (without extension)
+            article: Already crawled article (skips Step 1 fetch)
+            mode: Render mode from RENDER_MODES ('final' or 'preview')
+            progress: Optional callback(stage, info) called as each step starts
             
         Returns:
             Path to generated video file
@@ -70,11 +114,206 @@ class TikTokNewsGenerator:
         print(f"GENERATING TIKTOK VIDEO")
         print(f"{'='*60}\n")
         
+        story = self._prepare_story(news_url, output_name, article, timestamp, progress)
+        article, broll_videos, full_script = story['article'], story['broll_videos'], story['full_script']
+        summary_json = story['summary_json']
+        
+        # Step 6: Generate voice-over
+        print("\n🎤 Step 6: Generating voice-over...")
+        self._progress(progress, 'tts')
+        audio_path = f"output/audio/{output_name}.mp3"
+        os.makedirs("output/audio", exist_ok=True)
+        self.models.prepare('tts')
+        self.store.writable(audio_path, working_copy(audio_path))
+        with self.scheduler.stage('tts'):
+            audio_path = self.media.generate_audio(full_script, audio_path)
+        audio_duration = self.media.get_audio_duration(audio_path)
+        print(f"   ✓ Audio duration: {audio_duration:.1f}s")
+        
+        # Step 7: Generate subtitles
+        print("\n💬 Step 7: Generating subtitles...")
+        self._progress(progress, 'subtitles')
+        subtitle_path = f"output/temp/{output_name}.srt"
+        os.makedirs("output/temp", exist_ok=True)
+        self.models.prepare('subtitles')
+        self.store.writable(subtitle_path)
+        with self.scheduler.stage('subtitles'):
+            self.media.generate_subtitles(audio_path, subtitle_path, full_script)
+        
+        # Step 8: Compose video
+        print(f"\n🎬 Step 8: Composing video ({mode})...")
+        self._progress(progress, 'compose')
+        video_path = self._compose(output_name, article['title'], article['images'], broll_videos,
+                                   audio_path, subtitle_path, audio_duration, mode, template=self.template)
+        
+        # Step 9: Update JSON with final metadata
+        self._update_summary_json(summary_json, audio_duration, video_path, audio_path, subtitle_path,
+                                  images=article['images'], broll_videos=broll_videos, render_mode=mode)
+        self._record_artifacts(output_name, image=article['images'], audio=[audio_path, working_copy(audio_path)],
+                               subtitles=[subtitle_path], video=[video_path],
+                               summary=[story['summary_path'], summary_json])
+        
+        print(f"\n{'='*60}")
+        print(f"✅ VIDEO GENERATION COMPLETE!")
+        print(f"{'='*60}")
+        print(f"Video:    {video_path}")
+        print(f"Duration: {audio_duration:.1f}s")
+        print(f"Peak RSS: {self.models.report()['peak_rss_mb']} MB")
+        print(f"{'='*60}\n")
+        self._progress(progress, 'rendered', {'video_path': video_path, 'duration': audio_duration})
+        
+        return video_path
+    
+    def generate_variants(self, news_url: str, voices: list = None, templates: list = None,
+                          aspects: list = None, output_name: str = None, article: dict = None,
+                          mode: str = 'final') -> dict:
+        '''
+        Render every (voice, template, aspect) combination from one pipeline run.
+        
+        Crawl, summarization and correction run once, TTS and Whisper once per
+        voice, and composition once per variant; decoded images and rendered
+        intro/subtitle assets are shared between compositions.
+        
+        Args:
+            news_url: URL of news article
+            voices: Voice names (default: the generator's voice)
+            templates: Intro templates (None entries use the fallback intro)
+            aspects: Aspect ratios from ASPECT_RATIOS (default: 9:16)
+            output_name: Base output name
+            article: Already crawled article
+            mode: Render mode from RENDER_MODES
+            
+        Returns:
+            Dict with the variant list and a shared-work report
+        '''
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_name = output_name or f"tiktok_news_{timestamp}"
+        voices = voices or [self.media.voice_name]
+        templates = templates or [self.template]
+        aspects = aspects or ['9:16']
+        total = len(voices) * len(templates) * len(aspects)
+        seconds = {'story': 0.0, 'tts': 0.0, 'subtitles': 0.0, 'compose': 0.0}
+        cache = self.media.image_cache
+        baseline = (cache.hits, cache.misses, self.media.prerender_hits, self.media.prerender_misses)
+        
+        print(f"\n{'='*60}")
+        print(f"GENERATING {total} VARIANTS")
+        print(f"{'='*60}\n")
+        
+        start = time.perf_counter()
+        story = self._prepare_story(news_url, output_name, article, timestamp)
+        article, broll_videos = story['article'], story['broll_videos']
+        seconds['story'] = time.perf_counter() - start
+        
+        # Voices first so TTS and Whisper each stay loaded for their whole stage
+        tracks = {}
+        os.makedirs("output/audio", exist_ok=True)
+        os.makedirs("output/temp", exist_ok=True)
+        print("\n🎤 Generating voice-overs...")
+        self._progress(None, 'tts')
+        self.models.prepare('tts')
+        for voice in voices:
+            start = time.perf_counter()
+            audio_path = f"output/audio/{output_name}_{voice}.mp3"
+            self.store.writable(audio_path, working_copy(audio_path))
+            with self.scheduler.stage('tts'):
+                audio_path = self.media.generate_audio(story['full_script'], audio_path, voice=voice)
+            tracks[voice] = {'audio_path': audio_path, 'duration': self.media.get_audio_duration(audio_path)}
+            seconds['tts'] += time.perf_counter() - start
+        
+        print("\n💬 Generating subtitles...")
+        self._progress(None, 'subtitles')
+        self.models.prepare('subtitles')
+        for voice, track in tracks.items():
+            start = time.perf_counter()
+            track['subtitle_path'] = f"output/temp/{output_name}_{voice}.srt"
+            self.store.writable(track['subtitle_path'])
+            with self.scheduler.stage('subtitles'):
+                self.media.generate_subtitles(track['audio_path'], track['subtitle_path'], story['full_script'])
+            seconds['subtitles'] += time.perf_counter() - start
+        
+        variants = []
+        self._progress(None, 'compose')
+        for voice in voices:
+            track = tracks[voice]
+            for template in templates:
+                for aspect in aspects:
+                    name = f"{output_name}_{voice}_{template or 'default'}_{aspect.replace(':', 'x')}"
+                    print(f"\n🎬 Composing {name} ({mode})...")
+                    start = time.perf_counter()
+                    video_path = self._compose(name, article['title'], article['images'], broll_videos,
+                                               track['audio_path'], track['subtitle_path'], track['duration'],
+                                               mode, template=template, aspect=aspect)
+                    seconds['compose'] += time.perf_counter() - start
+                    variants.append({'voice': voice, 'template': template, 'aspect': aspect,
+                                     'video_path': video_path, 'duration': round(track['duration'], 1)})
+        
+        self._progress(None, 'rendered')
+        report = self._sharing_report(seconds, {'story': 1, 'tts': len(voices), 'subtitles': len(voices),
+                                                'compose': total}, total, baseline)
+        first = tracks[voices[0]]
+        self._update_summary_json(story['summary_json'], first['duration'], variants[0]['video_path'],
+                                  first['audio_path'], first['subtitle_path'], images=article['images'],
+                                  broll_videos=broll_videos, render_mode=mode, variants=variants,
+                                  sharing=report)
+        self._record_artifacts(output_name, image=article['images'],
+                               audio=[p for t in tracks.values() for p in (t['audio_path'], working_copy(t['audio_path']))],
+                               subtitles=[t['subtitle_path'] for t in tracks.values()],
+                               video=[v['video_path'] for v in variants],
+                               summary=[story['summary_path'], story['summary_json']])
+        
+        print(f"\n{'='*60}")
+        print(f"✅ {total} VARIANTS COMPLETE!")
+        print(f"{'='*60}")
+        for variant in variants:
+            print(f"Video:    {variant['video_path']}")
+        print(f"Time:     {report['seconds']:.0f}s (naive rerun ≈ {report['naive_seconds']:.0f}s, "
+              f"{report['saved_percent']:.0f}% saved)")
+        print(f"Shared:   {report['image_cache_hits']} image cache hits, "
+              f"{report['prerender_hits']} pre-rendered asset reuses")
+        print(f"{'='*60}\n")
+        return {'variants': variants, 'sharing': report}
+    
+    def _sharing_report(self, seconds: dict, runs: dict, total: int, baseline: tuple) -> dict:
+        '''Compare stage runs/time against rerunning generate_video once per variant.'''
+        stages = {}
+        for stage, elapsed in seconds.items():
+            per_run = elapsed / runs[stage] if runs[stage] else 0.0
+            stages[stage] = {'runs': runs[stage], 'naive_runs': total, 'seconds': round(elapsed, 2),
+                             'naive_seconds': round(per_run * total, 2)}
+        actual = sum(s['seconds'] for s in stages.values())
+        naive = sum(s['naive_seconds'] for s in stages.values())
+        return {
+            'variants': total,
+            'stages': stages,
+            'seconds': round(actual, 2),
+            'naive_seconds': round(naive, 2),
+            'saved_percent': round(100 * (1 - actual / naive), 1) if naive else 0.0,
+            'image_cache_hits': self.media.image_cache.hits - baseline[0],
+            'image_cache_misses': self.media.image_cache.misses - baseline[1],
+            'prerender_hits': self.media.prerender_hits - baseline[2],
+            'prerender_misses': self.media.prerender_misses - baseline[3],
+        }
+    
+    def _prepare_story(self, news_url: str, output_name: str, article: dict, timestamp: str,
+                       progress=None) -> dict:
+        '''
+        Steps 1-5: crawl, summarize, correct/refine, build the script and export the summary.
+        
+        Returns:
+            Dict with article, broll_videos, intro, body, outro, full_script and summary_json
+        '''
+        self.media.clear_prerendered()
+        
         # Step 1: Crawl article
         print("📰 Step 1: Crawling article...")
-        article = self.processor.crawl_article(news_url)
+        self._progress(progress, 'crawl')
+        if article is None:
+            article = self.processor.crawl_article(news_url)
         print(f"   ✓ Title: {article['title'][:60]}...")
         print(f"   ✓ Images: {len(article['images'])} downloaded")
+        if article.get('image_stats'):
+            print(f"   ✓ Image selection: {describe_selection(article['image_stats'])}")
         
         # Load custom images/videos if specified
         broll_videos = []
@@ -96,20 +335,43 @@ class TikTokNewsGenerator:
         if len(article['images']) < 3:
             print("   ⚠ Warning: Less than 3 images found")
         
+        duplicate_of = None
+        if self.dedup_index:
+            duplicate_of = self.dedup_index.check(article)
+            if duplicate_of and self.dedup == 'skip':
+                raise DuplicateArticle(news_url, duplicate_of)
+            if duplicate_of:
+                print(f"   ⚠ Near-duplicate of {duplicate_of['url']} ({duplicate_of['similarity']:.0%} similar)")
+        
         # Step 2: Summarize content
         print("\n📝 Step 2: Summarizing content...")
+        self._progress(progress, 'summarize')
+        llm_before = self.processor.llm.summary()
         body = self.processor.summarize(article)
         print(f"   ✓ Body: {len(body.split())} words")
         
         # Step 3: Correct and refine text
         print("\n🔧 Step 3: Correcting and refining text...")
-        body = self.processor.correct_text(body)
+        self._progress(progress, 'refine')
+        self.models.prepare('correct')
+        with self.scheduler.stage('correct'):
+            body = self.processor.correct_text(body)
         body = self.processor.refine_text(body)
         body = self._final_cleanup(body)
         print(f"   ✓ Final body: {len(body.split())} words")
+        quality = self.processor.last_quality
+        if quality['sentences']:
+            print(f"   ✓ Quality gate: {quality['skipped_correct']}/{quality['sentences']} sentences skipped corrector, "
+                  f"{quality['skipped_refine']}/{quality['sentences']} skipped refiner")
+        llm_stats = self.processor.llm.summary(since=llm_before)
+        if llm_stats['avg_ttft'] is not None:
+            print(f"   ✓ LLM (this article): {llm_stats['calls']} calls, avg TTFT {llm_stats['avg_ttft']:.2f}s, "
+                  f"{llm_stats['stopped_early']} stopped early, prompt eval {llm_stats['prompt_eval_s']:.1f}s "
+                  f"vs eval {llm_stats['eval_s']:.1f}s")
         
         # Step 4: Add intro and outro
         print("\n📌 Step 4: Adding intro and outro...")
+        self._progress(progress, 'script')
         intro = f"Tin nóng: {article['title'][:50]}..."
         outro = "Theo dõi và follow kênh Tiktok của PSI để cập nhật thêm tin tức!"
         full_script = f"{intro}... {body} ... {outro}"
@@ -117,56 +379,142 @@ class TikTokNewsGenerator:
         
         # Step 5: Export summary
         print("\n📄 Step 5: Exporting summary...")
-        summary_path, summary_json = self._export_summary(output_name, article, intro, body, outro, full_script, news_url, timestamp)
+        self._progress(progress, 'export')
+        summary_path, summary_json = self._export_summary(output_name, article, intro, body, outro, full_script, news_url, timestamp,
+                                                          duplicate_of)
         print(f"   ✓ Summary: {summary_path}")
         print(f"   ✓ JSON: {summary_json}")
         
-        # Step 6: Generate voice-over
-        print("\n🎤 Step 6: Generating voice-over...")
-        audio_path = f"output/audio/{output_name}.mp3"
-        os.makedirs("output/audio", exist_ok=True)
-        self.media.generate_audio(full_script, audio_path)
-        audio_duration = self.media.get_audio_duration(audio_path)
-        print(f"   ✓ Audio duration: {audio_duration:.1f}s")
+        return {'article': article, 'broll_videos': broll_videos, 'intro': intro, 'body': body,
+                'outro': outro, 'full_script': full_script, 'summary_path': summary_path,
+                'summary_json': summary_json}
+    
+    def render_from_summary(self, summary_json: str, mode: str = 'final', output_name: str = None) -> str:
+        '''
+        Re-render a video from the audio, subtitles and images of a previous run.
         
-        # Step 7: Generate subtitles
-        print("\n💬 Step 7: Generating subtitles...")
-        subtitle_path = f"output/temp/{output_name}.srt"
-        os.makedirs("output/temp", exist_ok=True)
-        self.media.generate_subtitles(audio_path, subtitle_path, full_script)
+        Typically used after reviewing a preview render: the timeline is rebuilt
+        from the same assets without re-running crawl, LLM, TTS or Whisper.
         
-        # Step 8: Compose video
-        print("\n🎬 Step 8: Composing video...")
-        video_path = f"output/videos/{output_name}.mp4"
+        Args:
+            summary_json: Summary JSON written by generate_video
+            mode: Render mode from RENDER_MODES
+            output_name: Output filename (default: summary name)
+            
+        Returns:
+            Path to rendered video file
+        '''
+        with open(summary_json, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if 'audio_path' not in data or 'images' not in data:
+            raise ValueError(f"Summary has no render assets: {summary_json}")
+        assets = [data['audio_path'], data.get('subtitle_path')] + data['images']
+        missing = [p for p in assets if p and not os.path.exists(p)]
+        if missing:
+            raise FileNotFoundError(f"Render assets of {summary_json} no longer exist (expired by artifact GC?): "
+                                    f"{', '.join(missing)}")
+        output_name = output_name or os.path.splitext(os.path.basename(summary_json))[0]
+        print(f"\n🎬 Rendering {output_name} ({mode}) from {summary_json}...")
+        self._progress(None, 'compose')
+        video_path = self._compose(output_name, data['title'], data['images'], data.get('broll_videos', []),
+                                   data['audio_path'], data['subtitle_path'], data['duration_seconds'], mode,
+                                   template=self.template)
+        self._update_summary_json(summary_json, data['duration_seconds'], video_path, data['audio_path'],
+                                  data['subtitle_path'], render_mode=mode)
+        self._record_artifacts(os.path.splitext(os.path.basename(summary_json))[0], video=[video_path])
+        self._progress(None, 'rendered')
+        return video_path
+    
+    def _compose(self, output_name: str, title: str, images: list, broll_videos: list, audio_path: str,
+                 subtitle_path: str, audio_duration: float, mode: str = 'final', template: str = None,
+                 aspect: str = '9:16') -> str:
+        '''Compose the video in the given render mode and aspect ratio and return its path.'''
+        self.models.prepare('compose')
+        self.media.set_render_mode(mode, aspect)
+        suffix = "" if mode == 'final' else f"_{mode}"
+        video_path = f"output/videos/{output_name}{suffix}.mp4"
         os.makedirs("output/videos", exist_ok=True)
+        self.store.writable(video_path)
         background_music = "assets/background_music.mp3" if os.path.exists("assets/background_music.mp3") else None
         typing_sfx = "assets/typing.mp3" if os.path.exists("assets/typing.mp3") else None
         
-        self.media.compose_video(
-            images=article['images'],
-            audio_path=audio_path,
-            subtitle_path=subtitle_path,
-            output_path=video_path,
-            audio_duration=audio_duration,
-            title=article['title'],
-            background_music=background_music,
-            typing_sfx=typing_sfx,
-            broll_videos=broll_videos if broll_videos else None,
-            template=self.template,
-            intro_duration=self.intro_duration
-        )
+        with self.scheduler.stage('compose') as lease:
+            self.media.encoder_threads = lease.threads
+            self.media.compose_video(
+                images=images,
+                audio_path=audio_path,
+                subtitle_path=subtitle_path,
+                output_path=video_path,
+                audio_duration=audio_duration,
+                title=title,
+                background_music=background_music,
+                typing_sfx=typing_sfx,
+                broll_videos=broll_videos if broll_videos else None,
+                template=template,
+                intro_duration=self.intro_duration
+            )
+        return video_path
+    
+    def generate_batch(self, listing_urls: list, limit: int = None, mode: str = 'final') -> list:
+        '''
+        Harvest articles from listing/RSS pages and generate a video for each.
         
-        # Step 9: Update JSON with final metadata
-        self._update_summary_json(summary_json, audio_duration, video_path, audio_path, subtitle_path)
+        Crawling runs on a background thread and feeds a job queue, so videos
+        start rendering while remaining articles are still being fetched.
         
-        print(f"\n{'='*60}")
-        print(f"✅ VIDEO GENERATION COMPLETE!")
-        print(f"{'='*60}")
-        print(f"Video:    {video_path}")
-        print(f"Duration: {audio_duration:.1f}s")
-        print(f"{'='*60}\n")
+        Args:
+            listing_urls: Category or RSS URLs of supported sites
+            limit: Max number of articles
+            mode: Render mode from RENDER_MODES
+            
+        Returns:
+            List of generated video paths
+        '''
+        jobs = queue.Queue()
+        crawler = AsyncCrawler(output_dir=self.processor.output_dir)
         
-        return video_path
+        def produce():
+            try:
+                crawler.run(listing_urls, jobs, limit)
+            finally:
+                jobs.put(None)
+        
+        threading.Thread(target=produce, daemon=True).start()
+        videos = []
+        # Keep the LLM resident between articles; keep_alive is restored afterwards
+        with self.processor.llm.pinned():
+            while True:
+                article = jobs.get()
+                if article is None:
+                    break
+                try:
+                    videos.append(self.generate_video(article['url'], article=article, mode=mode))
+                except DuplicateArticle as e:
+                    print(f"\n⏭ Skipped {article['url']}: {e}")
+                except Exception as e:
+                    print(f"\n❌ Error ({article['url']}): {e}")
+        assets = self.media.assets.stats()
+        print(f"\n✓ Assets: {assets['loads']} loaded, {assets['hits']} reused ({assets['mb']} MB)")
+        return videos
+    
+    def _record_artifacts(self, job: str, **artifacts):
+        '''Store a job's files (role -> paths) in the artifact store and collect garbage if limits are set.'''
+        try:
+            self.store.record(job, artifacts)
+            if self.store_max_bytes or self.store_max_age_days:
+                result = self.store.gc(self.store_max_bytes, self.store_max_age_days)
+                if result['freed_bytes'] or result['expired_entries']:
+                    print(f"   ✓ Store GC: {result['expired_entries']} intermediates expired, "
+                          f"{result['dropped_jobs']} jobs dropped, {result['freed_bytes'] / 1024**2:.1f} MB freed")
+        except OSError as e:
+            print(f"   ⚠ Artifact store: {e}")
+    
+    def _progress(self, progress, stage: str, info: dict = None):
+        '''Report a pipeline stage to the profiler and an optional progress callback.'''
+        if self.profiler:
+            self.profiler.stage(stage)
+        if progress:
+            progress(stage, info or {})
     
     def _load_media(self, directory: str, extensions: set) -> list:
         '''Load media files from directory.'''
@@ -194,7 +542,7 @@ class TikTokNewsGenerator:
         return text
     
     def _export_summary(self, output_name: str, article: dict, intro: str, body: str, 
-                       outro: str, full_script: str, url: str, timestamp: str) -> tuple:
+                       outro: str, full_script: str, url: str, timestamp: str, duplicate_of: dict = None) -> tuple:
         '''Export summary as text and JSON.'''
         summary_path = f"output/summaries/{output_name}.txt"
         summary_json_path = f"output/summaries/{output_name}.json"
@@ -232,6 +580,8 @@ class TikTokNewsGenerator:
             "full_script": full_script,
             "images_count": len(article['images'])
         }
+        if duplicate_of:
+            summary_data["duplicate_of"] = duplicate_of
         
         with open(summary_json_path, 'w', encoding='utf-8') as f:
             json.dump(summary_data, f, ensure_ascii=False, indent=2)
@@ -239,7 +589,7 @@ class TikTokNewsGenerator:
         return summary_path, summary_json_path
     
     def _update_summary_json(self, json_path: str, duration: float, video_path: str, 
-                            audio_path: str, subtitle_path: str):
+                            audio_path: str, subtitle_path: str, **extra):
         '''Update JSON with final metadata.'''
         with open(json_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
@@ -247,6 +597,7 @@ class TikTokNewsGenerator:
         data['video_path'] = video_path
         data['audio_path'] = audio_path
         data['subtitle_path'] = subtitle_path
+        data.update(extra)
         with open(json_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
 
@@ -259,12 +610,32 @@ def main():
     
     parser = argparse.ArgumentParser(description='TikTok News Video Generator')
     parser.add_argument('--url', type=str, help='News article URL')
+    parser.add_argument('--listing', type=str, nargs='+', help='Category/RSS URLs to harvest (batch mode)')
+    parser.add_argument('--limit', type=int, help='Max articles to harvest in batch mode')
     parser.add_argument('--image-dir', type=str, help='Custom image directory')
     parser.add_argument('--output', type=str, help='Output name (without extension)')
     parser.add_argument('--voice', type=str, default='binh', help='Voice (binh, tuyen, nguyen, son, vinh, huong, ly, ngoc, doan, dung)')
     parser.add_argument('--broll-dir', type=str, help='B-roll video directory')
     parser.add_argument('--template', type=str, help='Intro template (slide name/index)')
     parser.add_argument('--intro-duration', type=str, default='3', help='Intro duration (seconds or "none")')
+    parser.add_argument('--memory-budget', type=float, help='Model memory budget in GB (unload idle models per stage)')
+    parser.add_argument('--preview', action='store_true', help='Fast low-resolution preview render (360x640, 15 fps)')
+    parser.add_argument('--render-from', type=str, help='Render final video from a previous run\'s summary JSON')
+    parser.add_argument('--dedup', type=str, choices=['flag', 'skip'], help='Detect near-duplicate articles (flag or skip them)')
+    parser.add_argument('--dedup-window', type=float, default=3, help='Near-duplicate window in days')
+    parser.add_argument('--tts-workers', type=int, default=1, help='CPU TTS worker processes (0 = one per 2 cores of the TTS budget)')
+    parser.add_argument('--corrector', type=str, choices=['auto', 'torch', 'onnx'], default='auto',
+                        help='Text corrector backend (auto = exported int8 ONNX on CPU when available)')
+    parser.add_argument('--profile', type=str, nargs='?', const='output/profiles',
+                        help='Profile each stage; writes .prof files and flamegraph stacks (default dir: output/profiles)')
+    parser.add_argument('--store-max-gb', type=float, help='Artifact store size budget; oldest jobs are dropped above it')
+    parser.add_argument('--store-max-age', type=float, help='Days after which stored images/audio/SRT expire')
+    parser.add_argument('--cores', type=int, help='Cores shared by concurrent stages (default: all available)')
+    parser.add_argument('--gpu-stages', type=str, nargs='*', choices=['correct', 'tts', 'subtitles'],
+                        help='Stages that run on CUDA when available (default: all; no stages = CPU only)')
+    parser.add_argument('--voices', type=str, nargs='+', help='Render one variant per voice')
+    parser.add_argument('--templates', type=str, nargs='+', help='Render one variant per template ("none" = fallback intro)')
+    parser.add_argument('--aspects', type=str, nargs='+', help='Render one variant per aspect ratio (9:16, 1:1, 4:5)')
     args = parser.parse_args()
     
     print("Available voices:")
@@ -273,28 +644,58 @@ def main():
     print("  Female Northern: huong, ly, ngoc")
     print("  Female Southern: doan, dung\n")
     
-    news_url = args.url or input("Enter news article URL: ").strip()
-    if not news_url:
+    news_url = args.url or (None if args.listing or args.render_from else input("Enter news article URL: ").strip())
+    if not news_url and not args.listing and not args.render_from:
         print("Error: No URL provided")
         return
     
     intro_duration = None if args.intro_duration.lower() == 'none' else float(args.intro_duration)
+    if args.cores or args.gpu_stages is not None:
+        configure_scheduler(args.cores, args.gpu_stages)
     
     generator = TikTokNewsGenerator(
         voice=args.voice,
         image_dir=args.image_dir,
         broll_dir=args.broll_dir,
         template=args.template,
-        intro_duration=intro_duration
+        intro_duration=intro_duration,
+        render_only=bool(args.render_from),
+        memory_budget_gb=args.memory_budget,
+        dedup=args.dedup,
+        dedup_window_days=args.dedup_window,
+        tts_workers=args.tts_workers,
+        corrector_backend=args.corrector,
+        profile_dir=args.profile,
+        store_max_gb=args.store_max_gb,
+        store_max_age_days=args.store_max_age
     )
+    mode = 'preview' if args.preview else 'final'
     
     try:
-        video_path = generator.generate_video(news_url, output_name=args.output)
-        print(f"\n🎉 Success! Video: {video_path}")
+        if args.render_from:
+            video_path = generator.render_from_summary(args.render_from, mode=mode, output_name=args.output)
+            print(f"\n🎉 Success! Video: {video_path}")
+        elif args.voices or args.templates or args.aspects:
+            templates = [None if t.lower() == 'none' else t for t in args.templates] if args.templates else None
+            result = generator.generate_variants(news_url, voices=args.voices, templates=templates,
+                                                 aspects=args.aspects, output_name=args.output, mode=mode)
+            print(f"\n🎉 Success! {len(result['variants'])} variants generated")
+        elif args.listing:
+            videos = generator.generate_batch(args.listing, limit=args.limit, mode=mode)
+            print(f"\n🎉 Success! {len(videos)} videos generated")
+        else:
+            video_path = generator.generate_video(news_url, output_name=args.output, mode=mode)
+            print(f"\n🎉 Success! Video: {video_path}")
+    except DuplicateArticle as e:
+        print(f"\n⏭ Skipped: {e}")
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        generator.media.close()
+        if generator.profiler:
+            generator.profiler.finish()
 
 
 if __name__ == "__main__":
@@ -13,28 +13,39 @@ import numpy as np
 import pysrt
 import whisper
 import torch
-import soundfile as sf
-from PIL import Image, ImageFilter, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+from imagecache import ImageCache, blur_background, cover_crop
+from framewriter import FFmpegFrameWriter, pan_renderer, StaticOverlay, encode_still, concat_segments
+from timeline import StreamingTimeline
+from models import ModelRegistry
+from ttspool import TTSPool, preset_voice, SAMPLE_RATE
+from audioio import write_audio, audio_duration, working_copy, read_pcm
+from assets import AssetRegistry, shared_assets
+from scheduler import ResourceScheduler, shared_scheduler
 
 # MoviePy 2.x compatible imports
 try:
-    from moviepy import VideoClip, ImageClip, AudioFileClip, CompositeVideoClip, concatenate_videoclips
+    from moviepy import VideoClip, AudioFileClip, concatenate_videoclips
     from moviepy import VideoFileClip, AudioClip, concatenate_audioclips, CompositeAudioClip
-    import moviepy.video.fx as vfx
-    import moviepy.audio.fx as afx
     MOVIEPY_VERSION = 2
 except ImportError:
     # MoviePy 1.x fallback
-    from moviepy.video.VideoClip import VideoClip, ImageClip, AudioClip
+    from moviepy.video.VideoClip import VideoClip, AudioClip
     from moviepy.audio.io.AudioFileClip import AudioFileClip
-    from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
     from moviepy.video.compositing.concatenate import concatenate_videoclips
     from moviepy.video.io.VideoFileClip import VideoFileClip
     from moviepy.audio.AudioClip import concatenate_audioclips, CompositeAudioClip
-    import moviepy.video.fx.all as vfx
-    import moviepy.audio.fx.all as afx
     MOVIEPY_VERSION = 1
 
+# Render presets: preview trades quality for a fast content-review encode
+RENDER_MODES = {
+    'final': {'resolution': (1080, 1920), 'fps': 30, 'preset': 'medium', 'bitrate': '6000k'},
+    'preview': {'resolution': (360, 640), 'fps': 15, 'preset': 'ultrafast', 'bitrate': '800k'},
+}
+
+# Output aspect ratios (width:height); the render mode fixes the width
+ASPECT_RATIOS = {'9:16': (9, 16), '1:1': (1, 1), '4:5': (4, 5)}
+
 try:
     from pptx import Presentation
     from pptx.util import Emu
@@ -54,7 +65,10 @@ class MediaGenerator:
     - Render PowerPoint intro templates
     '''
     
-    def __init__(self, voice: str = "binh", resolution=(1080, 1920), fps=30):
+    def __init__(self, voice: str = "binh", resolution=(1080, 1920), fps=30,
+                 preset: str = 'medium', bitrate: str = '6000k', load_tts: bool = True,
+                 models: ModelRegistry = None, tts_workers: int = 1, assets: AssetRegistry = None,
+                 scheduler: ResourceScheduler = None):
         '''
         Initialize media generator with voice and video settings.
         
@@ -62,93 +76,151 @@ class MediaGenerator:
             voice: Voice name for TTS (binh, tuyen, nguyen, etc.)
             resolution: Video resolution (width, height)
             fps: Frames per second
+            preset: x264 encoder preset
+            bitrate: Video bitrate
+            load_tts: Load the TTS model (False for render-only use)
+            models: Shared model registry (models load lazily when it has a memory budget)
+            tts_workers: CPU TTS worker processes (1 = in-process, 0 = sized to the scheduler's TTS
+                core budget; ignored on CUDA)
+            assets: Font/overlay/audio registry (default: the process-wide one shared by all generators)
+            scheduler: Core/device scheduler (default: the process-wide one) that picks model devices
         '''
         self.voice_name = voice
+        self.tts_workers = tts_workers
+        self.tts_pool = None
+        self.scheduler = scheduler or shared_scheduler()
+        # ffmpeg/x264 threads for the next encode; set from the compose lease
+        self.encoder_threads = 4
+        self.set_output(resolution, fps, preset, bitrate)
+        self.models = models or ModelRegistry()
+        self.image_cache = ImageCache()
+        self.assets = assets or shared_assets()
+        self.prerendered = {}
+        self.prerender_hits = 0
+        self.prerender_misses = 0
+        self.models.register('tts', self._load_tts, stages=['tts'])
+        self.models.register('whisper', self._load_whisper, stages=['subtitles'])
+        if load_tts and self._use_pool():
+            self._get_pool()
+        elif load_tts and self.models.budget is None:
+            self.models.get('tts')
+        print(f"✓ MediaGenerator initialized (Voice: {voice}, Resolution: {resolution[0]}x{resolution[1]})")
+    
+    def set_output(self, resolution=(1080, 1920), fps=30, preset: str = 'medium', bitrate: str = '6000k'):
+        '''Set output video format. Layout constants scale from the 1080px-wide design.'''
         self.width, self.height = resolution
         self.fps = fps
-        self.tts = None
-        self.current_voice = None
-        self.whisper_model = None
-        self._init_tts()
-        print(f"✓ MediaGenerator initialized (Voice: {voice}, Resolution: {resolution[0]}x{resolution[1]})")
+        self.preset = preset
+        self.bitrate = bitrate
+        self.scale = self.width / 1080
+    
+    def set_render_mode(self, mode: str, aspect: str = '9:16'):
+        '''Switch output format to a RENDER_MODES preset ('final' or 'preview') and aspect ratio.'''
+        preset = dict(RENDER_MODES[mode])
+        if aspect not in ASPECT_RATIOS:
+            raise ValueError(f"Unknown aspect ratio: {aspect}")
+        aw, ah = ASPECT_RATIOS[aspect]
+        width = preset['resolution'][0]
+        preset['resolution'] = (width, int(round(width * ah / aw / 2)) * 2)
+        self.set_output(**preset)
+    
+    def _prerendered(self, key: tuple, build):
+        '''Memoize an asset that is identical across variants (intro slides, subtitle images).'''
+        if key in self.prerendered:
+            self.prerender_hits += 1
+            return self.prerendered[key]
+        self.prerender_misses += 1
+        value = self.prerendered[key] = build()
+        return value
+    
+    def clear_prerendered(self):
+        '''Drop memoized assets (call when the story changes).'''
+        self.prerendered.clear()
+    
+    def _px(self, value: float) -> int:
+        '''Scale a 1080p layout measurement to the current resolution.'''
+        return max(1, int(round(value * self.scale)))
     
-    def _init_tts(self):
-        '''Initialize VieNeu-TTS for Vietnamese speech synthesis.'''
+    @property
+    def tts(self):
+        '''VieNeu-TTS engine (loaded on demand through the model registry).'''
+        loaded = self.models.get('tts')
+        return loaded[0] if loaded else None
+    
+    @property
+    def current_voice(self):
+        loaded = self.models.get('tts')
+        return loaded[1] if loaded else None
+    
+    def _load_tts(self) -> tuple:
+        '''Load VieNeu-TTS for Vietnamese speech synthesis; returns (tts, voice) or None.'''
         try:
             from vieneu import Vieneu
-            has_cuda = torch.cuda.is_available()
-            device = "cuda" if has_cuda else "cpu"
+            device = self.scheduler.device_for('tts')
+            has_cuda = device == "cuda"
             local_path = "models/VieNeu-TTS"
             
             if has_cuda and os.path.exists(local_path):
-                self.tts = Vieneu(backbone_repo=local_path, backbone_device=device, codec_device=device)
+                tts = Vieneu(backbone_repo=local_path, backbone_device=device, codec_device=device)
             elif has_cuda:
-                self.tts = Vieneu(backbone_repo="pnnbao-ump/VieNeu-TTS-0.3B", backbone_device=device, codec_device=device)
-            else:
-                self.tts = Vieneu(backbone_repo="pnnbao-ump/VieNeu-TTS-0.3B-q8-gguf")
-            
-            voices = self.tts.list_preset_voices()
-            available = [v[1] if isinstance(v, tuple) else v for v in voices]
-            voice_map = {"binh": "Binh", "tuyen": "Tuyen", "nguyen": "Nguyen", "son": "Son", 
-                        "vinh": "Vinh", "huong": "Huong", "ly": "Ly", "ngoc": "Ngoc", 
-                        "doan": "Doan", "dung": "Dung"}
-            target = voice_map.get(self.voice_name.lower(), self.voice_name.capitalize())
-            
-            if target in available:
-                self.current_voice = self.tts.get_preset_voice(target)
+                tts = Vieneu(backbone_repo="pnnbao-ump/VieNeu-TTS-0.3B", backbone_device=device, codec_device=device)
             else:
-                for v in ["Binh", "Tuyen"]:
-                    if v in available:
-                        self.current_voice = self.tts.get_preset_voice(v)
-                        break
+                tts = Vieneu(backbone_repo="pnnbao-ump/VieNeu-TTS-0.3B-q8-gguf")
             
+            voice = preset_voice(tts, self.voice_name)
             print(f"   ✓ VieNeu-TTS ready ({device.upper()} mode)")
+            return tts, voice
         except Exception as e:
             print(f"   ✗ VieNeu-TTS init failed: {e}")
-            self.tts = None
+            return None
+    
+    def _use_pool(self) -> bool:
+        '''Multi-process TTS only helps the CPU backbone.'''
+        return self.tts_workers != 1 and self.scheduler.device_for('tts') == 'cpu'
     
-    def generate_audio(self, text: str, output_path: str) -> str:
+    def _get_pool(self) -> TTSPool:
+        '''Start the TTS worker pool on first use.'''
+        if self.tts_pool is None:
+            self.tts_pool = TTSPool(workers=self.tts_workers or None, cores=self.scheduler.budget('tts')).start()
+        return self.tts_pool
+    
+    def close(self):
+        '''Stop TTS worker processes.'''
+        if self.tts_pool:
+            self.tts_pool.close()
+            self.tts_pool = None
+    
+    def generate_audio(self, text: str, output_path: str, voice: str = None) -> str:
         '''
         Generate speech audio from text.
         
         Args:
             text: Text to synthesize
             output_path: Path to save audio file
+            voice: Voice name overriding the generator's default voice
             
         Returns:
-            Path to generated audio file
+            Path to generated audio file (a .wav if MP3 encoding is unavailable)
         '''
-        if not self.tts:
-            raise RuntimeError("VieNeu-TTS not initialized")
-        
         clean_text = text.replace("... ", ". ").replace(" ... ", ". ")
-        audio = self.tts.infer(text=clean_text, voice=self.current_voice, temperature=0.8, top_k=50)
-        
-        if output_path.endswith('.mp3'):
-            temp_wav = output_path.replace('.mp3', '_temp.wav')
-            sf.write(temp_wav, audio, 24000)
-            try:
-                subprocess.run(['ffmpeg', '-i', temp_wav, '-codec:a', 'libmp3lame', '-qscale:a', '2', '-y', output_path],
-                             capture_output=True, check=True)
-                os.remove(temp_wav)
-            except:
-                os.rename(temp_wav, output_path)
+        if self._use_pool():
+            audio = self._get_pool().synthesize(clean_text, voice or self.voice_name)
         else:
-            sf.write(output_path, audio, 24000)
-        
+            loaded = self.models.get('tts')
+            if not loaded:
+                raise RuntimeError("VieNeu-TTS not initialized")
+            tts, default_voice = loaded
+            voice = preset_voice(tts, voice) if voice and voice != self.voice_name else default_voice
+            audio = tts.infer(text=clean_text, voice=voice, temperature=0.8, top_k=50)
+        
+        # Encoded from memory; a WAV working copy is kept for Whisper and compose
+        output_path = write_audio(audio, SAMPLE_RATE, output_path)
         print(f"✓ Audio generated: {output_path}")
         return output_path
     
     def get_audio_duration(self, audio_path: str) -> float:
-        '''Get audio duration in seconds.'''
-        try:
-            data, rate = sf.read(audio_path)
-            return len(data) / rate
-        except:
-            result = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-                                   '-of', 'default=noprint_wrappers=1:nokey=1', audio_path],
-                                  capture_output=True, text=True)
-            return float(result.stdout.strip())
+        '''Get audio duration in seconds from the file header.'''
+        return audio_duration(audio_path)
     
     def generate_subtitles(self, audio_path: str, output_path: str, original_script: str = None) -> str:
         '''
@@ -166,19 +238,12 @@ class MediaGenerator:
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
             
-            if not self.whisper_model:
-                for model_name in ["base", "small", "tiny"]:
-                    try:
-                        self.whisper_model = whisper.load_model(model_name)
-                        break
-                    except torch.cuda.OutOfMemoryError:
-                        torch.cuda.empty_cache()
-                        continue
-                if not self.whisper_model:
-                    self.whisper_model = whisper.load_model("base", device="cpu")
-            
-            result = self.whisper_model.transcribe(audio_path, language="vi", word_timestamps=True, 
-                                                   verbose=False, fp16=torch.cuda.is_available())
+            whisper_model = self.models.get('whisper')
+            # Whisper takes 16 kHz PCM directly; avoids an ffmpeg decode of the MP3
+            source = working_copy(audio_path)
+            audio = read_pcm(source, whisper.audio.SAMPLE_RATE) if source.endswith('.wav') else source
+            result = whisper_model.transcribe(audio, language="vi", word_timestamps=True, 
+                                              verbose=False, fp16=next(whisper_model.parameters()).is_cuda)
             
             whisper_words = []
             for segment in result['segments']:
@@ -217,6 +282,17 @@ class MediaGenerator:
             print(f"Subtitle generation error: {e}")
             return self._fallback_subtitles(audio_path, output_path, original_script)
     
+    def _load_whisper(self):
+        '''Load Whisper, falling back to smaller models (then CPU) on GPU OOM.'''
+        if self.scheduler.device_for('subtitles') == 'cpu':
+            return whisper.load_model("base", device="cpu")
+        for model_name in ["base", "small", "tiny"]:
+            try:
+                return whisper.load_model(model_name)
+            except torch.cuda.OutOfMemoryError:
+                torch.cuda.empty_cache()
+        return whisper.load_model("base", device="cpu")
+    
     def _align_words(self, whisper_words: list, corrected_words: list) -> list:
         '''Align corrected words with Whisper timing.'''
         if len(whisper_words) == len(corrected_words):
@@ -259,8 +335,7 @@ class MediaGenerator:
     def _fallback_subtitles(self, audio_path: str, output_path: str, script: str) -> str:
         '''Fallback subtitle generation.'''
         try:
-            data, rate = sf.read(audio_path)
-            duration = len(data) / rate
+            duration = audio_duration(audio_path)
             text = script if script else 'Subtitle generation failed'
             words = text.split()
             chunks = [' '.join(words[i:i+10]) for i in range(0, len(words), 10)]
@@ -312,35 +387,21 @@ class MediaGenerator:
         actual_intro_duration = audio_duration if full_video_intro else intro_duration
         has_separate_intro = not full_video_intro and title
         
-        total_media = len(images) + (len(broll_videos) if broll_videos else 0)
-        duration_per_media = audio_duration / total_media
-        
-        clips, intro_overlay = [], None
+        intro_overlay, intro_still = None, None
         
+        # Static intros never go through per-frame compositing: the full-video
+        # overlay is a pre-multiplied slice blend and a separate intro is an
+        # ffmpeg still-loop segment joined to the body without re-encoding
         if title and full_video_intro:
-            intro_overlay = self._create_intro_overlay(title, images[0], audio_duration, template)
+            intro_overlay = StaticOverlay(self._intro_overlay_image(title, images[0], template))
         elif title and has_separate_intro:
-            intro_clip = self._create_intro_clip(title, images[0], actual_intro_duration, template)
-            if MOVIEPY_VERSION == 2:
-                intro_clip = intro_clip.with_effects([vfx.CrossFadeOut(0.5)])
-            else:
-                intro_clip = intro_clip.crossfadeout(0.5)
-            clips.append(intro_clip)
+            intro_still = self._intro_image(title, images[0], template)
         
-        for img_path in images:
-            clips.append(self._create_effect_clip(img_path, duration_per_media))
-        
-        if broll_videos:
-            for video_path in broll_videos:
-                broll = self._create_broll_clip(video_path, duration_per_media)
-                if broll:
-                    clips.append(broll)
+        # Body timeline starts after a separate intro, so subtitles need no offset
+        timeline = self.build_timeline(images, broll_videos or [], audio_duration,
+                                       subtitles=self._subtitle_cues(subtitle_path), overlay=intro_overlay)
         
-        video = concatenate_videoclips(clips, method="compose")
-        if intro_overlay:
-            video = CompositeVideoClip([video, intro_overlay])
-        
-        voice_audio = AudioFileClip(audio_path)
+        voice_file = voice_audio = AudioFileClip(working_copy(audio_path))
         if has_separate_intro:
             silence = AudioClip(lambda t: 0, duration=actual_intro_duration, fps=44100)
             voice_audio = concatenate_audioclips([silence, voice_audio])
@@ -355,35 +416,99 @@ class MediaGenerator:
         
         if background_music and os.path.exists(background_music):
             try:
-                bg = AudioFileClip(background_music)
-                if bg.duration < total_duration:
-                    loops = int(total_duration / bg.duration) + 1
-                    bg = concatenate_audioclips([bg] * loops)
-                bg = bg.subclipped(0, total_duration) if MOVIEPY_VERSION == 2 else bg.subclip(0, total_duration)
-                if MOVIEPY_VERSION == 2:
-                    bg = bg.with_effects([afx.MultiplyVolume(0.15)])
-                else:
-                    bg = bg.volumex(0.15)
-                audio_layers.append(bg)
+                audio_layers.append(self._looped_audio(background_music, total_duration, 0.15))
             except Exception as e:
                 print(f"Background music error: {e}")
-        video = video.with_audio(CompositeAudioClip(audio_layers)) if MOVIEPY_VERSION == 2 else video.set_audio(CompositeAudioClip(audio_layers))
+        mix = CompositeAudioClip(audio_layers)
         
-        time_offset = actual_intro_duration if has_separate_intro else 0
-        video = self._add_subtitles(video, subtitle_path, time_offset)
+        try:
+            # Frames are rendered straight into FFmpegFrameWriter's pipe buffers; only the
+            # audio mix goes through MoviePy, as a WAV muxed by ffmpeg
+            with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path) or '.') as tmp:
+                mix_path = os.path.join(tmp, 'mix.wav')
+                mix.write_audiofile(mix_path, fps=44100, logger=None)
+                segments = [(timeline.render_into, timeline.duration)]
+                if intro_still is not None:
+                    try:
+                        self._write_with_still_intro(intro_still, actual_intro_duration, timeline, mix_path,
+                                                     output_path, tmp)
+                        print(f"✓ Video created: {output_path}")
+                        return output_path
+                    except Exception as e:
+                        print(f"   ⚠ Still-segment encode failed ({e}); compositing intro per frame")
+                        timeline.close()
+                        segments.insert(0, (self._fading_intro(intro_still, actual_intro_duration),
+                                            actual_intro_duration))
+                self._encode(output_path, segments, mix_path)
+            print(f"✓ Video created: {output_path}")
+            return output_path
+        finally:
+            timeline.close()
+            voice_file.close()
+            print(f"   ✓ Timeline: {timeline.opened} segments materialized, "
+                  f"at most {timeline.max_resident} segments/overlays resident")
+    
+    def build_timeline(self, images: list, broll_videos: list, duration: float, subtitles: list = None,
+                       overlay: StaticOverlay = None) -> StreamingTimeline:
+        '''
+        Build the body timeline; nothing is decoded or opened until its segment is on screen.
         
-        video.write_videofile(output_path, fps=self.fps, codec='libx264', audio_codec='aac',
-                            bitrate='6000k', preset='medium', threads=4)
-        print(f"✓ Video created: {output_path}")
-        return output_path
+        Args:
+            images: Image paths, shown in order
+            broll_videos: B-roll video paths, shown after the images
+            duration: Total body duration, split evenly across images and B-roll
+            subtitles: (start, end, text) cues
+            overlay: Static overlay shown for the whole body (full-video intro)
+            
+        Returns:
+            StreamingTimeline rendering the body
+        '''
+        broll_videos = [p for p in broll_videos if os.path.exists(p)]
+        per_media = duration / (len(images) + len(broll_videos))
+        timeline = StreamingTimeline((self.width, self.height))
+        for img_path in images:
+            timeline.add(per_media, lambda p=img_path: (self._effect_renderer(p, per_media), None))
+        for video_path in broll_videos:
+            timeline.add(per_media, lambda p=video_path: self._broll_segment(p, per_media))
+        if overlay:
+            timeline.add_overlay(0, duration, lambda: overlay)
+        for start, end, text in subtitles or []:
+            timeline.add_overlay(start, end, lambda text=text: self._subtitle_overlay(text))
+        return timeline
+    
+    def _encode(self, output_path: str, segments: list, audio_path: str = None):
+        '''Render (render_into, duration) segments in order into FFmpegFrameWriter and mux audio_path.'''
+        with FFmpegFrameWriter(output_path, (self.width, self.height), self.fps, audio_path=audio_path,
+                               preset=self.preset, bitrate=self.bitrate, threads=self.encoder_threads) as writer:
+            for render_into, duration in segments:
+                writer.render(render_into, duration)
     
-    def _create_effect_clip(self, image_path: str, duration: float) -> VideoClip:
-        '''Create clip with blurred background and pan effect.'''
-        img = Image.open(image_path).convert('RGB')
-        img_ratio = img.width / img.height
+    def _write_with_still_intro(self, intro: np.ndarray, intro_duration: float, body: StreamingTimeline,
+                                mix_path: str, output_path: str, tmp: str):
+        '''Encode the intro as a still-loop segment and the body through the frame pipe, then join and mux the mix.'''
+        intro_path, body_path = os.path.join(tmp, 'intro.mp4'), os.path.join(tmp, 'body.mp4')
+        encode_still(intro, intro_duration, intro_path, self.fps, self.preset, self.bitrate, fade_out=0.5,
+                     threads=self.encoder_threads)
+        self._encode(body_path, [(body.render_into, body.duration)])
+        concat_segments([intro_path, body_path], output_path, audio_path=mix_path)
+        print(f"   ✓ Intro encoded once as a {intro_duration:.1f}s still segment")
+    
+    @staticmethod
+    def _fading_intro(intro: np.ndarray, duration: float, fade_out: float = 0.5):
+        '''In-place renderer for the intro frame fading to black over the last fade_out seconds.'''
+        def render_into(t, out):
+            np.copyto(out, intro)
+            remaining = duration - t
+            if remaining < fade_out:
+                np.multiply(out, max(0.0, remaining / fade_out), out=out, casting='unsafe')
+        return render_into
+    
+    def _effect_renderer(self, image_path: str, duration: float):
+        '''In-place renderer for an image with blurred background and pan effect.'''
+        img_w, img_h = self.image_cache.size(image_path)
+        img_ratio = img_w / img_h
         
-        bg = img.resize((self.width, self.height), Image.Resampling.LANCZOS).filter(ImageFilter.GaussianBlur(40))
-        bg_array = np.array(bg)
+        bg_array = self.image_cache.background(image_path, self.width, self.height)
         
         base_width = self.width
         base_height = int(base_width / img_ratio)
@@ -395,43 +520,24 @@ class MediaGenerator:
             base_width = int(base_height * img_ratio)
         
         pan_width, pan_height = int(base_width * 1.15), int(base_height * 1.15)
+        current = self.image_cache.foreground(image_path, pan_width, pan_height)
         
-        def make_frame(t):
-            progress = t / duration
-            eased = progress * progress * (3 - 2 * progress)
-            frame = bg_array.copy()
-            current = np.array(img.resize((pan_width, pan_height), Image.Resampling.LANCZOS))
-            max_pan = max(0, pan_width - self.width)
-            x, y = -int(max_pan * eased), (self.height - pan_height) // 2
-            sx1, sy1 = max(0, -x), max(0, -y)
-            sx2, sy2 = min(pan_width, self.width - x), min(pan_height, self.height - y)
-            dx1, dy1 = max(0, x), max(0, y)
-            dx2, dy2 = min(self.width, x + pan_width), min(self.height, y + pan_height)
-            if sx2 > sx1 and sy2 > sy1:
-                frame[dy1:dy2, dx1:dx2] = current[sy1:sy2, sx1:sx2]
-            return frame
-        
-        return VideoClip(make_frame, duration=duration)
+        return pan_renderer(bg_array, current, (pan_width, pan_height), duration)
     
-    def _create_broll_clip(self, video_path: str, target_duration: float) -> VideoClip:
-        '''Create B-roll video clip with effects.'''
-        try:
-            if not os.path.exists(video_path):
-                return None
-            broll = VideoFileClip(video_path).without_audio()
-            if broll.duration > target_duration:
-                broll = broll.subclipped(0, target_duration) if MOVIEPY_VERSION == 2 else broll.subclip(0, target_duration)
-            elif broll.duration < target_duration:
-                loops = int(target_duration / broll.duration) + 1
-                broll = concatenate_videoclips([broll] * loops)
-                broll = broll.subclipped(0, target_duration) if MOVIEPY_VERSION == 2 else broll.subclip(0, target_duration)
-            return self._resize_broll(broll)
-        except Exception as e:
-            print(f"B-roll error: {e}")
-            return None
+    def _broll_segment(self, video_path: str, target_duration: float) -> tuple:
+        '''Open a B-roll reader looped/trimmed to target_duration; returns (render_into, close).'''
+        source = VideoFileClip(video_path)
+        broll = source.without_audio()
+        if broll.duration > target_duration:
+            broll = broll.subclipped(0, target_duration) if MOVIEPY_VERSION == 2 else broll.subclip(0, target_duration)
+        elif broll.duration < target_duration:
+            loops = int(target_duration / broll.duration) + 1
+            broll = concatenate_videoclips([broll] * loops)
+            broll = broll.subclipped(0, target_duration) if MOVIEPY_VERSION == 2 else broll.subclip(0, target_duration)
+        return self._resize_broll(broll), source.close
     
-    def _resize_broll(self, video_clip: VideoClip) -> VideoClip:
-        '''Resize B-roll with blurred background and pan.'''
+    def _resize_broll(self, video_clip: VideoClip):
+        '''In-place renderer for B-roll resized over a blurred background with pan.'''
         ow, oh = video_clip.size
         ratio = ow / oh
         nw, nh = self.width, int(self.width / ratio)
@@ -441,70 +547,59 @@ class MediaGenerator:
             nh, nw = int(self.height * 0.5), int(nh * ratio)
         pan_w, pan_h = int(nw * 1.15), int(nh * 1.15)
         resized = video_clip.resized((pan_w, pan_h))
-        bg = Image.fromarray(video_clip.get_frame(0)).resize((self.width, self.height), Image.Resampling.LANCZOS)
-        bg_array = np.array(bg.filter(ImageFilter.GaussianBlur(40)))
+        bg_array = blur_background(Image.fromarray(video_clip.get_frame(0)), (self.width, self.height))
         duration = video_clip.duration
         
-        def make_frame(t):
-            progress, eased = t / duration, (t/duration)**2 * (3 - 2*(t/duration))
-            frame = bg_array.copy()
-            vf = resized.get_frame(t)
-            max_pan = max(0, pan_w - self.width)
-            x, y = -int(max_pan * eased), (self.height - pan_h) // 2
-            sx1, sy1 = max(0, -x), max(0, -y)
-            sx2, sy2 = min(pan_w, self.width - x), min(pan_h, self.height - y)
-            dx1, dy1 = max(0, x), max(0, y)
-            dx2, dy2 = min(self.width, x + pan_w), min(self.height, y + pan_h)
-            if sx2 > sx1 and sy2 > sy1:
-                frame[dy1:dy2, dx1:dx2] = vf[sy1:sy2, sx1:sx2]
-            return frame
-        
-        return VideoClip(make_frame, duration=duration)
+        return pan_renderer(bg_array, resized.get_frame, (pan_w, pan_h), duration)
     
-    def _add_typing_sfx(self, duration: float, custom_path: str = None) -> AudioFileClip:
+    def _add_typing_sfx(self, duration: float, custom_path: str = None) -> AudioClip:
         '''Add typing sound effect.'''
         paths = [custom_path, 'assets/typing.mp3', 'assets/typing.wav']
         sfx_path = next((p for p in paths if p and os.path.exists(p)), None)
         if not sfx_path:
             return None
         try:
-            audio = AudioFileClip(sfx_path)
-            if audio.duration < duration:
-                audio = concatenate_audioclips([audio] * (int(duration / audio.duration) + 1))
-            audio = audio.subclipped(0, duration) if MOVIEPY_VERSION == 2 else audio.subclip(0, duration)
-            if MOVIEPY_VERSION == 2:
-                return audio.with_effects([afx.MultiplyVolume(0.3)])
-            else:
-                return audio.volumex(0.3)
+            return self._looped_audio(sfx_path, duration, 0.3)
         except:
             return None
     
-    def _add_subtitles(self, video: CompositeVideoClip, subtitle_path: str, time_offset: float = 0.0) -> CompositeVideoClip:
-        '''Add subtitles to video.'''
+    def _looped_audio(self, path: str, duration: float, volume: float) -> AudioClip:
+        '''Loop a registry-decoded sound to duration, scaled by volume (no per-video decode or copies).'''
+        pcm, rate = self.assets.audio(path)
+        n = len(pcm)
+        
+        def frame(t):
+            return pcm[(np.asarray(t) * rate).astype(np.int64) % n] * volume
+        
+        return AudioClip(frame, duration=duration, fps=rate)
+    
+    def _subtitle_cues(self, subtitle_path: str, time_offset: float = 0.0) -> list:
+        '''Read SRT cues as (start, end, text); images are rendered by the timeline while on screen.'''
         try:
             subs = pysrt.open(subtitle_path, encoding='utf-8')
-            clips = []
-            for sub in subs:
-                start = (sub.start.ordinal / 1000) + time_offset
-                duration = (sub.end.ordinal / 1000) + time_offset - start
-                img = self._create_subtitle_image(sub.text)
-                clip = ImageClip(img, duration=duration).with_position(('center', self.height - 250)).with_start(start)
-                clips.append(clip)
-            video = CompositeVideoClip([video] + clips)
-            print(f"   ✓ Added {len(clips)} subtitle clips")
+            cues = [(sub.start.ordinal / 1000 + time_offset, sub.end.ordinal / 1000 + time_offset, sub.text)
+                    for sub in subs]
+            print(f"   ✓ Added {len(cues)} subtitle cues")
+            return cues
         except Exception as e:
             print(f"Subtitle overlay error: {e}")
-        return video
+            return []
+    
+    def _subtitle_overlay(self, text: str) -> StaticOverlay:
+        '''Subtitle image as a bottom-centered static overlay.'''
+        img = self._create_subtitle_image(text)
+        return StaticOverlay(img, position=((self.width - img.shape[1]) // 2, self.height - self._px(250)))
     
-    def _create_subtitle_image(self, text: str, max_width: int = 980) -> np.ndarray:
+    def _create_subtitle_image(self, text: str, max_width: int = None) -> np.ndarray:
         '''Create subtitle image with text.'''
-        font = self._get_font(38)
+        max_width = max_width or self._px(980)
+        font = self._get_font(self._px(38))
         temp = Image.new('RGB', (max_width, 500), 'black')
         draw = ImageDraw.Draw(temp)
         words, lines, cur = text.split(), [], []
         for w in words:
             test = ' '.join(cur + [w])
-            if draw.textbbox((0, 0), test, font=font)[2] <= max_width - 40:
+            if draw.textbbox((0, 0), test, font=font)[2] <= max_width - self._px(40):
                 cur.append(w)
             else:
                 if cur:
@@ -512,10 +607,11 @@ class MediaGenerator:
                 cur = [w]
         if cur:
             lines.append(' '.join(cur))
-        line_h, total_h = 48, len(lines) * 48 + 30
+        line_h = self._px(48)
+        total_h = len(lines) * line_h + self._px(30)
         img = Image.new('RGBA', (max_width, total_h), (0, 0, 0, 220))
         draw = ImageDraw.Draw(img)
-        y = 15
+        y = self._px(15)
         for line in lines:
             bbox = draw.textbbox((0, 0), line, font=font)
             x = (max_width - (bbox[2] - bbox[0])) // 2
@@ -525,35 +621,37 @@ class MediaGenerator:
         return np.array(img)
     
     def _get_font(self, size: int):
-        '''Get font with fallback.'''
-        for p in ['/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
-                  '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf']:
-            if os.path.exists(p):
-                return ImageFont.truetype(p, size)
-        return ImageFont.load_default()
-    
-    def _create_intro_clip(self, title: str, image_path: str, duration: float, template: str = None) -> VideoClip:
-        '''Create intro clip using PowerPoint template or fallback.'''
+        '''Get font with fallback (loaded once per size by the asset registry).'''
+        return self.assets.font(size)
+    
+    def _intro_image(self, title: str, image_path: str, template: str = None) -> np.ndarray:
+        '''Full-frame intro image (RGB) from the PowerPoint template or the fallback layout.'''
         if template and PPTX_AVAILABLE:
             try:
-                intro_array = self._render_pptx_template(template, title, image_path)
-                return ImageClip(intro_array, duration=duration)
+                return self._render_pptx_template(template, title, image_path)
             except Exception as e:
                 print(f"PowerPoint template error: {e}")
-        return self._create_fallback_intro(title, image_path, duration)
+        return self._prerendered(('intro', title, image_path, self.width, self.height),
+                                 lambda: self._fallback_intro_image(title, image_path))
     
-    def _create_intro_overlay(self, title: str, image_path: str, duration: float, template: str = None) -> VideoClip:
-        '''Create intro overlay for full video duration.'''
+    def _intro_overlay_image(self, title: str, image_path: str, template: str = None) -> np.ndarray:
+        '''Full-frame intro overlay (RGB for templates, RGBA for the fallback title band).'''
         if template and PPTX_AVAILABLE:
             try:
-                intro_array = self._render_pptx_template(template, title, image_path)
-                return ImageClip(intro_array, duration=duration).with_position(('center', 'center'))
+                return self._render_pptx_template(template, title, image_path)
             except Exception as e:
                 print(f"PowerPoint template error: {e}")
-        return self._create_fallback_intro_overlay(title, image_path, duration)
+        return self._prerendered(('intro_overlay', title, self.width, self.height),
+                                 lambda: self._fallback_overlay_image(title))
     
     def _render_pptx_template(self, template: str, title: str, image_path: str) -> np.ndarray:
-        '''Render PowerPoint template to numpy array.'''
+        '''Render PowerPoint template to numpy array (LibreOffice runs once per template/title/image).'''
+        slide = self._prerendered(('pptx', template, title, image_path),
+                                  lambda: self._convert_pptx_template(template, title, image_path))
+        return np.array(cover_crop(slide, (self.width, self.height)).convert('RGB'))
+    
+    def _convert_pptx_template(self, template: str, title: str, image_path: str) -> Image.Image:
+        '''Fill the template slide and convert it to an image with LibreOffice.'''
         prs = Presentation("templates/intro_template.pptx")
         slide_idx = 0
         try:
@@ -591,30 +689,28 @@ class MediaGenerator:
                          capture_output=True, timeout=120, check=True)
             base_name = os.path.splitext(os.path.basename(tmp_pptx))[0]
             png_path = os.path.join(output_dir, f"{base_name}.png")
-            img = Image.open(png_path).resize((self.width, self.height), Image.Resampling.LANCZOS)
-            result = np.array(img.convert('RGB'))
+            with Image.open(png_path) as img:
+                result = img.convert('RGB')
             os.unlink(png_path)
             os.rmdir(output_dir)
             return result
         finally:
             os.unlink(tmp_pptx)
     
-    def _create_fallback_intro(self, title: str, image_path: str, duration: float) -> VideoClip:
+    def _fallback_intro_image(self, title: str, image_path: str) -> np.ndarray:
         '''Fallback intro without PowerPoint.'''
-        img = Image.open(image_path).convert('RGB')
-        img = self._resize_image_full(img)
+        img = Image.fromarray(self.image_cache.cover(image_path, self.width, self.height))
         if os.path.exists('assets/tiktok_background.png'):
-            overlay = Image.open('assets/tiktok_background.png').convert('RGBA')
-            overlay = overlay.resize((self.width, self.height), Image.Resampling.LANCZOS)
-            img = Image.alpha_composite(img.convert('RGBA'), overlay)
+            overlay = self.assets.overlay('assets/tiktok_background.png', (self.width, self.height))
+            img = Image.alpha_composite(img.convert('RGBA'), Image.fromarray(overlay))
         else:
             img = img.convert('RGBA')
         draw = ImageDraw.Draw(img)
-        font = self._get_font(48)
+        font = self._get_font(self._px(48))
         words, lines, cur = title.split(), [], []
         for w in words:
             test = ' '.join(cur + [w])
-            if draw.textbbox((0, 0), test, font=font)[2] <= self.width - 120:
+            if draw.textbbox((0, 0), test, font=font)[2] <= self.width - self._px(120):
                 cur.append(w)
             else:
                 if cur:
@@ -622,23 +718,23 @@ class MediaGenerator:
                 cur = [w]
         if cur:
             lines.append(' '.join(cur))
-        y = self.height // 2 + 200
+        y = self.height // 2 + self._px(200)
         for line in lines:
-            draw.text((60, y), line, font=font, fill='white')
-            y += 60
-        return ImageClip(np.array(img.convert('RGB')), duration=duration)
+            draw.text((self._px(60), y), line, font=font, fill='white')
+            y += self._px(60)
+        return np.array(img.convert('RGB'))
     
-    def _create_fallback_intro_overlay(self, title: str, image_path: str, duration: float) -> VideoClip:
+    def _fallback_overlay_image(self, title: str) -> np.ndarray:
         '''Fallback intro overlay with semi-transparent background.'''
         img = Image.new('RGBA', (self.width, self.height), (0, 0, 0, 0))
-        overlay_bg = Image.new('RGBA', (self.width, 300), (0, 0, 0, 180))
+        overlay_bg = Image.new('RGBA', (self.width, self._px(300)), (0, 0, 0, 180))
         img.paste(overlay_bg, (0, 0))
         draw = ImageDraw.Draw(img)
-        font = self._get_font(48)
+        font = self._get_font(self._px(48))
         words, lines, cur = title.split(), [], []
         for w in words:
             test = ' '.join(cur + [w])
-            if draw.textbbox((0, 0), test, font=font)[2] <= self.width - 120:
+            if draw.textbbox((0, 0), test, font=font)[2] <= self.width - self._px(120):
                 cur.append(w)
             else:
                 if cur:
@@ -646,23 +742,8 @@ class MediaGenerator:
                 cur = [w]
         if cur:
             lines.append(' '.join(cur))
-        y = 60
+        y = self._px(60)
         for line in lines:
-            draw.text((60, y), line, font=font, fill='white')
-            y += 60
-        return ImageClip(np.array(img), duration=duration).with_position(('center', 'top'))
-    
-    def _resize_image_full(self, img: Image.Image) -> Image.Image:
-        '''Resize image to fill screen.'''
-        ratio, target = img.width / img.height, self.width / self.height
-        if ratio > target:
-            nh, nw = self.height, int(self.height * ratio)
-            img = img.resize((nw, nh), Image.Resampling.LANCZOS)
-            left = (nw - self.width) // 2
-            img = img.crop((left, 0, left + self.width, self.height))
-        else:
-            nw, nh = self.width, int(self.width / ratio)
-            img = img.resize((nw, nh), Image.Resampling.LANCZOS)
-            top = (nh - self.height) // 2
-            img = img.crop((0, top, self.width, top + self.height))
-        return img
+            draw.text((self._px(60), y), line, font=font, fill='white')
+            y += self._px(60)
+        return np.array(img)
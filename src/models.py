@@ -0,0 +1,229 @@
+"""
+Models Module - Memory-budgeted registry for the pipeline's ML models.
+
+The corrector, TTS and Whisper models are used in separate pipeline stages.
+The registry loads each model on first use, measures its footprint, and
+before each stage offloads (GPU → CPU) or unloads (back to disk) models the
+stage does not need whenever keeping them would exceed the memory budget.
+A model that fails to load is not retried until reload() is called.
+"""
+import gc
+import os
+import time
+import resource
+import threading
+from typing import Callable, Dict, Iterable
+
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+
+# Extra working memory each stage needs beyond its models (encoder buffers, frames, audio)
+STAGE_HEADROOM = {
+    'correct': 256 * 1024**2,
+    'tts': 512 * 1024**2,
+    'subtitles': 512 * 1024**2,
+    'compose': 2 * 1024**3,
+}
+
+
+def current_rss() -> int:
+    '''Resident set size of this process in bytes.'''
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return peak_rss()
+
+
+def peak_rss() -> int:
+    '''Peak resident set size of this process in bytes.'''
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _modules(obj) -> list:
+    '''torch modules held directly or one level inside a tuple/list/object.'''
+    if not TORCH_AVAILABLE:
+        return []
+    if isinstance(obj, torch.nn.Module):
+        return [obj]
+    items = obj if isinstance(obj, (tuple, list)) else list(getattr(obj, '__dict__', {}).values())
+    return [m for m in items if isinstance(m, torch.nn.Module)]
+
+
+def module_bytes(obj) -> int:
+    '''Parameter and buffer bytes of the torch modules in obj.'''
+    total = 0
+    for module in _modules(obj):
+        for t in list(module.parameters()) + list(module.buffers()):
+            total += t.numel() * t.element_size()
+    return total
+
+
+class _Entry:
+    '''Registry bookkeeping for one model.'''
+
+    def __init__(self, name: str, loader: Callable, stages: Iterable[str]):
+        self.name = name
+        self.loader = loader
+        self.stages = set(stages)
+        self.obj = None
+        self.footprint = 0
+        self.device = None
+        self.last_used = 0.0
+        self.loads = 0
+        # Set when the loader failed: None (loader returned None) or the exception it raised
+        self.failed = False
+        self.error = None
+
+
+class ModelRegistry:
+    '''
+    Loads, offloads and unloads models against a memory budget.
+
+    Responsibilities:
+    - Lazily load registered models and record their footprint
+    - Free models the upcoming stage does not need when over budget
+    - Remember load failures instead of retrying on every use
+    - Report resident model memory and peak process RSS
+    '''
+
+    def __init__(self, budget_bytes: int = None, offload_gpu: bool = False):
+        '''
+        Initialize the registry.
+
+        Args:
+            budget_bytes: Host memory budget for resident models plus stage headroom (None = keep everything)
+            offload_gpu: Move idle GPU models to CPU before each stage to free VRAM
+        '''
+        self.budget = budget_bytes
+        self.offload_gpu = offload_gpu
+        self.entries: Dict[str, _Entry] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, loader: Callable, stages: Iterable[str]):
+        '''
+        Register a model; a name that is already registered keeps its entry.
+
+        Generators sharing one registry (JobService workers) all register the
+        same models, so the first registration's loader is used and every
+        generator gets the same loaded object.
+
+        Args:
+            name: Model name
+            loader: Callable returning the loaded model object (or None on failure)
+            stages: Pipeline stages that use the model
+        '''
+        with self._lock:
+            if name not in self.entries:
+                self.entries[name] = _Entry(name, loader, stages)
+
+    def get(self, name: str):
+        '''
+        Return the model, loading (or moving back to GPU) if needed.
+
+        Returns None if the loader returned None; raises RuntimeError if it raised.
+        Either failure is remembered and returned again until reload(name).
+        '''
+        with self._lock:
+            entry = self.entries[name]
+            if entry.failed:
+                if entry.error is not None:
+                    raise RuntimeError(f"{name} failed to load: {entry.error}") from entry.error
+                return None
+            if entry.obj is None:
+                rss_before = current_rss()
+                gpu_before = torch.cuda.memory_allocated() if TORCH_AVAILABLE and torch.cuda.is_available() else 0
+                try:
+                    entry.obj = entry.loader()
+                except Exception as e:
+                    entry.failed, entry.error = True, e
+                    raise
+                if entry.obj is None:
+                    entry.failed = True
+                    return None
+                gpu_after = torch.cuda.memory_allocated() if TORCH_AVAILABLE and torch.cuda.is_available() else 0
+                entry.footprint = max(module_bytes(entry.obj), max(0, current_rss() - rss_before) + gpu_after - gpu_before)
+                entry.device = self._device(entry.obj)
+                entry.loads += 1
+            elif entry.device == 'offloaded':
+                self._to(entry, 'cuda')
+            entry.last_used = time.monotonic()
+            return entry.obj
+
+    def loaded(self, name: str) -> bool:
+        return self.entries[name].obj is not None
+
+    def reload(self, name: str):
+        '''Forget a load failure (or drop the loaded model) and load again.'''
+        with self._lock:
+            entry = self.entries[name]
+            entry.failed, entry.error = False, None
+            self.unload(name)
+            return self.get(name)
+
+    def prepare(self, stage: str):
+        '''Offload/unload models not used by the upcoming stage until it fits the budget.'''
+        with self._lock:
+            idle = sorted((e for e in self.entries.values() if e.obj is not None and stage not in e.stages),
+                          key=lambda e: e.last_used)
+            if self.offload_gpu:
+                for entry in idle:
+                    if entry.device == 'cuda':
+                        self._to(entry, 'cpu')
+                        entry.device = 'offloaded'
+            if self.budget is None:
+                return
+            need = STAGE_HEADROOM.get(stage, 0) + sum(
+                e.footprint for e in self.entries.values() if stage in e.stages and e.obj is None)
+            for entry in idle:
+                if self.resident_bytes() + need <= self.budget:
+                    break
+                self.unload(entry.name)
+
+    def unload(self, name: str):
+        '''Drop a model so it is reloaded from disk on next use.'''
+        with self._lock:
+            entry = self.entries[name]
+            if entry.obj is None:
+                return
+            entry.obj, entry.device = None, None
+            gc.collect()
+            if TORCH_AVAILABLE and torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            print(f"   ✓ Unloaded {name} ({entry.footprint / 1024**2:.0f} MB)")
+
+    def resident_bytes(self) -> int:
+        '''Host-memory footprint of loaded models (GPU-resident weights excluded).'''
+        return sum(e.footprint for e in self.entries.values() if e.obj is not None and e.device != 'cuda')
+
+    def report(self) -> Dict:
+        '''Footprints, load counts and process memory.'''
+        return {
+            'models': {e.name: {'loaded': e.obj is not None, 'device': e.device,
+                                'footprint_mb': round(e.footprint / 1024**2), 'loads': e.loads,
+                                'failed': e.failed}
+                       for e in self.entries.values()},
+            'resident_mb': round(self.resident_bytes() / 1024**2),
+            'rss_mb': round(current_rss() / 1024**2),
+            'peak_rss_mb': round(peak_rss() / 1024**2),
+        }
+
+    @staticmethod
+    def _device(obj) -> str:
+        for module in _modules(obj):
+            for p in module.parameters():
+                return 'cuda' if p.is_cuda else 'cpu'
+        return 'cpu'
+
+    @staticmethod
+    def _to(entry: _Entry, device: str):
+        for module in _modules(entry.obj):
+            module.to(device)
+        if device == 'cuda':
+            entry.device = 'cuda'
+        elif TORCH_AVAILABLE and torch.cuda.is_available():
+            torch.cuda.empty_cache()
@@ -0,0 +1,387 @@
+"""
+ONNX Corrector Module - int8 ONNX Runtime backend for the protonx text corrector.
+
+The PyTorch seq2seq corrector is slow on CPU-only workers. This module
+exports it to ONNX as three graphs (encoder, first decoder step, decoder step
+with KV cache), applies int8 dynamic quantization, and runs beam search in
+NumPy on ONNX Runtime, reusing the self-attention cache between steps and
+computing cross-attention keys/values once per input. NewsProcessor picks it
+up automatically when an exported model is cached.
+
+Usage:
+    python src/onnxcorrector.py export
+    python src/onnxcorrector.py verify --fixtures tests/fixtures/corrector_sentences.txt
+    python src/onnxcorrector.py benchmark --runs 3
+"""
+import os
+import json
+import time
+import inspect
+import argparse
+import difflib
+import numpy as np
+from typing import Dict, List
+
+try:
+    import onnxruntime as ort
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+
+SOURCE_MODEL = "models/protonx-legal-tc" if os.path.exists("models/protonx-legal-tc") else "protonx-models/protonx-legal-tc"
+EXPORT_DIR = "models/protonx-legal-tc-onnx"
+KV_NAMES = ('self_key', 'self_value', 'cross_key', 'cross_value')
+
+# Sentences with the errors the corrector is used for (missing diacritics, typos)
+FIXTURES = [
+    "Thu tuong chinh phu da ky quyet dinh phe duyet du an cao toc Bac Nam.",
+    "Gia vang trong nuoc hom nay tang manh theo da the gioi.",
+    "Ngan hang nha nuoc dieu chinh lai suat dieu hanh tu ngay mai.",
+    "Cong an thanh pho đã bat giu hai doi tuong lien quan den vu viec.",
+    "Bộ Giáo dục công bố lịch thi tôt nghiệp trung hoc phổ thông năm nay.",
+    "Nhieu tuyen duong o Ha Noi bi ngap sau tran mua lon chieu qua.",
+]
+
+
+def is_exported(export_dir: str = EXPORT_DIR) -> bool:
+    '''Whether an exported model is cached in export_dir.'''
+    return os.path.exists(os.path.join(export_dir, 'export.json'))
+
+
+def export(model_path: str = SOURCE_MODEL, export_dir: str = EXPORT_DIR, quantize: bool = True,
+           opset: int = 14) -> Dict:
+    '''
+    Export the seq2seq corrector to ONNX (optionally int8-quantized).
+
+    Args:
+        model_path: Hugging Face model id or local directory
+        export_dir: Output directory (tokenizer and export.json are saved alongside)
+        quantize: Apply int8 dynamic quantization to the weights
+        opset: ONNX opset version
+
+    Returns:
+        Export metadata
+    '''
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+    os.makedirs(export_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path).eval()
+    config = model.config
+    layers = config.num_decoder_layers if hasattr(config, 'num_decoder_layers') else config.decoder_layers
+
+    class Encoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    class Decoder(torch.nn.Module):
+        '''One decoder step; with_past takes and returns the flattened KV cache.'''
+
+        def __init__(self, with_past: bool):
+            super().__init__()
+            self.model = model
+            self.with_past = with_past
+
+        def forward(self, decoder_input_ids, encoder_hidden_states, attention_mask, *past):
+            cache = tuple(tuple(past[i * 4:(i + 1) * 4]) for i in range(layers)) if self.with_past else None
+            out = self.model(encoder_outputs=(encoder_hidden_states,), attention_mask=attention_mask,
+                             decoder_input_ids=decoder_input_ids, past_key_values=cache, use_cache=True, return_dict=True)
+            # Cross-attention keys/values do not change after the first step
+            kept = 4 if not self.with_past else 2
+            return (out.logits,) + tuple(t for layer in out.past_key_values for t in layer[:kept])
+
+    sample = tokenizer(FIXTURES[0], return_tensors='pt')
+    start = torch.tensor([[config.decoder_start_token_id]])
+    with torch.no_grad():
+        hidden = Encoder()(sample['input_ids'], sample['attention_mask'])
+        first = Decoder(False)(start, hidden, sample['attention_mask'])
+
+    past_names = [f"past.{i}.{k}" for i in range(layers) for k in KV_NAMES]
+    present_all = [f"present.{i}.{k}" for i in range(layers) for k in KV_NAMES]
+    present_self = [f"present.{i}.{k}" for i in range(layers) for k in KV_NAMES[:2]]
+    batch, enc = {0: 'batch'}, {0: 'batch', 1: 'encoder_sequence'}
+    kv_axes = {name: {0: 'batch', 2: 'past_sequence' if 'self' in name else 'encoder_sequence'} for name in past_names}
+    # Keep the TorchScript exporter on torch versions where dynamo export is the default
+    legacy = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+
+    graphs = {
+        'encoder': (Encoder(), (sample['input_ids'], sample['attention_mask']),
+                    ['input_ids', 'attention_mask'], ['last_hidden_state'],
+                    {'input_ids': enc, 'attention_mask': enc, 'last_hidden_state': enc}),
+        'decoder': (Decoder(False), (start, hidden, sample['attention_mask']),
+                    ['decoder_input_ids', 'encoder_hidden_states', 'attention_mask'], ['logits'] + present_all,
+                    {'decoder_input_ids': batch, 'encoder_hidden_states': enc, 'attention_mask': enc, 'logits': batch,
+                     **{n: {0: 'batch', 2: 'encoder_sequence'} for n in present_all if 'cross' in n},
+                     **{n: batch for n in present_all if 'self' in n}}),
+        'decoder_with_past': (Decoder(True), (start, hidden, sample['attention_mask'], *first[1:]),
+                              ['decoder_input_ids', 'encoder_hidden_states', 'attention_mask'] + past_names,
+                              ['logits'] + present_self,
+                              {'decoder_input_ids': batch, 'encoder_hidden_states': enc, 'attention_mask': enc,
+                               'logits': batch, **kv_axes,
+                               **{n: {0: 'batch', 2: 'past_sequence_plus_one'} for n in present_self}}),
+    }
+    files = {}
+    for name, (module, args, inputs, outputs, axes) in graphs.items():
+        path = os.path.join(export_dir, f"{name}.onnx")
+        with torch.no_grad():
+            torch.onnx.export(module, args, path, input_names=inputs, output_names=outputs,
+                              dynamic_axes=axes, opset_version=opset, do_constant_folding=True, **legacy)
+        if quantize:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantized = os.path.join(export_dir, f"{name}.int8.onnx")
+            quantize_dynamic(path, quantized, weight_type=QuantType.QInt8)
+            os.remove(path)
+            path = quantized
+        files[name] = os.path.basename(path)
+        print(f"   ✓ Exported {name} ({os.path.getsize(path) / 1024**2:.0f} MB)")
+
+    tokenizer.save_pretrained(export_dir)
+    meta = {'source': model_path, 'quantized': quantize, 'layers': layers, 'files': files,
+            'decoder_start_token_id': config.decoder_start_token_id, 'eos_token_id': config.eos_token_id,
+            'vocab_size': first[0].shape[-1], 'created': time.time()}
+    with open(os.path.join(export_dir, 'export.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    print(f"✓ Corrector exported to {export_dir} ({'int8' if quantize else 'fp32'})")
+    return meta
+
+
+def _log_softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    return shifted - np.log(np.exp(shifted).sum(axis=-1, keepdims=True))
+
+
+class OnnxCorrector:
+    '''
+    ONNX Runtime seq2seq model with a NumPy beam search.
+
+    Responsibilities:
+    - Load exported encoder/decoder graphs into ORT sessions
+    - Run beam search with a KV cache (cross-attention computed once)
+    - Expose generate() compatible with how NewsProcessor calls the PyTorch model
+    '''
+
+    def __init__(self, export_dir: str = EXPORT_DIR, threads: int = None):
+        '''
+        Load an exported model.
+
+        Args:
+            export_dir: Directory written by export()
+            threads: ORT intra-op threads (default: ORT's choice)
+        '''
+        if not ORT_AVAILABLE:
+            raise RuntimeError("onnxruntime is not installed")
+        with open(os.path.join(export_dir, 'export.json')) as f:
+            self.meta = json.load(f)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.sessions = {name: ort.InferenceSession(os.path.join(export_dir, file), options,
+                                                    providers=['CPUExecutionProvider'])
+                         for name, file in self.meta['files'].items()}
+        self.layers = self.meta['layers']
+        self.start_id = self.meta['decoder_start_token_id']
+        self.eos_id = self.meta['eos_token_id']
+        self._past = [f"past.{i}.{k}" for i in range(self.layers) for k in KV_NAMES]
+
+    def generate(self, input_ids, attention_mask=None, num_beams: int = 10, max_new_tokens: int = 160,
+                 early_stopping: bool = True, length_penalty: float = 1.0, **_) -> np.ndarray:
+        '''
+        Beam search for a single input sequence.
+
+        Args:
+            input_ids: Token ids (1 x seq; torch tensor or array)
+            attention_mask: Attention mask (default: all ones)
+            num_beams: Beam width
+            max_new_tokens: Maximum generated tokens
+            early_stopping: Stop once num_beams hypotheses are finished
+            length_penalty: Exponent of the length normalization of finished scores
+
+        Returns:
+            Array of shape (1, length) with the best sequence (decoder start token first)
+        '''
+        input_ids = np.asarray(input_ids.cpu() if hasattr(input_ids, 'cpu') else input_ids, dtype=np.int64)
+        mask = np.ones_like(input_ids) if attention_mask is None else np.asarray(
+            attention_mask.cpu() if hasattr(attention_mask, 'cpu') else attention_mask, dtype=np.int64)
+        hidden = self.sessions['encoder'].run(None, {'input_ids': input_ids, 'attention_mask': mask})[0]
+
+        outputs = self.sessions['decoder'].run(None, {
+            'decoder_input_ids': np.array([[self.start_id]], dtype=np.int64),
+            'encoder_hidden_states': hidden, 'attention_mask': mask})
+        logprobs = _log_softmax(outputs[0][:, -1].astype(np.float32))
+        # Every beam shares the encoder output and cross-attention cache
+        past = [np.repeat(t, num_beams, axis=0) for t in outputs[1:]]
+        hidden, mask = np.repeat(hidden, num_beams, axis=0), np.repeat(mask, num_beams, axis=0)
+
+        sequences = np.full((num_beams, 1), self.start_id, dtype=np.int64)
+        beam_scores = np.zeros(num_beams, dtype=np.float32)
+        finished = []
+        for step in range(max_new_tokens):
+            vocab = logprobs.shape[-1]
+            totals = (beam_scores[:, None] + logprobs) if step else logprobs[:1]
+            flat = totals.reshape(-1)
+            candidates = np.argpartition(-flat, 2 * num_beams)[:2 * num_beams]
+            candidates = candidates[np.argsort(-flat[candidates], kind='stable')]
+
+            beams, tokens, scores = [], [], []
+            for rank, index in enumerate(candidates):
+                beam, token = divmod(int(index), vocab)
+                if token == self.eos_id:
+                    if rank < num_beams:
+                        length = sequences.shape[1] + 1
+                        finished.append((float(flat[index]) / length ** length_penalty,
+                                         np.append(sequences[beam], token)))
+                    continue
+                beams.append(beam)
+                tokens.append(token)
+                scores.append(flat[index])
+                if len(beams) == num_beams:
+                    break
+            if early_stopping and len(finished) >= num_beams:
+                break
+
+            order = np.array(beams)
+            sequences = np.concatenate([sequences[order], np.array(tokens, dtype=np.int64)[:, None]], axis=1)
+            beam_scores = np.array(scores, dtype=np.float32)
+            for i in range(self.layers):
+                # Reorder the self-attention cache to follow the surviving beams
+                past[4 * i] = past[4 * i][order]
+                past[4 * i + 1] = past[4 * i + 1][order]
+            if step == max_new_tokens - 1:
+                break
+
+            feed = {'decoder_input_ids': sequences[:, -1:], 'encoder_hidden_states': hidden, 'attention_mask': mask}
+            feed.update(zip(self._past, past))
+            outputs = self.sessions['decoder_with_past'].run(None, feed)
+            logprobs = _log_softmax(outputs[0][:, -1].astype(np.float32))
+            for i in range(self.layers):
+                past[4 * i], past[4 * i + 1] = outputs[1 + 2 * i], outputs[2 + 2 * i]
+
+        if len(finished) < num_beams:
+            length = sequences.shape[1]
+            finished.extend((float(s) / length ** length_penalty, seq) for s, seq in zip(beam_scores, sequences))
+        best = max(finished, key=lambda f: f[0])[1]
+        return best[None, :]
+
+
+def _correct(tokenizer, model, sentence: str, to_device=None) -> str:
+    '''Correct one sentence with the same settings as NewsProcessor._run_corrector.'''
+    inputs = tokenizer(sentence, return_tensors="pt", truncation=True, max_length=160)
+    if to_device:
+        inputs = inputs.to(to_device)
+    outputs = model.generate(**inputs, num_beams=10, max_new_tokens=160, early_stopping=True)
+    return tokenizer.decode(outputs[0], skip_special_tokens=True)
+
+
+def _load_reference(model_path: str):
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path).eval()
+    torch.set_grad_enabled(False)
+    return tokenizer, model
+
+
+def verify(sentences: List[str] = None, model_path: str = SOURCE_MODEL, export_dir: str = EXPORT_DIR,
+           min_similarity: float = 0.97, min_sentence_similarity: float = 0.9) -> Dict:
+    '''
+    Compare ONNX and PyTorch corrections on fixture sentences.
+
+    int8 weights can change a beam's ranking, so outputs are compared by
+    exact match and by character similarity rather than required identical.
+    The check passes when the mean similarity reaches min_similarity and no
+    single sentence falls below min_sentence_similarity.
+
+    Returns:
+        Dict with exact-match count, mean/min similarity, mismatches and a pass flag
+    '''
+    sentences = sentences or FIXTURES
+    tokenizer, reference = _load_reference(model_path)
+    onnx_model = OnnxCorrector(export_dir)
+    rows = []
+    for sentence in sentences:
+        expected = _correct(tokenizer, reference, sentence)
+        actual = _correct(tokenizer, onnx_model, sentence)
+        rows.append({'input': sentence, 'torch': expected, 'onnx': actual,
+                     'similarity': difflib.SequenceMatcher(None, expected, actual, autojunk=False).ratio()})
+    similarities = [r['similarity'] for r in rows]
+    result = {'sentences': len(rows), 'exact': sum(r['torch'] == r['onnx'] for r in rows),
+              'mean_similarity': round(float(np.mean(similarities)), 4),
+              'min_similarity': round(float(np.min(similarities)), 4),
+              'mismatches': [r for r in rows if r['torch'] != r['onnx']]}
+    result['passed'] = (result['mean_similarity'] >= min_similarity
+                        and result['min_similarity'] >= min_sentence_similarity)
+    print(f"{'✓' if result['passed'] else '❌'} {result['exact']}/{result['sentences']} identical, "
+          f"mean similarity {result['mean_similarity']}, min {result['min_similarity']}")
+    for r in result['mismatches']:
+        print(f"   torch: {r['torch']}\n   onnx:  {r['onnx']}")
+    return result
+
+
+def benchmark(sentences: List[str] = None, model_path: str = SOURCE_MODEL, export_dir: str = EXPORT_DIR,
+              runs: int = 3) -> Dict:
+    '''
+    Per-sentence CPU latency of the PyTorch and ONNX correctors.
+
+    Returns:
+        Mean and p95 milliseconds for each backend and the speedup
+    '''
+    sentences = sentences or FIXTURES
+    tokenizer, reference = _load_reference(model_path)
+    backends = {'torch': reference, 'onnx': OnnxCorrector(export_dir)}
+    results = {}
+    for name, model in backends.items():
+        _correct(tokenizer, model, sentences[0])
+        timings = []
+        for _ in range(runs):
+            for sentence in sentences:
+                start = time.perf_counter()
+                _correct(tokenizer, model, sentence)
+                timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {'mean_ms': round(float(np.mean(timings)), 1),
+                         'p95_ms': round(float(np.percentile(timings, 95)), 1)}
+        print(f"   {name:<6} {results[name]['mean_ms']:8.1f} ms mean  {results[name]['p95_ms']:8.1f} ms p95")
+    results['speedup'] = round(results['torch']['mean_ms'] / results['onnx']['mean_ms'], 2)
+    print(f"✓ ONNX speedup: {results['speedup']}x")
+    return results
+
+
+def _read_fixtures(path: str) -> List[str]:
+    if not path:
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main():
+    '''CLI entry point.'''
+    parser = argparse.ArgumentParser(description='Export, verify and benchmark the ONNX text corrector')
+    parser.add_argument('--model', type=str, default=SOURCE_MODEL, help='PyTorch corrector (HF id or path)')
+    parser.add_argument('--dir', type=str, default=EXPORT_DIR, help='Exported model directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+    exp = sub.add_parser('export', help='Export to ONNX')
+    exp.add_argument('--fp32', action='store_true', help='Skip int8 quantization')
+    for name in ('verify', 'benchmark'):
+        cmd = sub.add_parser(name, help=f"{name.capitalize()} against the PyTorch model")
+        cmd.add_argument('--fixtures', type=str, help='Text file with one sentence per line')
+        if name == 'benchmark':
+            cmd.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export(args.model, args.dir, quantize=not args.fp32)
+    elif args.command == 'verify':
+        result = verify(_read_fixtures(args.fixtures), args.model, args.dir)
+        raise SystemExit(0 if result['passed'] else 1)
+    else:
+        benchmark(_read_fixtures(args.fixtures), args.model, args.dir, args.runs)
+
+
+if __name__ == "__main__":
+    main()
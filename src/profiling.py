@@ -0,0 +1,229 @@
+"""
+Profiling Module - Per-stage profiles and flamegraph stacks for slow renders.
+
+With --profile, every pipeline stage (crawl, summarize, refine, tts,
+subtitles, compose, ...) runs under two profilers:
+
+- cProfile (deterministic, calling thread) dumped per stage as
+  <stage>.prof for pstats/snakeviz
+- a sampling thread that walks the stacks of all threads at a fixed
+  interval and writes them in collapsed-stack form ("stage;thread;f;g 42"),
+  which flamegraph.pl, speedscope and inferno render directly
+
+Nothing is installed when profiling is off; the pipeline only checks for a
+profiler at stage boundaries.
+
+Usage (re-summarize a previous profile):
+    python src/profiling.py output/profiles/20250101_120000/stacks.collapsed --top 20
+"""
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List
+
+# Functions called out in the report when they show up in samples
+HOT_FUNCTIONS = ['make_frame', 'render_into', '_create_subtitle_image', 'generate', 'synthesize',
+                 'transcribe', 'correct_text']
+
+
+def _label(code) -> str:
+    '''Flamegraph frame label: function (file).'''
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+class StageProfiler:
+    '''
+    Profiles pipeline stages and writes per-stage and collapsed-stack outputs.
+
+    Responsibilities:
+    - Switch profiles when the pipeline reports a new stage
+    - Accumulate repeated stages (batch runs) into one profile per stage
+    - Sample all threads' stacks into collapsed-stack counts
+    - Report wall time per stage and the hottest functions
+    '''
+
+    def __init__(self, output_dir: str = 'output/profiles', interval: float = 0.005,
+                 hot_functions: List[str] = None):
+        '''
+        Initialize the profiler (sampling starts with the first stage).
+
+        Args:
+            output_dir: Parent directory; each run writes a timestamped subdirectory
+            interval: Sampling interval in seconds
+            hot_functions: Function names to call out in the report (default: HOT_FUNCTIONS)
+        '''
+        self.output_dir = os.path.join(output_dir, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        self.interval = interval
+        self.hot_functions = hot_functions or HOT_FUNCTIONS
+        self.stacks = Counter()
+        self.wall: Dict[str, float] = {}
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._stage = None
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def stage(self, name: str):
+        '''Start profiling stage name, ending the current one ('rendered' just ends it).'''
+        self._end_stage()
+        if name == 'rendered':
+            return
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample, name='stage-profiler', daemon=True)
+            self._sampler.start()
+        profile = self._profiles.setdefault(name, cProfile.Profile())
+        self._stage, self._started = name, time.perf_counter()
+        try:
+            profile.enable()
+        except ValueError:
+            pass  # another profiler is active on this thread; rely on sampling
+
+    def _end_stage(self):
+        if self._stage is None:
+            return
+        self._profiles[self._stage].disable()
+        self.wall[self._stage] = self.wall.get(self._stage, 0.0) + time.perf_counter() - self._started
+        self._stage = None
+
+    def _sample(self):
+        '''Sampling loop: record every other thread's stack under the current stage.'''
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stage = self._stage
+            if stage is None:
+                continue
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[';'.join([stage, names.get(ident, f'thread-{ident}')] + frames[::-1])] += 1
+
+    def finish(self) -> dict:
+        '''
+        Stop profiling, write outputs and print the report.
+
+        Returns:
+            Summary dict (also written as summary.json), or {} if no stage ran
+        '''
+        self._end_stage()
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        if not self._profiles:
+            return {}
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        for name, profile in self._profiles.items():
+            profile.dump_stats(os.path.join(self.output_dir, f"{name}.prof"))
+        collapsed = os.path.join(self.output_dir, 'stacks.collapsed')
+        with open(collapsed, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        summary = hot_functions(self.stacks, self.hot_functions)
+        summary['wall_seconds'] = {k: round(v, 2) for k, v in self.wall.items()}
+        summary['stage_profiles'] = {name: _top_cumulative(profile) for name, profile in self._profiles.items()}
+        with open(os.path.join(self.output_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        print(f"\n🔬 Profile: {self.output_dir}")
+        for name, seconds in sorted(self.wall.items(), key=lambda kv: -kv[1]):
+            print(f"   {name:<10} {seconds:8.2f}s")
+        print_report(summary)
+        print(f"   ✓ Flamegraph stacks: {collapsed} (flamegraph.pl / speedscope)")
+        return summary
+
+
+def _top_cumulative(profile: cProfile.Profile, top: int = 10) -> List[dict]:
+    '''Top functions of a deterministic profile by cumulative time.'''
+    try:
+        stats = pstats.Stats(profile)
+    except TypeError:
+        return []  # stage never enabled the profiler
+    rows = sorted(stats.stats.items(), key=lambda kv: -kv[1][3])[:top]
+    return [{'function': f"{func} ({os.path.basename(path)}:{line})", 'calls': calls,
+             'cumulative_s': round(cumulative, 3)}
+            for (path, line, func), (_, calls, _, cumulative, _) in rows]
+
+
+def hot_functions(stacks: Counter, highlight: List[str] = None, top: int = 15) -> dict:
+    '''
+    Aggregate collapsed stacks into self/inclusive sample shares per function.
+
+    Args:
+        stacks: Collapsed stack -> sample count ("stage;thread;frame;...")
+        highlight: Function names to report even if they are not in the top list
+        top: Number of functions by self samples
+
+    Returns:
+        Dict with total samples, top functions and highlighted functions
+    '''
+    total = sum(stacks.values())
+    own, inclusive = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')[2:]
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+
+    def share(n):
+        return round(100 * n / total, 1) if total else 0.0
+
+    highlighted = {}
+    for name in highlight or []:
+        matches = [frame for frame in inclusive if frame.split(' (')[0] == name]
+        for frame in matches:
+            highlighted[frame] = {'inclusive_percent': share(inclusive[frame]), 'self_percent': share(own[frame])}
+    return {
+        'samples': total,
+        'top_self': [{'function': frame, 'self_percent': share(n), 'inclusive_percent': share(inclusive[frame])}
+                     for frame, n in own.most_common(top)],
+        'highlighted': highlighted,
+    }
+
+
+def print_report(summary: dict):
+    '''Print the hot-function tables of a summary.'''
+    print(f"   Hottest functions ({summary['samples']} samples, self / inclusive):")
+    for row in summary['top_self']:
+        print(f"   {row['self_percent']:5.1f}% {row['inclusive_percent']:5.1f}%  {row['function']}")
+    if summary['highlighted']:
+        print("   Watched functions (inclusive / self):")
+        for frame, row in sorted(summary['highlighted'].items(), key=lambda kv: -kv[1]['inclusive_percent']):
+            print(f"   ⚠ {row['inclusive_percent']:5.1f}% {row['self_percent']:5.1f}%  {frame}")
+
+
+def load_collapsed(path: str) -> Counter:
+    '''Read a collapsed-stack file back into counts.'''
+    stacks = Counter()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Summarize a collapsed-stack profile')
+    parser.add_argument('collapsed', help='stacks.collapsed written by --profile')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--stage', type=str, help='Only count samples from this stage')
+    args = parser.parse_args()
+    stacks = load_collapsed(args.collapsed)
+    if args.stage:
+        stacks = Counter({k: v for k, v in stacks.items() if k.split(';', 1)[0] == args.stage})
+    print_report(hot_functions(stacks, HOT_FUNCTIONS, args.top))
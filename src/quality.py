@@ -0,0 +1,207 @@
+"""
+Quality Module - Fast per-sentence checks for Vietnamese text.
+
+Most LLM-produced sentences are already clean, so the expensive correction
+passes (seq2seq corrector, LLM refiner) only need to see the sentences that
+look wrong: missing diacritics, syllables that are not valid Vietnamese, or
+spacing anomalies such as merged words.
+
+A typo that drops one tone mark often still spells a real syllable ("dung"
+for "dụng"), so syllable checks alone miss it. The lexicon (models/vi_lexicon.txt)
+lists known syllables, which then replace the phonotactic check, and common
+words, so "sử dung" is caught as "sử dụng" with a missing mark.
+
+Usage:
+    python src/quality.py check article.txt     # flagged sentences and why
+    python src/quality.py unknown article.txt   # syllables missing from the lexicon
+"""
+import os
+import re
+import argparse
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Set
+
+LEXICON_PATH = "models/vi_lexicon.txt"
+
+# Tone marks (grave, acute, tilde, hook above, dot below); vowel marks (breve,
+# circumflex, horn) are part of the letter and kept
+TONE_MARKS = {'̀', '́', '̃', '̉', '̣'}
+# Syllables ending in a stop (c, ch, p, t) only take the acute or dot-below tone
+STOP_TONES = {'́', '̣'}
+
+_SYLLABLE = re.compile(
+    r'^(ngh|ng|nh|ch|gh|gi|kh|ph|th|tr|qu|[bcdđghklmnprstvx])?'
+    r'[aăâeêioôơuưy]{1,3}'
+    r'(ch|ng|nh|[cmnpt])?$')
+_STOP_FINAL = re.compile(r'(c|ch|p|t)$')
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+_SENTENCE = re.compile(r'(?<=[.!?])\s+')
+_SPACING = [
+    (re.compile(r'[,;:](?=[^\s\d"\'”)])'), 'no space after punctuation'),
+    (re.compile(r'[a-zàáảãạăắằẳẵặâấầẩẫậèéẻẽẹêếềểễệìíỉĩịòóỏõọôốồổỗộơớờởỡợùúủũụưứừửữựỳýỷỹỵđ]'
+                r'[A-ZÀÁẢÃẠĂẮẰẲẴẶÂẤẦẨẪẬÈÉẺẼẸÊẾỀỂỄỆÌÍỈĨỊÒÓỎÕỌÔỐỒỔỖỘƠỚỜỞỠỢÙÚỦŨỤƯỨỪỬỮỰỲÝỶỸỴĐ]'), 'merged words'),
+    (re.compile(r'\s[.,;:!?]'), 'space before punctuation'),
+]
+
+
+def split_sentences(text: str) -> List[str]:
+    '''Split text at sentence-ending punctuation.'''
+    return [s.strip() for s in _SENTENCE.split(text) if s.strip()]
+
+
+def strip_tone(syllable: str) -> tuple:
+    '''Return (syllable without tone mark, number of tone marks).'''
+    decomposed = unicodedata.normalize('NFD', syllable)
+    tones = sum(1 for c in decomposed if c in TONE_MARKS)
+    base = ''.join(c for c in decomposed if c not in TONE_MARKS)
+    return unicodedata.normalize('NFC', base), tones
+
+
+def load_lexicon(path: str) -> tuple:
+    '''Read a lexicon file; returns (syllables, words). Syllables include those of the words.'''
+    syllables, words = set(), set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = unicodedata.normalize('NFC', line.strip().lower())
+            if not entry or entry.startswith('#'):
+                continue
+            if ' ' in entry:
+                words.add(entry)
+                syllables.update(entry.split())
+            else:
+                syllables.add(entry)
+    return syllables, words
+
+
+class QualityGate:
+    '''
+    Flags sentences that need correction.
+
+    Responsibilities:
+    - Check diacritic coverage of Vietnamese syllables
+    - Check syllables against the lexicon, or Vietnamese phonotactics without one
+    - Catch known words with a missing tone mark
+    - Detect spacing anomalies (merged words, missing spaces)
+    '''
+
+    def __init__(self, lexicon_path: str = LEXICON_PATH, min_diacritic_ratio: float = 0.25,
+                 max_oov_ratio: float = 0.15, min_words: int = 5):
+        '''
+        Initialize the gate.
+
+        Args:
+            lexicon_path: Lexicon file (see models/vi_lexicon.txt); None or a missing file = phonotactics only
+            min_diacritic_ratio: Minimum share of syllables carrying a diacritic
+            max_oov_ratio: Maximum share of lowercase tokens that are not known syllables
+            min_words: Sentences shorter than this skip the ratio checks
+        '''
+        self.min_diacritic_ratio = min_diacritic_ratio
+        self.max_oov_ratio = max_oov_ratio
+        self.min_words = min_words
+        self.lexicon: Set[str] = set()
+        self.words: Set[str] = set()
+        if lexicon_path and os.path.exists(lexicon_path):
+            self.lexicon, self.words = load_lexicon(lexicon_path)
+        elif lexicon_path:
+            print(f"   ⚠ Lexicon not found at {lexicon_path}; checking syllables by phonotactics only")
+        # Words by their toneless spelling, to recognise them with a tone mark missing
+        self._toneless: Dict[str, List[str]] = {}
+        for word in sorted(self.words):
+            self._toneless.setdefault(strip_tone(word)[0], []).append(word)
+
+    def is_syllable(self, token: str) -> bool:
+        '''Whether a lowercase token is a known syllable (lexicon loaded) or a well-formed one.'''
+        if self.lexicon:
+            return token in self.lexicon
+        base, tones = strip_tone(token)
+        match = _SYLLABLE.match(base)
+        if tones > 1 or not match:
+            return False
+        return not _STOP_FINAL.search(base) or any(c in STOP_TONES for c in unicodedata.normalize('NFD', token))
+
+    def missing_tones(self, tokens: List[str]) -> List[str]:
+        '''Adjacent syllable pairs that are a lexicon word with fewer tone marks, as "pair (word?)".'''
+        found = []
+        for pair in (f"{a} {b}" for a, b in zip(tokens, tokens[1:])):
+            if pair in self.words:
+                continue
+            base, tones = strip_tone(pair)
+            for word in self._toneless.get(base, []):
+                if strip_tone(word)[1] > tones:
+                    found.append(f"{pair} ({word}?)")
+                    break
+        return found
+
+    def issues(self, sentence: str) -> List[str]:
+        '''Reasons the sentence looks wrong (empty list = clean).'''
+        sentence = unicodedata.normalize('NFC', sentence)
+        found = [reason for pattern, reason in _SPACING if pattern.search(sentence)]
+        tokens = [t for t in _TOKEN.findall(sentence) if not any(c.isdigit() for c in t)]
+        found.extend(f"missing tone mark: {m}" for m in self.missing_tones([t.lower() for t in tokens]))
+        # Capitalized tokens are names/acronyms and numbers are normalized later
+        words = [t for t in tokens if t.islower()]
+        if any(strip_tone(w)[1] > 1 for w in words):
+            found.append('merged syllables')
+        if len(words) < self.min_words:
+            return found
+        oov = sum(1 for w in words if not self.is_syllable(w))
+        if oov / len(words) > self.max_oov_ratio:
+            found.append(f"{oov}/{len(words)} unknown syllables")
+        marked = sum(1 for w in words if any(ord(c) > 127 for c in w))
+        if marked / len(words) < self.min_diacritic_ratio:
+            found.append(f"diacritics on {marked}/{len(words)} syllables")
+        return found
+
+    def flag(self, sentences: List[str]) -> List[bool]:
+        '''Suspicious flag per sentence.'''
+        return [bool(self.issues(s)) for s in sentences]
+
+
+def regions(flags: List[bool]) -> List[tuple]:
+    '''Runs of consecutive flagged sentences as (start, end) index pairs.'''
+    runs, start = [], None
+    for i, flagged in enumerate(flags + [False]):
+        if flagged and start is None:
+            start = i
+        elif not flagged and start is not None:
+            runs.append((start, i))
+            start = None
+    return runs
+
+
+def new_stats() -> Dict[str, int]:
+    return {'sentences': 0, 'corrected': 0, 'refined': 0, 'skipped_correct': 0, 'skipped_refine': 0}
+
+
+def main():
+    '''CLI entry point.'''
+    parser = argparse.ArgumentParser(description='Vietnamese sentence quality checks')
+    parser.add_argument('--lexicon', type=str, default=LEXICON_PATH)
+    sub = parser.add_subparsers(dest='command', required=True)
+    check = sub.add_parser('check', help='Print flagged sentences and their issues')
+    check.add_argument('files', nargs='+')
+    unknown = sub.add_parser('unknown', help='Count lowercase syllables missing from the lexicon')
+    unknown.add_argument('files', nargs='+')
+    args = parser.parse_args()
+
+    gate = QualityGate(args.lexicon)
+    text = ' '.join(open(path, 'r', encoding='utf-8').read() for path in args.files)
+    if args.command == 'check':
+        sentences = split_sentences(text)
+        flagged = 0
+        for sentence in sentences:
+            issues = gate.issues(sentence)
+            if issues:
+                flagged += 1
+                print(f"⚠ {sentence}\n    {'; '.join(issues)}")
+        print(f"✓ {flagged}/{len(sentences)} sentences flagged")
+    elif args.command == 'unknown':
+        tokens = [t.lower() for t in _TOKEN.findall(unicodedata.normalize('NFC', text))
+                  if not any(c.isdigit() for c in t)]
+        for token, count in Counter(t for t in tokens if t not in gate.lexicon).most_common():
+            print(f"{count:6d}  {token}")
+
+
+if __name__ == "__main__":
+    main()
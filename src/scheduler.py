@@ -0,0 +1,270 @@
+"""
+Scheduler Module - Core and device budgets for concurrent pipeline stages.
+
+The corrector, TTS and Whisper each picked CUDA on their own, and on CPU
+every stage assumed it owned the machine: torch used all cores for intra-op
+work while MoviePy/ffmpeg encoded with 4 more threads, so two jobs in
+parallel ran several times more threads than cores. The scheduler hands out
+leases per stage: a number of core tokens (used as the torch intra-op and
+ffmpeg thread count) and, for GPU stages, a device slot. Stages wait when
+the box is full instead of oversubscribing it. All generators in a process
+share one scheduler, so JobService workers coordinate automatically.
+
+JobService workers also share one model per stage, so model stages are
+exclusive: a second worker reaching the corrector, TTS or Whisper waits for
+the first to finish with it instead of running the same model concurrently.
+
+torch.set_num_threads is process-wide, so while several torch stages hold
+CPU leases the torch thread count is the smallest of their grants; when the
+last one is released it returns to what it was before the first.
+
+Usage (throughput of concurrent synthetic jobs, naive vs. scheduled):
+    python src/scheduler.py --jobs 8 --concurrency 1 2 4
+"""
+import os
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+# threads: max core tokens a stage uses; torch: runs torch ops; gpu: can run on CUDA;
+# exclusive: one lease at a time (the stage's model is shared by every worker)
+STAGE_PROFILES = {
+    'correct': {'threads': 4, 'torch': True, 'gpu': True, 'exclusive': True},
+    'tts': {'threads': 4, 'torch': True, 'gpu': True, 'exclusive': True},
+    'subtitles': {'threads': 4, 'torch': True, 'gpu': True, 'exclusive': True},
+    'compose': {'threads': 4, 'torch': False, 'gpu': False, 'exclusive': False},
+}
+
+
+def available_cores() -> int:
+    '''Cores this process may run on.'''
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class Lease:
+    '''Resources granted to one running stage.'''
+
+    def __init__(self, stage: str, threads: int, device: str, waited: float):
+        self.stage = stage
+        self.threads = threads
+        self.device = device
+        self.waited = waited
+
+
+class ResourceScheduler:
+    '''
+    Core-token and device-slot scheduler for pipeline stages.
+
+    Responsibilities:
+    - Choose the device of each GPU-capable stage once (models load there)
+    - Grant CPU stages up to their thread budget out of the free cores
+    - Serialize GPU stages per device slot
+    - Run exclusive stages (shared models) one lease at a time
+    - Keep torch's intra-op thread count within the active CPU grants
+    '''
+
+    def __init__(self, cores: int = None, gpu_stages: List[str] = None, gpu_slots: int = 1,
+                 profiles: Dict[str, Dict] = None):
+        '''
+        Initialize the scheduler.
+
+        Args:
+            cores: Core tokens to hand out (default: cores available to the process)
+            gpu_stages: Stages that run on CUDA when available (default: every GPU-capable stage)
+            gpu_slots: GPU stages that may run at once
+            profiles: Per-stage budgets (default: STAGE_PROFILES)
+        '''
+        self.cores = cores or available_cores()
+        self.profiles = profiles or STAGE_PROFILES
+        self.has_cuda = TORCH_AVAILABLE and torch.cuda.is_available()
+        self.gpu_stages = set(gpu_stages if gpu_stages is not None
+                              else [s for s, p in self.profiles.items() if p['gpu']])
+        self.gpu_slots = gpu_slots
+        self.free = self.cores
+        self.free_gpu = gpu_slots
+        self.waits: Dict[str, List[float]] = {}
+        self.active: Dict[str, int] = {}
+        self._torch_grants: List[int] = []
+        self._torch_default = None
+        self._cond = threading.Condition()
+
+    def device_for(self, stage: str) -> str:
+        '''Device a stage's model should load on: 'cuda' or 'cpu'.'''
+        profile = self.profiles.get(stage, {})
+        return 'cuda' if self.has_cuda and profile.get('gpu') and stage in self.gpu_stages else 'cpu'
+
+    def budget(self, stage: str) -> int:
+        '''Most threads a stage can be granted (for backends sized once at load time).'''
+        return min(self.profiles.get(stage, {}).get('threads', self.cores), self.cores)
+
+    @contextmanager
+    def stage(self, name: str):
+        '''
+        Hold resources for a stage; yields a Lease (None for stages without a profile).
+
+        CPU stages wait for at least one free core and take up to their thread
+        budget; GPU stages wait for a device slot and take one core for host work.
+        Exclusive stages also wait until no other lease of the same stage is held.
+        '''
+        profile = self.profiles.get(name)
+        if profile is None:
+            yield None
+            return
+        lease = self._acquire(name, profile)
+        try:
+            yield lease
+        finally:
+            self._release(lease, profile)
+
+    def _acquire(self, name: str, profile: Dict) -> Lease:
+        start = time.perf_counter()
+        device = self.device_for(name)
+        exclusive = profile.get('exclusive', False)
+        with self._cond:
+            if device == 'cuda':
+                self._cond.wait_for(lambda: self.free_gpu > 0 and self.free > 0
+                                    and not (exclusive and self.active.get(name)))
+                self.free_gpu -= 1
+                threads = 1
+            else:
+                self._cond.wait_for(lambda: self.free > 0 and not (exclusive and self.active.get(name)))
+                threads = min(profile['threads'], self.free)
+            self.free -= threads
+            self.active[name] = self.active.get(name, 0) + 1
+            if profile['torch'] and device == 'cpu':
+                if not self._torch_grants and TORCH_AVAILABLE:
+                    self._torch_default = torch.get_num_threads()
+                self._torch_grants.append(threads)
+                self._apply_torch_threads()
+            waited = time.perf_counter() - start
+            self.waits.setdefault(name, []).append(waited)
+        return Lease(name, threads, device, waited)
+
+    def _release(self, lease: Lease, profile: Dict):
+        with self._cond:
+            self.free += lease.threads
+            self.active[lease.stage] -= 1
+            if lease.device == 'cuda':
+                self.free_gpu += 1
+            elif profile['torch']:
+                self._torch_grants.remove(lease.threads)
+                self._apply_torch_threads()
+            self._cond.notify_all()
+
+    def _apply_torch_threads(self):
+        if not TORCH_AVAILABLE:
+            return
+        threads = min(self._torch_grants) if self._torch_grants else self._torch_default
+        if threads and torch.get_num_threads() != threads:
+            torch.set_num_threads(threads)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {'cores': self.cores, 'free': self.free, 'gpu_slots': self.gpu_slots,
+                    'gpu_stages': sorted(self.gpu_stages) if self.has_cuda else [],
+                    'wait_seconds': {stage: round(sum(w), 2) for stage, w in self.waits.items()}}
+
+
+_shared = ResourceScheduler()
+
+
+def shared_scheduler() -> ResourceScheduler:
+    '''The process-wide scheduler used by default.'''
+    return _shared
+
+
+def configure(cores: int = None, gpu_stages: List[str] = None, gpu_slots: int = 1) -> ResourceScheduler:
+    '''Replace the shared scheduler (call before creating generators).'''
+    global _shared
+    _shared = ResourceScheduler(cores, gpu_stages, gpu_slots)
+    return _shared
+
+
+def _synthetic_job(scheduler: ResourceScheduler = None, size: int = 768, steps: int = 12, frames: int = 90,
+                   resolution=(540, 960)):
+    '''One CPU job: three torch stages (matmul chains) and an x264 encode of noise frames.'''
+    import tempfile
+    import numpy as np
+    from framewriter import FFmpegFrameWriter
+
+    def torch_stage():
+        a = torch.randn(size, size)
+        for _ in range(steps):
+            a = torch.tanh(a @ a) * 0.5
+
+    for stage in ('correct', 'tts', 'subtitles'):
+        if scheduler:
+            with scheduler.stage(stage):
+                torch_stage()
+        else:
+            torch_stage()
+
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 255, (resolution[1] // 20, resolution[0] // 20, 3), dtype=np.uint8)
+    frame = np.repeat(np.repeat(noise, 20, axis=0), 20, axis=1)
+
+    def render(t, out):
+        out[:] = np.roll(frame, int(t * 120), axis=1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def encode(threads):
+            with FFmpegFrameWriter(os.path.join(tmp, 'job.mp4'), resolution, 30, preset='veryfast',
+                                   threads=threads) as writer:
+                writer.render(render, frames / 30)
+
+        if scheduler:
+            with scheduler.stage('compose') as lease:
+                encode(lease.threads)
+        else:
+            encode(4)
+
+
+def benchmark(jobs: int = 8, concurrencies: List[int] = (1, 2, 4), cores: int = None) -> Dict:
+    '''
+    Throughput of concurrent synthetic jobs with naive vs. scheduled resource use.
+
+    Naive: every torch stage uses all cores and every encode uses 4 ffmpeg
+    threads, as the pipeline did. Scheduled: stages take leases from one
+    ResourceScheduler sized to the box.
+
+    Returns:
+        {concurrency: {'naive': jobs/min, 'scheduled': jobs/min}}
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+    cores = cores or available_cores()
+    results = {}
+    print(f"Benchmark: {jobs} jobs, {cores} cores")
+    for concurrency in concurrencies:
+        row = {}
+        for mode in ('naive', 'scheduled'):
+            scheduler = ResourceScheduler(cores=cores) if mode == 'scheduled' else None
+            torch.set_num_threads(cores)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(lambda _: _synthetic_job(scheduler), range(jobs)))
+            row[mode] = round(jobs * 60 / (time.perf_counter() - start), 2)
+        results[concurrency] = row
+        print(f"   concurrency {concurrency}: naive {row['naive']:.2f} jobs/min, "
+              f"scheduled {row['scheduled']:.2f} jobs/min ({row['scheduled'] / row['naive']:.2f}x)")
+    torch.set_num_threads(cores)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark scheduled vs. naive concurrent jobs on CPU')
+    parser.add_argument('--jobs', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--cores', type=int, help='Core tokens (default: available cores)')
+    args = parser.parse_args()
+    benchmark(args.jobs, args.concurrency, args.cores)
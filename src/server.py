@@ -0,0 +1,414 @@
+"""
+Server Module - Local HTTP job service for video generation.
+
+Wraps TikTokNewsGenerator behind a small JSON API. Each worker thread owns one
+generator, and the generators share one ModelRegistry, so each model is loaded
+once and stays resident between jobs; the shared scheduler runs each model
+stage for one worker at a time. Jobs wait in bounded priority lanes (breaking
+news ahead of backlog) and submissions are rejected with 429 when a lane is
+full. Finished jobs stay queryable for a TTL; output names from the request
+are reduced to [A-Za-z0-9_-] and suffixed with the job id.
+
+Endpoints:
+    POST /jobs                      {"url": ..., "lane": "breaking"|"backlog", "options": {"mode": "preview"}}
+    GET  /jobs/<id>                 Job status
+    GET  /jobs/<id>/events          Progress events (NDJSON stream until the job finishes)
+    GET  /jobs/<id>/artifacts/<k>   Download video | audio | subtitles | summary
+    GET  /metrics                   Queue depth, running jobs, latency percentiles
+
+Usage:
+    python src/server.py --port 8080 --workers 1
+"""
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import argparse
+import threading
+from collections import deque
+from typing import Callable, Dict, List
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from models import ModelRegistry, current_rss
+from scheduler import configure, shared_scheduler
+
+
+LANES = {'breaking': 0, 'backlog': 1}
+ARTIFACT_KEYS = {'video': 'video_path', 'audio': 'audio_path', 'subtitles': 'subtitle_path'}
+
+
+class QueueFull(Exception):
+    '''Raised when a lane has no room for another job.'''
+
+
+class ServiceUnavailable(Exception):
+    '''Raised when no worker could load its generator.'''
+
+
+def percentiles(values: List[float], points=(50, 95, 99)) -> Dict[str, float]:
+    '''Nearest-rank percentiles of a list of values.'''
+    if not values:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(values)
+    return {f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+
+
+class Job:
+    '''A queued video generation request and its progress events.'''
+
+    def __init__(self, url: str, lane: str, options: Dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.url = url
+        self.lane = lane
+        self.options = options
+        self.status = 'queued'
+        self.events = []
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cond = threading.Condition()
+
+    @property
+    def output_name(self) -> str:
+        '''File name stem for the job's outputs: the requested name reduced to [A-Za-z0-9_-], plus the job id.'''
+        name = re.sub(r'[^A-Za-z0-9_-]+', '_', str(self.options.get('output_name') or '')).strip('_')[:64]
+        return f"{name}_{self.id}" if name else f"job_{self.id}"
+
+    def emit(self, stage: str, info: Dict = None):
+        '''Record a progress event and wake event streams.'''
+        with self.cond:
+            self.events.append({'time': round(time.time() - self.submitted, 3), 'stage': stage, **(info or {})})
+            self.cond.notify_all()
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id, 'url': self.url, 'lane': self.lane, 'status': self.status,
+            'stage': self.events[-1]['stage'] if self.events else None,
+            'error': self.error, 'result': self.result,
+            'queued_seconds': round((self.started or time.time()) - self.submitted, 3),
+            'run_seconds': round((self.finished or time.time()) - self.started, 3) if self.started else None,
+        }
+
+
+class JobService:
+    '''
+    Bounded worker pool running generation jobs from priority lanes.
+
+    Responsibilities:
+    - Keep one resident generator per worker, all sharing one model registry
+    - Order jobs by lane, then submission order
+    - Apply backpressure with per-lane capacity limits
+    - Track queue depth and latency percentiles
+    - Forget finished jobs after a TTL or beyond a count
+    '''
+
+    def __init__(self, generator_factory: Callable = None, workers: int = 1,
+                 lane_limits: Dict[str, int] = None, history: int = 1000, job_ttl: float = 3600,
+                 max_finished: int = 1000):
+        '''
+        Initialize the service.
+
+        Args:
+            generator_factory: Callable returning an object with generate_video(); defaults to TikTokNewsGenerator
+            workers: Number of worker threads (their generators share one model registry)
+            lane_limits: Max queued jobs per lane
+            history: Number of finished jobs kept for latency percentiles
+            job_ttl: Seconds a finished job (status, events, artifact paths) stays queryable
+            max_finished: Finished jobs kept at most; the oldest are forgotten first
+        '''
+        self.generator_factory = generator_factory or self._default_factory
+        self.models = ModelRegistry()
+        self.workers = workers
+        self.lane_limits = lane_limits or {'breaking': 16, 'backlog': 64}
+        self.jobs: Dict[str, Job] = {}
+        self.job_ttl = job_ttl
+        self.max_finished = max_finished
+        self.finished_jobs = deque()
+        self.init_errors: List[str] = []
+        self.queue = queue.PriorityQueue()
+        self.depth = {lane: 0 for lane in LANES}
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_times = deque(maxlen=history)
+        self.run_times = deque(maxlen=history)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _default_factory(self):
+        from main import TikTokNewsGenerator
+        return TikTokNewsGenerator(models=self.models)
+
+    def start(self, wait: bool = True):
+        '''
+        Start workers; with wait=True block until every worker has loaded its models.
+
+        Raises:
+            RuntimeError: A worker failed to create its generator (wait=True only; the others are stopped)
+        '''
+        ready = [threading.Event() for _ in range(self.workers)]
+        for i, event in enumerate(ready):
+            thread = threading.Thread(target=self._worker, args=(event,), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if wait:
+            for event in ready:
+                event.wait()
+            if self.init_errors:
+                self.stop()
+                raise RuntimeError(f"Worker initialization failed: {'; '.join(self.init_errors)}")
+        return self
+
+    def stop(self):
+        '''Stop workers after their current job.'''
+        alive = [thread for thread in self._threads if thread.is_alive()]
+        for i, _ in enumerate(alive):
+            self.queue.put((len(LANES), i, None))
+        for thread in alive:
+            thread.join()
+        self._threads = []
+
+    @property
+    def unavailable(self) -> bool:
+        '''Whether every worker failed to start, so queued jobs would never run.'''
+        return bool(self.workers) and len(self.init_errors) >= self.workers
+
+    def submit(self, url: str, lane: str = 'backlog', options: Dict = None) -> Job:
+        '''Queue a job, raising QueueFull when the lane is at capacity.'''
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane: {lane}")
+        with self._lock:
+            if self.unavailable:
+                raise ServiceUnavailable(f"No worker is running: {'; '.join(self.init_errors)}")
+            self._evict()
+            if self.depth[lane] >= self.lane_limits[lane]:
+                raise QueueFull(f"{lane} lane is full ({self.lane_limits[lane]} jobs)")
+            job = Job(url, lane, options or {})
+            self.jobs[job.id] = job
+            self.depth[lane] += 1
+            self._seq += 1
+            self.queue.put((LANES[lane], self._seq, job))
+        job.emit('queued')
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            self._evict()
+            return self.jobs.get(job_id)
+
+    def _evict(self):
+        '''Forget finished jobs past the TTL or the count limit (call with the lock held).'''
+        cutoff = time.time() - self.job_ttl
+        while self.finished_jobs and (len(self.finished_jobs) > self.max_finished
+                                      or self.finished_jobs[0].finished < cutoff):
+            self.jobs.pop(self.finished_jobs.popleft().id, None)
+
+    def _fail_queued(self, error: str):
+        '''Fail every queued job (no worker is left to run them).'''
+        while True:
+            try:
+                _, _, job = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is None:
+                continue
+            job.error, job.status, job.finished = error, 'failed', time.time()
+            with self._lock:
+                self.depth[job.lane] -= 1
+                self.failed += 1
+                self.finished_jobs.append(job)
+            job.emit('failed', {'error': error})
+
+    def _worker(self, ready: threading.Event):
+        try:
+            generator = self.generator_factory()
+        except Exception as e:
+            print(f"❌ {threading.current_thread().name} failed to start: {e}")
+            with self._lock:
+                self.init_errors.append(f"{threading.current_thread().name}: {e}")
+            if self.unavailable:
+                self._fail_queued(f"no worker could start: {e}")
+            return
+        finally:
+            ready.set()
+        while True:
+            _, _, job = self.queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self.depth[job.lane] -= 1
+                self.running += 1
+            job.status, job.started = 'running', time.time()
+            job.emit('started')
+            try:
+                generator.generate_video(job.url, output_name=job.output_name,
+                                         mode=job.options.get('mode', 'final'), progress=job.emit)
+                job.result = self._artifacts(job)
+                job.status = 'done'
+            except Exception as e:
+                job.error, job.status = str(e), 'failed'
+            job.finished = time.time()
+            with self._lock:
+                self.running -= 1
+                self.completed += job.status == 'done'
+                self.failed += job.status == 'failed'
+                self.wait_times.append(job.started - job.submitted)
+                self.run_times.append(job.finished - job.started)
+                self.finished_jobs.append(job)
+                self._evict()
+            job.emit(job.status, {'error': job.error} if job.error else None)
+
+    def _artifacts(self, job: Job) -> Dict:
+        '''Artifact paths recorded in the job's summary JSON.'''
+        summary = f"output/summaries/{job.output_name}.json"
+        with open(summary, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        artifacts = {key: data.get(field) for key, field in ARTIFACT_KEYS.items()}
+        artifacts['summary'] = summary
+        return artifacts
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                'queue_depth': dict(self.depth),
+                'running': self.running,
+                'workers': self.workers,
+                'worker_errors': list(self.init_errors),
+                'jobs_tracked': len(self.jobs),
+                'completed': self.completed,
+                'failed': self.failed,
+                'queue_wait_seconds': percentiles(list(self.wait_times)),
+                'run_seconds': percentiles(list(self.run_times)),
+                'rss_mb': round(current_rss() / 1024**2, 1),
+                'scheduler': shared_scheduler().stats(),
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    '''JSON API over a JobService.'''
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def service(self) -> JobService:
+        return self.server.service
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            return self._send({'error': 'not found'}, 404)
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            job = self.service.submit(body['url'], body.get('lane', 'backlog'), body.get('options'))
+        except QueueFull as e:
+            return self._send({'error': str(e)}, 429, {'Retry-After': '30'})
+        except ServiceUnavailable as e:
+            return self._send({'error': str(e)}, 503)
+        except (KeyError, ValueError) as e:
+            return self._send({'error': f"bad request: {e}"}, 400)
+        self._send(job.to_dict(), 202)
+
+    def do_GET(self):
+        parts = [p for p in self.path.split('?')[0].split('/') if p]
+        if parts == ['metrics']:
+            return self._send(self.service.metrics())
+        if len(parts) < 2 or parts[0] != 'jobs' or not self.service.get(parts[1]):
+            return self._send({'error': 'not found'}, 404)
+        job = self.service.get(parts[1])
+        if len(parts) == 2:
+            return self._send(job.to_dict())
+        if parts[2] == 'events':
+            return self._stream_events(job)
+        if parts[2] == 'artifacts' and len(parts) == 4:
+            return self._send_artifact(job, parts[3])
+        self._send({'error': 'not found'}, 404)
+
+    def _stream_events(self, job: Job):
+        '''Write events as NDJSON lines until the job finishes.'''
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        sent = 0
+        while True:
+            with job.cond:
+                while sent >= len(job.events) and job.status not in ('done', 'failed'):
+                    job.cond.wait(timeout=15)
+                pending, finished = job.events[sent:], job.status in ('done', 'failed')
+            try:
+                for event in pending:
+                    self.wfile.write((json.dumps(event, ensure_ascii=False) + "\n").encode('utf-8'))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            sent += len(pending)
+            if finished and sent >= len(job.events):
+                return
+
+    def _send_artifact(self, job: Job, key: str):
+        path = (job.result or {}).get(key)
+        if not path or not os.path.exists(path):
+            return self._send({'error': f"artifact not available: {key}"}, 404)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(os.path.getsize(path)))
+        self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(path)}"')
+        self.end_headers()
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(1 << 20)
+                if not block:
+                    break
+                self.wfile.write(block)
+
+    def _send(self, data: Dict, status: int = 200, headers: Dict = None):
+        payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def create_server(service: JobService, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    '''Create the HTTP server bound to a JobService.'''
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.service = service
+    return httpd
+
+
+def main():
+    '''CLI entry point.'''
+    parser = argparse.ArgumentParser(description='TikTok News Video job service')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=1, help='Worker threads (models are loaded once and shared)')
+    parser.add_argument('--breaking-limit', type=int, default=16, help='Max queued breaking-news jobs')
+    parser.add_argument('--backlog-limit', type=int, default=64, help='Max queued backlog jobs')
+    parser.add_argument('--cores', type=int, help='Cores shared by all workers\' stages (default: all available)')
+    args = parser.parse_args()
+    if args.cores:
+        configure(cores=args.cores)
+
+    service = JobService(workers=args.workers,
+                         lane_limits={'breaking': args.breaking_limit, 'backlog': args.backlog_limit})
+    print("Loading models...")
+    service.start()
+    httpd = create_server(service, args.host, args.port)
+    print(f"✓ Job service listening on http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Stubs Module - Offline stand-ins for external services.
+
+Local HTTP servers that mimic the parts of external services used by the
+pipeline (Ollama and a news site serving fixture articles), so the job
+service, batch tooling and load tests can be exercised without network
+access or a GPU. FakeSynthesizer stands in for VieNeu-TTS in TTSPool workers.
+
+Usage:
+    python src/stubs.py ollama --port 11434
+    python src/stubs.py news --port 8800
+"""
+import io
+import os
+import re
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+import numpy as np
+from PIL import Image
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class _StubServer:
+    '''Run a handler class on a background ThreadingHTTPServer.'''
+
+    handler = None
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), self.handler)
+        self.httpd.stub = self
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    '''
+    Implements /api/tags and streaming/non-streaming /api/generate.
+
+    Models the server behavior the client relies on: an empty prompt only
+    loads/unloads the model (keep_alive=0 unloads), a cold model pays a load
+    delay, and only the part of system+prompt not shared with the previous
+    request is evaluated (prefix cache).
+    '''
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._json({"models": [{"name": self.server.stub.model}]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+        stub = self.server.stub
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        stub.requests.append(body)
+        missing = [field for field in stub.require if field not in body]
+        if missing:
+            self._json({"error": f"missing fields: {', '.join(missing)}"}, status=400)
+            return
+
+        load_duration = 0
+        if not stub.loaded:
+            time.sleep(stub.load_delay)
+            stub.loaded, stub.loads, load_duration = True, stub.loads + 1, int(stub.load_delay * 1e9)
+        if not body.get('prompt'):
+            if body.get('keep_alive') in (0, '0', '0s'):
+                stub.loaded = False
+            self._json({"model": body.get('model'), "response": "", "done": True, "load_duration": load_duration})
+            return
+
+        tokens = f"{body.get('system', '')}\n{body['prompt']}".split()
+        cached = stub.cached_prefix(tokens)
+        prompt_eval = (len(tokens) - cached) * stub.prompt_delay
+        time.sleep(prompt_eval)
+        words = stub.reply(body['prompt']).split()
+        limit = body.get('options', {}).get('num_predict')
+        words = words[:limit] if limit and limit > 0 else words
+        stats = {"context": [1, 2, 3], "load_duration": load_duration,
+                 "prompt_eval_count": len(tokens) - cached, "prompt_eval_duration": int(prompt_eval * 1e9),
+                 "eval_count": len(words), "eval_duration": int(stub.token_delay * len(words) * 1e9)}
+        if not body.get('stream', True):
+            time.sleep(stub.token_delay * len(words))
+            self._json({"model": body.get('model'), "response": ' '.join(words), "done": True, **stats})
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        # Models that ignore think=false stream an inline <think> block first
+        thinking = ['<think>'] + ['suy nghĩ'] * stub.think_tokens + ['</think>'] if stub.think_tokens else []
+        try:
+            for i, word in enumerate(thinking + words):
+                time.sleep(stub.token_delay)
+                chunk = {"response": word if i == 0 else f" {word}", "done": False}
+                self.wfile.write((json.dumps(chunk, ensure_ascii=False) + "\n").encode('utf-8'))
+            done = {"response": "", "done": True, **stats}
+            self.wfile.write((json.dumps(done) + "\n").encode('utf-8'))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _json(self, data: dict, status: int = 200):
+        payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FakeOllama(_StubServer):
+    '''
+    Fake Ollama server returning deterministic Vietnamese text.
+
+    Requests are recorded in `requests` so callers can assert on the fields
+    sent; fields listed in `require` are enforced (HTTP 400 when missing).
+    think_tokens > 0 prefixes streamed replies with a <think> block of that
+    many tokens.
+    '''
+
+    handler = _OllamaHandler
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, model: str = "qwen3-vl:4b",
+                 token_delay: float = 0.0, words: int = 400, prompt_delay: float = 0.0,
+                 load_delay: float = 0.0, require: tuple = (), think_tokens: int = 0):
+        super().__init__(host, port)
+        self.think_tokens = think_tokens
+        self.model = model
+        self.token_delay = token_delay
+        self.prompt_delay = prompt_delay
+        self.load_delay = load_delay
+        self.require = tuple(require)
+        self.words = words
+        self.requests = []
+        self.loaded = False
+        self.loads = 0
+        self._cache = []
+        self._cache_lock = threading.Lock()
+
+    def cached_prefix(self, tokens: list) -> int:
+        '''Length of the prefix shared with the previous prompt; the new prompt replaces the cache.'''
+        with self._cache_lock:
+            shared = 0
+            for a, b in zip(self._cache, tokens):
+                if a != b:
+                    break
+                shared += 1
+            self._cache = tokens
+        return shared
+
+    def reply(self, prompt: str) -> str:
+        '''Echo sentences from the prompt until the configured word count.'''
+        sentences = [s for s in re.split(r'(?<=[.!?])\s+', prompt) if len(s.split()) > 3]
+        sentences = sentences or ["Thị trường chứng khoán hôm nay tăng điểm mạnh."]
+        out, count, i = [], 0, 0
+        while count < self.words:
+            out.append(sentences[i % len(sentences)])
+            count += len(out[-1].split())
+            i += 1
+        return ' '.join(out)
+
+
+FIXTURE_SENTENCES = [
+    "Ngân hàng Nhà nước vừa công bố điều chỉnh lãi suất điều hành từ đầu tháng tới.",
+    "Giá xăng dầu trong nước tiếp tục giảm nhẹ sau phiên điều chỉnh chiều nay.",
+    "Thành phố Hà Nội triển khai thêm nhiều tuyến xe buýt điện phục vụ người dân.",
+    "Các chuyên gia cho rằng thị trường bất động sản sẽ phục hồi chậm trong năm nay.",
+    "Bộ Giáo dục và Đào tạo đề xuất thay đổi lịch thi tốt nghiệp trung học phổ thông.",
+    "Lượng khách du lịch quốc tế đến Việt Nam tăng mạnh so với cùng kỳ năm trước.",
+    "Nhiều doanh nghiệp xuất khẩu nông sản đang tìm cách mở rộng sang thị trường mới.",
+    "Cơ quan khí tượng cảnh báo mưa lớn kéo dài tại các tỉnh miền Trung.",
+    "Chỉ số VN-Index đóng cửa tăng hơn mười điểm nhờ nhóm cổ phiếu ngân hàng.",
+    "Ủy ban nhân dân thành phố yêu cầu đẩy nhanh tiến độ giải phóng mặt bằng.",
+    "Dự án đường cao tốc Bắc Nam đoạn qua tỉnh Quảng Ngãi dự kiến thông xe cuối năm.",
+    "Người dân được khuyến cáo chủ động phòng chống dịch bệnh trong mùa mưa.",
+    "Đội tuyển bóng đá quốc gia đã có buổi tập đầu tiên chuẩn bị cho vòng loại.",
+    "Giá vàng miếng trong nước biến động mạnh theo diễn biến của thị trường thế giới.",
+    "Các trường đại học công bố điểm chuẩn dự kiến cho kỳ tuyển sinh sắp tới.",
+    "Ngành điện khuyến nghị người dân sử dụng điện tiết kiệm trong mùa nắng nóng.",
+]
+
+
+def fixture_article(article_id: int, sentences: int = 40) -> dict:
+    '''Deterministic fixture article (title, description, paragraphs) for an id.'''
+    rng = random.Random(article_id)
+    body = [rng.choice(FIXTURE_SENTENCES) for _ in range(sentences)]
+    paragraphs = [' '.join(body[i:i + 4]) for i in range(0, len(body), 4)]
+    return {'title': f"Bản tin thử nghiệm số {article_id}: {body[0][:-1]}",
+            'description': body[1], 'paragraphs': paragraphs}
+
+
+class _NewsHandler(BaseHTTPRequestHandler):
+    '''
+    Serves fixture articles in the VnExpress page layout.
+
+    /listing links every article, /tin-tuc/ban-tin-<id>.html is an article
+    with srcset images and a tiny icon, /img/<id>_<k>_<w>.jpg is a generated
+    image; Range requests are honored.
+    '''
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.hits += 1
+        path = self.path.split('?')[0]
+        article = re.fullmatch(r'/tin-tuc/ban-tin-(\d+)\.html', path)
+        image = re.fullmatch(r'/img/(\d+)_(\d+)_(\d+)\.jpg', path)
+        if path == '/listing':
+            links = ''.join(f'<a href="{stub.article_url(i)}">{i}</a>' for i in range(stub.articles))
+            self._send(f"<html><body>{links}</body></html>".encode('utf-8'), 'text/html; charset=utf-8')
+        elif article:
+            self._send(stub.page(int(article.group(1))), 'text/html; charset=utf-8')
+        elif image:
+            self._send(stub.image(*map(int, image.groups())), 'image/jpeg')
+        elif path == '/img/icon.png':
+            self._send(stub.icon, 'image/png')
+        else:
+            self.send_error(404)
+
+    def _send(self, payload: bytes, content_type: str):
+        match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        status = 200
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else len(payload) - 1, len(payload) - 1)
+            status, payload = 206, payload[start:end + 1]
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class FakeNewsSite(_StubServer):
+    '''
+    Fake news site serving deterministic fixture articles and images.
+
+    Pages follow the VnExpress layout; register_fixture_site() registers an
+    extractor for the stub's host so crawl_article can parse them.
+    '''
+
+    handler = _NewsHandler
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, articles: int = 1000,
+                 images_per_article: int = 4, latency: float = 0.0):
+        super().__init__(host, port)
+        self.articles = articles
+        self.images_per_article = images_per_article
+        self.latency = latency
+        self.hits = 0
+        self._images = {}
+        self._lock = threading.Lock()
+        buffer = io.BytesIO()
+        Image.new('RGB', (24, 24), (200, 30, 30)).save(buffer, 'PNG')
+        self.icon = buffer.getvalue()
+
+    def article_url(self, article_id: int) -> str:
+        return f"{self.url}/tin-tuc/ban-tin-{article_id}.html"
+
+    def register_fixture_site(self):
+        '''Register a VnExpress-layout extractor for this stub's host.'''
+        from extractors import SITES, register_site, get_extractor
+        try:
+            get_extractor(self.url)
+        except ValueError:
+            register_site(dict(SITES[0], name="fixture", source="Fixture",
+                               domains=(self.url.split('://', 1)[1],)))
+
+    def page(self, article_id: int) -> bytes:
+        time.sleep(self.latency)
+        article = fixture_article(article_id)
+        figures = ''.join(
+            f'<figure><img srcset="/img/{article_id}_{k}_480.jpg 480w, /img/{article_id}_{k}_1080.jpg 1080w" '
+            f'src="/img/{article_id}_{k}_480.jpg"></figure>' for k in range(self.images_per_article))
+        paragraphs = ''.join(f'<p class="Normal">{p}</p>' for p in article['paragraphs'])
+        return (f'<html><head><meta charset="utf-8"><link rel="canonical" href="{self.article_url(article_id)}">'
+                f'</head><body><h1 class="title-detail">{article["title"]}</h1>'
+                f'<p class="description">{article["description"]}</p><article class="fck_detail">'
+                f'<img src="/img/icon.png">{paragraphs}{figures}</article></body></html>').encode('utf-8')
+
+    def image(self, article_id: int, index: int, width: int) -> bytes:
+        '''Smooth random 16:9 JPEG seeded by article and index (generated once).'''
+        key = (article_id, index, width)
+        with self._lock:
+            if key not in self._images:
+                rng = np.random.default_rng(article_id * 1000 + index)
+                small = Image.fromarray(rng.integers(0, 255, (9, 16, 3), dtype=np.uint8))
+                buffer = io.BytesIO()
+                small.resize((width, width * 9 // 16), Image.Resampling.BICUBIC).save(buffer, 'JPEG', quality=85)
+                self._images[key] = buffer.getvalue()
+            return self._images[key]
+
+
+class FakeSynthesizer:
+    '''
+    VieNeu-TTS stand-in for TTSPool workers (pass the class or a functools.partial as backend).
+
+    infer() returns [worker pid, code, code, ...] with 10 samples per word,
+    where code = FakeSynthesizer.code(text, voice), so tests can check which
+    worker synthesized a unit and that units come back in order. Text
+    containing "FAIL" raises; text containing "EXIT" kills the worker.
+    '''
+
+    VOICES = [("Bình (nam miền Bắc)", "Binh"), ("Tuyên (nam miền Bắc)", "Tuyen"), ("Ngọc (nữ miền Bắc)", "Ngoc")]
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    @staticmethod
+    def code(text: str, voice: str) -> float:
+        return (zlib.crc32(f"{voice}|{text}".encode('utf-8')) % 997 + 1) / 1000
+
+    def list_preset_voices(self):
+        return self.VOICES
+
+    def get_preset_voice(self, name: str):
+        return name
+
+    def infer(self, text: str, voice=None, temperature: float = 1.0, top_k: int = 50) -> np.ndarray:
+        if 'FAIL' in text:
+            raise ValueError(f"cannot synthesize {text!r}")
+        if 'EXIT' in text:
+            os._exit(1)
+        time.sleep(self.delay)
+        audio = np.full(1 + 10 * len(text.split()), self.code(text, voice), dtype=np.float32)
+        audio[0] = os.getpid()
+        return audio
+
+
+def broken_synthesizer():
+    '''TTSPool backend whose model never loads.'''
+    raise OSError("backbone weights missing")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run an offline service stub')
+    parser.add_argument('service', choices=['ollama', 'news'])
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--token-delay', type=float, default=0.01)
+    parser.add_argument('--prompt-delay', type=float, default=0.0, help='Seconds per uncached prompt word')
+    parser.add_argument('--load-delay', type=float, default=0.0, help='Seconds to load a cold model')
+    parser.add_argument('--require', nargs='*', default=[], help='Request fields to enforce (e.g. keep_alive system)')
+    parser.add_argument('--articles', type=int, default=1000, help='Fixture articles served by the news stub')
+    args = parser.parse_args()
+    if args.service == 'news':
+        server = FakeNewsSite(port=args.port, articles=args.articles)
+        print(f"✓ Fake news site listening on {server.url} (listing: {server.url}/listing)")
+        server.httpd.serve_forever()
+    server = FakeOllama(port=args.port, token_delay=args.token_delay, prompt_delay=args.prompt_delay,
+                        load_delay=args.load_delay, require=args.require)
+    print(f"✓ Fake Ollama listening on {server.url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,215 @@
+"""
+Timeline Module - Streaming video timeline with bounded resident frame data.
+
+compose_video used to build every image clip, open every B-roll reader and
+render every subtitle image before writing the first frame, and kept all of
+them alive until the end. The timeline instead holds lightweight factories:
+a segment is materialized when its first frame is requested and released
+(closing any reader) as soon as playback moves past it, and overlays such as
+subtitles are rendered only while they are on screen. Frames are requested
+in order by the writer, so at most one segment is resident at a time.
+
+Usage (render a long synthetic video and check peak RSS):
+    python src/timeline.py --minutes 10 --images 100 --max-rss-mb 1500
+"""
+import os
+import time
+import bisect
+import argparse
+import threading
+import numpy as np
+from typing import Callable, List, Tuple
+from framewriter import StaticOverlay
+
+
+class StreamingTimeline:
+    '''
+    Sequential timeline of lazily built segments and overlays.
+
+    Responsibilities:
+    - Build a segment's renderer only while the segment is on screen
+    - Release segments (and close their readers) once playback passes them
+    - Render overlays (subtitles, intro band) on demand and drop them when they end
+    - Report how many segments/overlays were materialized at once
+    '''
+
+    def __init__(self, size: Tuple[int, int]):
+        '''
+        Args:
+            size: Frame size (width, height)
+        '''
+        self.width, self.height = size
+        self._starts: List[float] = []
+        self._segments: List[tuple] = []
+        self._overlays: List[tuple] = []
+        self._active = None
+        self._active_overlays = {}
+        self._next_overlay = 0
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.closed = 0
+        self.max_resident = 0
+
+    @property
+    def duration(self) -> float:
+        return self._starts[-1] + self._segments[-1][0] if self._segments else 0.0
+
+    def add(self, duration: float, factory: Callable):
+        '''
+        Append a segment.
+
+        Args:
+            duration: Segment duration in seconds
+            factory: Called when the segment comes on screen; returns (render_into, close) where
+                render_into(t, out) renders segment-local time t and close (or None) releases resources
+        '''
+        self._starts.append(self.duration)
+        self._segments.append((duration, factory))
+
+    def add_overlay(self, start: float, end: float, factory: Callable):
+        '''
+        Add a static overlay shown from start to end.
+
+        Args:
+            start: Start time in seconds
+            end: End time in seconds
+            factory: Called when the overlay comes on screen; returns a StaticOverlay
+        '''
+        bisect.insort(self._overlays, (start, end, len(self._overlays), factory))
+
+    def render_into(self, t: float, out: np.ndarray):
+        '''Render the frame at timeline time t into out.'''
+        with self._lock:
+            index = min(max(0, bisect.bisect_right(self._starts, t) - 1), len(self._segments) - 1)
+            render = self._materialize(index)
+            render(min(t - self._starts[index], self._segments[index][0]), out)
+            for overlay in self._overlays_at(t):
+                overlay.blend(out)
+            self.max_resident = max(self.max_resident, 1 + len(self._active_overlays))
+
+    def _materialize(self, index: int) -> Callable:
+        '''Return the renderer of segment index, releasing the previous segment first.'''
+        if self._active and self._active[0] == index:
+            return self._active[1]
+        self._release()
+        try:
+            render, close = self._segments[index][1]()
+        except Exception as e:
+            print(f"   ⚠ Segment {index} failed ({e}); rendering black")
+            render, close = (lambda t, out: out.fill(0)), None
+        self.opened += 1
+        self._active = (index, render, close)
+        return render
+
+    def _release(self):
+        if self._active:
+            close = self._active[2]
+            self._active = None
+            self.closed += 1
+            if close:
+                close()
+
+    def _overlays_at(self, t: float) -> List[StaticOverlay]:
+        '''Materialize overlays that started, drop those that ended (seeking backwards rescans).'''
+        if any(key[0] > t for key in self._active_overlays) or (
+                self._next_overlay and self._overlays[self._next_overlay - 1][0] > t):
+            self._active_overlays.clear()
+            self._next_overlay = 0
+        while self._next_overlay < len(self._overlays) and self._overlays[self._next_overlay][0] <= t:
+            start, end, order, factory = self._overlays[self._next_overlay]
+            if end > t:
+                self._active_overlays[(start, end, order)] = factory()
+            self._next_overlay += 1
+        for key in [k for k in self._active_overlays if k[1] <= t]:
+            del self._active_overlays[key]
+        return [self._active_overlays[k] for k in sorted(self._active_overlays, key=lambda k: k[2])]
+
+    def close(self):
+        '''Release the active segment and overlays.'''
+        with self._lock:
+            self._release()
+            self._active_overlays.clear()
+            self._next_overlay = 0
+
+
+def rss_ceiling_check(minutes: float = 10, images: int = 100, size: Tuple[int, int] = (1080, 1920),
+                      fps: int = 15, max_rss_mb: float = 1500, preset: str = 'ultrafast') -> dict:
+    '''
+    Render a long synthetic video through the streaming timeline and record peak RSS.
+
+    Uses MediaGenerator's image segments and subtitle rendering without
+    loading any model, and pipes frames through FFmpegFrameWriter.
+
+    Args:
+        minutes: Video duration
+        images: Number of distinct image segments
+        size: Frame size (width, height)
+        fps: Frames per second (a low rate keeps long checks cheap)
+        max_rss_mb: Peak RSS ceiling
+        preset: x264 preset for the throwaway output
+
+    Returns:
+        Peak/start RSS in MB, segment counts and whether the ceiling held
+    '''
+    import tempfile
+    from PIL import Image
+    from framewriter import FFmpegFrameWriter
+    from media import MediaGenerator
+    from models import current_rss
+
+    duration = minutes * 60
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(images):
+            path = os.path.join(tmp, f"img_{i:03d}.jpg")
+            noise = rng.integers(0, 255, (90, 160, 3), dtype=np.uint8)
+            Image.fromarray(noise).resize((1600, 900)).save(path, quality=80)
+            paths.append(path)
+
+        media = MediaGenerator(load_tts=False, resolution=size, fps=fps)
+        media.image_cache.cache_dir = os.path.join(tmp, 'cache')
+        os.makedirs(media.image_cache.cache_dir, exist_ok=True)
+        subtitles = [(s, s + 2.5, f"Phụ đề số {n} cho bản tin dài") for n, s in enumerate(np.arange(0, duration, 3.0))]
+        timeline = media.build_timeline(paths, [], duration, subtitles=subtitles)
+
+        baseline = peak = current_rss()
+        stop = threading.Event()
+
+        def sample():
+            nonlocal peak
+            while not stop.wait(0.2):
+                peak = max(peak, current_rss())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            with FFmpegFrameWriter(os.path.join(tmp, 'long.mp4'), size, fps, preset=preset) as writer:
+                writer.render(timeline.render_into, duration)
+        finally:
+            stop.set()
+            sampler.join()
+            timeline.close()
+
+    result = {'seconds': round(time.perf_counter() - start, 1), 'rss_start_mb': round(baseline / 1024**2),
+              'rss_peak_mb': round(peak / 1024**2), 'segments_opened': timeline.opened,
+              'max_resident': timeline.max_resident, 'passed': peak / 1024**2 <= max_rss_mb}
+    print(f"{'✓' if result['passed'] else '❌'} {minutes:g} min, {images} images in {result['seconds']}s: "
+          f"peak RSS {result['rss_peak_mb']} MB (start {result['rss_start_mb']} MB, ceiling {max_rss_mb:g} MB), "
+          f"at most {result['max_resident']} segments/overlays resident")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Render a long video through the streaming timeline under an RSS ceiling')
+    parser.add_argument('--minutes', type=float, default=10)
+    parser.add_argument('--images', type=int, default=100)
+    parser.add_argument('--width', type=int, default=1080)
+    parser.add_argument('--height', type=int, default=1920)
+    parser.add_argument('--fps', type=int, default=15)
+    parser.add_argument('--max-rss-mb', type=float, default=1500)
+    parser.add_argument('--preset', default='ultrafast')
+    args = parser.parse_args()
+    result = rss_ceiling_check(args.minutes, args.images, (args.width, args.height), args.fps, args.max_rss_mb, args.preset)
+    raise SystemExit(0 if result['passed'] else 1)
@@ -0,0 +1,253 @@
+"""
+TTS Pool Module - Multi-process VieNeu-TTS synthesis on CPU.
+
+The q8 GGUF backbone synthesizes one utterance at a time and does not use
+all cores. The pool runs several backbone instances in worker processes,
+splits a script into sentence groups, synthesizes them in parallel and
+reassembles the audio in order. PCM comes back through shared memory
+instead of being pickled through the result queue.
+
+Workers build their synthesizer with a picklable factory (default:
+load_vieneu), so the pool can run other backends or a fake in tests.
+"""
+import os
+import re
+import queue
+import threading
+import itertools
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List
+from scheduler import available_cores
+
+SAMPLE_RATE = 24000
+CPU_BACKBONE = "pnnbao-ump/VieNeu-TTS-0.3B-q8-gguf"
+
+VOICE_MAP = {"binh": "Binh", "tuyen": "Tuyen", "nguyen": "Nguyen", "son": "Son",
+             "vinh": "Vinh", "huong": "Huong", "ly": "Ly", "ngoc": "Ngoc",
+             "doan": "Doan", "dung": "Dung"}
+
+
+def preset_voice(tts, name: str):
+    '''Resolve a voice name to a VieNeu preset voice (falls back to Binh/Tuyen).'''
+    voices = tts.list_preset_voices()
+    available = [v[1] if isinstance(v, tuple) else v for v in voices]
+    target = VOICE_MAP.get(name.lower(), name.capitalize())
+    if target in available:
+        return tts.get_preset_voice(target)
+    for v in ["Binh", "Tuyen"]:
+        if v in available:
+            return tts.get_preset_voice(v)
+    return None
+
+
+def split_script(text: str, max_words: int = 40) -> List[str]:
+    '''Group sentences into synthesis units of at most max_words words.'''
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+    units, current = [], []
+    for sentence in sentences:
+        if current and len(' '.join(current + [sentence]).split()) > max_words:
+            units.append(' '.join(current))
+            current = []
+        current.append(sentence)
+    if current:
+        units.append(' '.join(current))
+    return units
+
+
+def load_vieneu():
+    '''Default worker backend: the q8 GGUF VieNeu-TTS backbone.'''
+    from vieneu import Vieneu
+    return Vieneu(backbone_repo=CPU_BACKBONE)
+
+
+def _worker_main(tasks, results, threads: int, backend: Callable):
+    '''Worker process: build a synthesizer, synthesize units, return PCM via shared memory.'''
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    try:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+        tts = backend()
+        voices = {}
+    except Exception as e:
+        results.put(('error', None, None, f"TTS worker init failed: {e}"))
+        return
+    results.put(('ready', os.getpid(), None, None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        job_id, index, text, voice_name = task
+        try:
+            if voice_name not in voices:
+                voices[voice_name] = preset_voice(tts, voice_name)
+            audio = np.ascontiguousarray(
+                tts.infer(text=text, voice=voices[voice_name], temperature=0.8, top_k=50), dtype=np.float32)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, audio.nbytes))
+            np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+            results.put(('done', job_id, index, (shm.name, audio.shape[0])))
+            shm.close()
+        except Exception as e:
+            results.put(('error', job_id, index, f"{type(e).__name__}: {e}"))
+
+
+class _Job:
+    def __init__(self, units: int):
+        self.parts: List[np.ndarray] = [None] * units
+        self.remaining = units
+        self.error = None
+        self.done = threading.Event()
+
+
+class TTSPool:
+    '''
+    Pool of VieNeu-TTS worker processes.
+
+    Responsibilities:
+    - Start N backbone instances sized to a core budget
+    - Distribute sentence groups of one or many scripts across workers
+    - Reassemble PCM in order from shared memory
+    - Fail jobs whose worker raised or exited
+    '''
+
+    def __init__(self, workers: int = None, threads_per_worker: int = 2, cores: int = None,
+                 backend: Callable = load_vieneu):
+        '''
+        Initialize the pool (processes start on start()).
+
+        Args:
+            workers: Number of worker processes (default: cores // threads_per_worker)
+            threads_per_worker: CPU threads each backbone may use (lowered so workers fit in cores)
+            cores: Core budget for the whole pool (default: cores available to the process;
+                MediaGenerator passes the scheduler's 'tts' budget)
+            backend: Picklable callable run in each worker that returns a synthesizer with
+                VieNeu's infer/list_preset_voices/get_preset_voice methods
+        '''
+        cores = cores or available_cores()
+        self.workers = workers or max(1, cores // threads_per_worker)
+        self.threads = max(1, min(threads_per_worker, cores // self.workers))
+        self.backend = backend
+        self._ctx = mp.get_context('spawn')
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._procs = []
+        self._jobs: Dict[int, _Job] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._collector = None
+
+    def start(self):
+        '''Start workers and wait until every backbone is loaded.'''
+        for _ in range(self.workers):
+            proc = self._ctx.Process(target=_worker_main, args=(self._tasks, self._results, self.threads, self.backend),
+                                     daemon=True)
+            proc.start()
+            self._procs.append(proc)
+        ready = 0
+        while ready < self.workers:
+            try:
+                kind, _, _, error = self._results.get(timeout=1)
+            except queue.Empty:
+                if self._dead():
+                    self.close()
+                    raise RuntimeError("TTS worker exited during startup")
+                continue
+            if kind == 'error':
+                self.close()
+                raise RuntimeError(error)
+            ready += 1
+        self._stop.clear()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        print(f"   ✓ TTS pool ready ({self.workers} workers x {self.threads} threads)")
+        return self
+
+    def _collect(self):
+        '''Route worker results to their jobs, copying PCM out of shared memory.'''
+        while not self._stop.is_set():
+            try:
+                kind, job_id, index, payload = self._results.get(timeout=1)
+            except queue.Empty:
+                if self._dead():
+                    for job in list(self._jobs.values()):
+                        job.error = "worker process exited"
+                        job.done.set()
+                continue
+            job = self._jobs.get(job_id)
+            if kind == 'done':
+                name, length = payload
+                shm = shared_memory.SharedMemory(name=name)
+                try:
+                    if job:
+                        job.parts[index] = np.ndarray((length,), dtype=np.float32, buffer=shm.buf).copy()
+                finally:
+                    shm.close()
+                    shm.unlink()
+            elif job:
+                job.error = payload
+            if job:
+                job.remaining -= 1
+                if job.remaining == 0 or job.error:
+                    job.done.set()
+
+    def _dead(self) -> bool:
+        return any(not proc.is_alive() for proc in self._procs)
+
+    def synthesize(self, text: str, voice: str, gap: float = 0.1) -> np.ndarray:
+        '''
+        Synthesize a script in parallel; safe to call from several threads.
+
+        Args:
+            text: Script text
+            voice: Voice name
+            gap: Seconds of silence between synthesis units
+
+        Returns:
+            float32 PCM at SAMPLE_RATE
+        '''
+        units = split_script(text)
+        if not units:
+            return np.zeros(0, dtype=np.float32)
+        with self._lock:
+            job_id = next(self._ids)
+            job = self._jobs[job_id] = _Job(len(units))
+        for index, unit in enumerate(units):
+            self._tasks.put((job_id, index, unit, voice))
+        job.done.wait()
+        del self._jobs[job_id]
+        if job.error:
+            raise RuntimeError(f"TTS worker failed: {job.error}")
+        silence = np.zeros(int(gap * SAMPLE_RATE), dtype=np.float32)
+        pieces = []
+        for i, part in enumerate(job.parts):
+            pieces.extend([part, silence] if i < len(job.parts) - 1 else [part])
+        return np.concatenate(pieces)
+
+    def close(self):
+        '''Stop workers.'''
+        for _ in self._procs:
+            self._tasks.put(None)
+        for proc in self._procs:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+        self._procs = []
+        if self._collector:
+            # Not a sentinel on the results queue: a worker that died mid-put can
+            # hold that queue's write lock forever.
+            self._stop.set()
+            self._collector.join()
+            self._collector = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
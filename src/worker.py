@@ -0,0 +1,190 @@
+"""
+Worker Module - Queue worker CLI running TikTokNewsGenerator.
+
+Several worker processes (on one or many machines sharing the queue backend)
+lease jobs, keep the lease alive with heartbeats while rendering and report
+success or failure back to the queue.
+
+Usage:
+    python src/worker.py enqueue https://vnexpress.net/... --priority 0
+    python src/worker.py harvest https://vnexpress.net/rss/tin-moi-nhat.rss --limit 20
+    python src/worker.py run --worker-id box1-a
+    python src/worker.py stats
+"""
+import os
+import json
+import time
+import socket
+import argparse
+import threading
+from typing import Callable
+from jobqueue import JobQueue, SQLiteJobQueue
+from dedup import DuplicateArticle
+
+
+class QueueWorker:
+    '''
+    Pulls jobs from a JobQueue and renders them.
+
+    Responsibilities:
+    - Lease jobs and heartbeat while a job runs
+    - Use the job's idempotent output name so retries overwrite, not duplicate
+    - Report completion or failure (retry/backoff/dead-letter handled by the queue)
+    '''
+
+    def __init__(self, job_queue: JobQueue, generator_factory: Callable = None, worker_id: str = None,
+                 lease_seconds: float = 300, heartbeat_interval: float = 30, poll_interval: float = 5):
+        '''
+        Initialize the worker.
+
+        Args:
+            job_queue: Queue backend
+            generator_factory: Callable returning an object with generate_video(); defaults to TikTokNewsGenerator
+            worker_id: Unique worker name (default host:pid)
+            lease_seconds: Lease length; must exceed heartbeat_interval
+            heartbeat_interval: Seconds between lease extensions
+            poll_interval: Seconds to sleep when the queue is empty
+        '''
+        self.queue = job_queue
+        self.generator_factory = generator_factory or self._default_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.generator = None
+
+    @staticmethod
+    def _default_factory():
+        from main import TikTokNewsGenerator
+        return TikTokNewsGenerator()
+
+    def run(self, max_jobs: int = None, exit_when_empty: bool = False) -> int:
+        '''
+        Process jobs until stopped.
+
+        Args:
+            max_jobs: Stop after this many jobs
+            exit_when_empty: Return instead of polling when no job is available
+
+        Returns:
+            Number of jobs processed
+        '''
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            job = self.queue.lease(self.worker_id, self.lease_seconds)
+            if job is None:
+                if exit_when_empty:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.process(job)
+            processed += 1
+        return processed
+
+    def process(self, job: dict) -> bool:
+        '''Run one leased job with a heartbeat thread. Returns True on success.'''
+        if self.generator is None:
+            self.generator = self.generator_factory()
+        print(f"\n▶ [{self.worker_id}] Job {job['id']} attempt {job['attempts']}: {job['url']}")
+
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def beat():
+            while not stop.wait(self.heartbeat_interval):
+                if not self.queue.heartbeat(job['id'], self.worker_id, self.lease_seconds):
+                    lost.set()
+                    return
+
+        heartbeat = threading.Thread(target=beat, daemon=True)
+        heartbeat.start()
+        duplicate = None
+        try:
+            video_path = self.generator.generate_video(job['url'], output_name=job['output_name'],
+                                                       mode=job['options'].get('mode', 'final'))
+            error = None
+        except DuplicateArticle as e:
+            # Not retryable: record the match as the job's result
+            video_path, error = None, None
+            duplicate = e.match
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if lost.is_set():
+            print(f"   ⚠ Lease lost for job {job['id']}; result discarded")
+            return False
+        if error:
+            status = self.queue.fail(job['id'], self.worker_id, error)
+            print(f"   ❌ Job {job['id']} failed ({status}): {error}")
+            return False
+        if duplicate:
+            self.queue.complete(job['id'], self.worker_id, {'video_path': None, 'duplicate_of': duplicate})
+            print(f"   ⏭ Job {job['id']} skipped: near-duplicate of {duplicate['url']}")
+            return True
+        self.queue.complete(job['id'], self.worker_id, {'video_path': video_path})
+        print(f"   ✓ Job {job['id']} done: {video_path}")
+        return True
+
+
+def main():
+    '''CLI entry point.'''
+    parser = argparse.ArgumentParser(description='TikTok News Video queue worker')
+    parser.add_argument('--queue', type=str, default='output/queue.db', help='SQLite queue database')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = sub.add_parser('enqueue', help='Add article URLs to the queue')
+    enqueue.add_argument('urls', nargs='+')
+    enqueue.add_argument('--priority', type=int, default=1, help='Lower runs first (0 = breaking news)')
+    enqueue.add_argument('--mode', type=str, default='final', help='Render mode (final or preview)')
+    enqueue.add_argument('--max-attempts', type=int, default=3)
+
+    run = sub.add_parser('run', help='Process jobs')
+    run.add_argument('--worker-id', type=str)
+    run.add_argument('--max-jobs', type=int)
+    run.add_argument('--exit-when-empty', action='store_true')
+    run.add_argument('--lease', type=float, default=300, help='Lease length in seconds')
+    run.add_argument('--heartbeat', type=float, default=30, help='Heartbeat interval in seconds')
+    run.add_argument('--dedup', type=str, choices=['flag', 'skip'], help='Flag or skip near-duplicate articles')
+
+    harvest = sub.add_parser('harvest', help='Crawl category/RSS listings and enqueue the new articles')
+    harvest.add_argument('listings', nargs='+')
+    harvest.add_argument('--limit', type=int, help='Max articles to crawl')
+    harvest.add_argument('--priority', type=int, default=1, help='Lower runs first (0 = breaking news)')
+    harvest.add_argument('--mode', type=str, default='final', help='Render mode (final or preview)')
+
+    sub.add_parser('stats', help='Show job counts and dead letters')
+    sub.add_parser('requeue-dead', help='Retry dead-lettered jobs')
+    args = parser.parse_args()
+
+    job_queue = SQLiteJobQueue(args.queue)
+    if args.command == 'enqueue':
+        for url in args.urls:
+            job = job_queue.enqueue(url, {'mode': args.mode}, args.priority, args.max_attempts)
+            print(f"✓ Job {job['id']} ({job['status']}): {url}")
+    elif args.command == 'harvest':
+        from crawler import AsyncCrawler, JobQueueSink
+        sink = JobQueueSink(job_queue, {'mode': args.mode}, args.priority)
+        AsyncCrawler().run(args.listings, sink, args.limit)
+        print(f"✓ Enqueued {len(sink.jobs)} jobs")
+    elif args.command == 'run':
+        factory = None
+        if args.dedup:
+            from main import TikTokNewsGenerator
+            factory = lambda: TikTokNewsGenerator(dedup=args.dedup)
+        worker = QueueWorker(job_queue, factory, worker_id=args.worker_id, lease_seconds=args.lease,
+                             heartbeat_interval=args.heartbeat)
+        processed = worker.run(max_jobs=args.max_jobs, exit_when_empty=args.exit_when_empty)
+        print(f"\n✓ Processed {processed} jobs")
+    elif args.command == 'stats':
+        print(json.dumps(job_queue.stats(), indent=2))
+        for job in job_queue.dead_letters():
+            print(f"   ✗ {job['id']} {job['url']}: {job['error']}")
+    elif args.command == 'requeue-dead':
+        print(f"✓ Requeued {job_queue.requeue_dead()} jobs")
+
+
+if __name__ == "__main__":
+    main()
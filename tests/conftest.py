@@ -0,0 +1,25 @@
+import os
+import sys
+
+# Modules under src/ import each other by flat name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def pytest_addoption(parser):
+    parser.addoption('--run-slow', action='store_true', help='Also run tests marked slow')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'slow: long-running test, skipped unless --run-slow is given')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-slow'):
+        return
+    import pytest
+    skip = pytest.mark.skip(reason="slow test (use --run-slow)")
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip)
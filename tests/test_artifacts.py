@@ -0,0 +1,122 @@
+import os
+import json
+import time
+from artifacts import ArtifactStore
+
+
+def _file(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+def _age(store, job, days):
+    '''Backdate a job's manifest.'''
+    path = os.path.join(store.manifests_dir, f"{job}.json")
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['created'] = manifest['updated'] = time.time() - days * 86400
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+
+def _roles(store, job):
+    manifest = store._load(job)
+    return None if manifest is None else sorted({e['role'] for e in manifest['artifacts']})
+
+
+def test_identical_files_share_one_object(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'store'))
+    a = _file(tmp_path / 'a' / 'img.jpg', b'same image' * 100)
+    b = _file(tmp_path / 'b' / 'img.jpg', b'same image' * 100)
+    store.record('a', {'images': [a]})
+    store.record('b', {'images': [b]})
+    assert os.path.samefile(a, b)
+    assert os.stat(a).st_nlink == 3
+    stats = store.stats()
+    assert (stats['jobs'], stats['objects']) == (2, 1)
+
+
+def test_existing_object_is_linked_not_overwritten(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'store'))
+    first = _file(tmp_path / 'first.mp3', b'voice')
+    entry = store.put(first)
+    obj = store._object_path(entry['sha1'], '.mp3')
+    inode = os.stat(obj).st_ino
+    # Same content already stored (e.g. by another process): the name is relinked
+    second = _file(tmp_path / 'second.mp3', b'voice')
+    assert store.put(second)['sha1'] == entry['sha1']
+    assert os.path.samefile(second, obj) and os.stat(obj).st_ino == inode
+    assert store.put(second)['bytes'] == 5
+
+
+def test_writable_detaches_stored_names_only(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'store'))
+    stored = _file(tmp_path / 'voice.srt', b'1\n')
+    store.put(stored)
+    plain = _file(tmp_path / 'plain.srt', b'2\n')
+    ArtifactStore.writable(stored, plain, str(tmp_path / 'missing.srt'))
+    assert not os.path.exists(stored) and os.path.exists(plain)
+    _file(tmp_path / 'voice.srt', b'rewritten\n')
+    objects = store._objects()
+    assert len(objects) == 1 and open(next(iter(objects.values()))[0], 'rb').read() == b'1\n'
+
+
+def test_age_expiry_keeps_deliverables(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'store'))
+    image = _file(tmp_path / 'old' / 'img.jpg', b'image')
+    audio = _file(tmp_path / 'old' / 'voice.mp3', b'audio')
+    video = _file(tmp_path / 'old' / 'video.mp4', b'video')
+    summary = _file(tmp_path / 'old' / 'old.json', b'{}')
+    store.record('old', {'images': [image], 'audio': [audio], 'video': [video], 'summary': [summary]})
+    store.record('new', {'images': [_file(tmp_path / 'new' / 'img.jpg', b'new image')]})
+    _age(store, 'old', 10)
+
+    result = store.gc(max_age_days=7)
+    assert result['expired_entries'] == 2
+    assert _roles(store, 'old') == ['summary', 'video']
+    assert _roles(store, 'new') == ['images']
+    assert not os.path.exists(image) and not os.path.exists(audio)
+    assert os.path.exists(video) and os.path.exists(summary)
+
+
+def test_size_budget_drops_oldest_jobs(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'store'))
+    paths = {}
+    for days, job in [(3, 'oldest'), (2, 'older'), (1, 'newest')]:
+        paths[job] = _file(tmp_path / job / 'video.mp4', job.encode() * 1000)
+        store.record(job, {'video': [paths[job]]})
+        _age(store, job, days)
+
+    result = store.gc(max_bytes=len(b'newest') * 1000 + len(b'older') * 1000)
+    assert result['dropped_jobs'] == 1
+    assert [m['job'] for m in store.manifests()] == ['older', 'newest']
+    assert not os.path.exists(paths['oldest']) and os.path.exists(paths['older'])
+
+
+def test_orphans_kept_during_grace(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'store'))
+    entry = store.put(_file(tmp_path / 'pending.jpg', b'not in a manifest yet'))
+    obj = store._object_path(entry['sha1'], '.jpg')
+    assert store.gc()['deleted_objects'] == 0 and os.path.exists(obj)
+
+    os.utime(obj, (time.time() - 7200,) * 2)
+    result = store.gc()
+    assert result['deleted_objects'] == 1 and result['freed_bytes'] == len(b'not in a manifest yet')
+    assert not os.path.exists(obj)
+
+
+def test_path_shared_between_manifests_survives_dropping_one(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'store'), orphan_grace=0)
+    shared = _file(tmp_path / 'shared' / 'logo.png', b'logo')
+    store.record('first', {'images': [shared]})
+    store.record('second', {'images': [shared]})
+    _age(store, 'first', 10)
+
+    store.gc(max_age_days=7)
+    assert _roles(store, 'first') is None
+    assert os.path.exists(shared) and store.gc()['deleted_objects'] == 0
+
+    _age(store, 'second', 10)
+    assert store.gc(max_age_days=7)['deleted_objects'] == 1
+    assert not os.path.exists(shared) and not store._objects()
@@ -0,0 +1,88 @@
+import os
+import threading
+import numpy as np
+import soundfile as sf
+from PIL import Image
+from assets import AssetRegistry, FONT_PATHS, shared_assets
+from media import MediaGenerator
+
+
+def _image(path, color):
+    Image.new('RGBA', (40, 20), color).save(path)
+    return str(path)
+
+
+def _wav(path, value, frames=800, rate=8000):
+    sf.write(path, np.full((frames, 2), value, dtype=np.float32), rate)
+    return str(path)
+
+
+def _touch_later(path):
+    '''Move mtime forward so a rewrite within the same tick still invalidates.'''
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_overlay_loaded_once_per_size(tmp_path):
+    assets = AssetRegistry()
+    path = _image(tmp_path / 'overlay.png', (255, 0, 0, 128))
+    first = assets.overlay(path, (16, 8))
+    assert first.shape == (8, 16, 4) and tuple(first[0, 0]) == (255, 0, 0, 128)
+    assert not first.flags.writeable
+    assert assets.overlay(path, (16, 8)) is first
+    assert (assets.loads, assets.hits) == (1, 1)
+    assert assets.overlay(path, (32, 16)).shape == (16, 32, 4)
+    assert assets.loads == 2
+
+
+def test_audio_loaded_once_and_reloaded_on_change(tmp_path):
+    assets = AssetRegistry()
+    path = _wav(tmp_path / 'whoosh.wav', 0.25)
+    pcm, rate = assets.audio(path)
+    assert rate == 8000 and pcm.shape == (800, 2) and not pcm.flags.writeable
+    assert assets.audio(path)[0] is pcm
+    assert (assets.loads, assets.hits) == (1, 1)
+
+    _wav(path, 0.5)
+    _touch_later(path)
+    reloaded, _ = assets.audio(path)
+    assert reloaded is not pcm and np.allclose(reloaded, 0.5)
+    assert assets.loads == 2
+    assert assets.stats()['entries'] == 1
+
+
+def test_overlay_reloaded_when_file_changes(tmp_path):
+    assets = AssetRegistry()
+    path = _image(tmp_path / 'overlay.png', (255, 0, 0, 255))
+    assets.overlay(path, (16, 8))
+    _image(path, (0, 0, 255, 255))
+    _touch_later(path)
+    assert tuple(assets.overlay(path, (16, 8))[0, 0]) == (0, 0, 255, 255)
+    assert assets.loads == 2
+
+
+def test_font_cached_by_size(tmp_path):
+    assets = AssetRegistry(font_paths=[str(tmp_path / 'missing.ttf')] + FONT_PATHS)
+    font = assets.font(24)
+    assert assets.font(24) is font
+    assets.font(32)
+    assert (assets.loads, assets.hits) == (2, 1)
+
+
+def test_concurrent_requests_decode_once(tmp_path):
+    assets = AssetRegistry()
+    path = _wav(tmp_path / 'ding.wav', 0.1)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(assets.audio(path)[0])) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert assets.loads == 1 and all(pcm is results[0] for pcm in results)
+
+
+def test_media_generators_share_the_process_registry():
+    first, second = MediaGenerator(load_tts=False), MediaGenerator(load_tts=False)
+    assert first.assets is second.assets is shared_assets()
+    own = AssetRegistry()
+    assert MediaGenerator(load_tts=False, assets=own).assets is own
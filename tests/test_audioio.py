@@ -0,0 +1,39 @@
+import shutil
+import numpy as np
+import pytest
+import soundfile as sf
+import audioio
+from audioio import write_audio, audio_duration
+
+
+def _tone(seconds=1.0, rate=24000):
+    t = np.arange(int(seconds * rate)) / rate
+    return (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg not installed")
+def test_mp3_falls_back_to_ffmpeg_when_soundfile_rejects_options(tmp_path, monkeypatch):
+    real_write = sf.write
+
+    def old_soundfile_write(path, data, rate, **kwargs):
+        if 'bitrate_mode' in kwargs:
+            raise TypeError("write() got an unexpected keyword argument 'bitrate_mode'")
+        return real_write(path, data, rate, **kwargs)
+
+    monkeypatch.setattr(audioio.sf, 'write', old_soundfile_write)
+    monkeypatch.setattr(audioio.sf, 'available_formats', lambda: {'WAV': 'WAV', 'MP3': 'MPEG-2 Audio'})
+    out = write_audio(_tone(), 24000, str(tmp_path / 'voice.mp3'))
+    assert out.endswith('.mp3')
+    assert audio_duration(out) == pytest.approx(1.0, abs=0.1)
+    assert (tmp_path / 'voice.wav').exists()
+
+
+def test_wav_is_kept_when_no_mp3_encoder_works(tmp_path, monkeypatch):
+    def broken_ffmpeg(*args):
+        raise RuntimeError("ffmpeg missing")
+
+    monkeypatch.setattr(audioio.sf, 'available_formats', lambda: {'WAV': 'WAV'})
+    monkeypatch.setattr(audioio, '_ffmpeg_mp3', broken_ffmpeg)
+    out = write_audio(_tone(), 24000, str(tmp_path / 'voice.mp3'), keep_wav=False)
+    assert out.endswith('.wav')
+    assert audio_duration(out) == pytest.approx(1.0, abs=0.01)
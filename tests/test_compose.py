@@ -0,0 +1,88 @@
+import os
+import re
+import shutil
+import subprocess
+import numpy as np
+import pytest
+from PIL import Image
+
+pytestmark = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg not on PATH")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _probe(path):
+    '''(duration seconds, stream descriptions) of a media file.'''
+    info = subprocess.run(['ffmpeg', '-i', path], capture_output=True, text=True).stderr
+    h, m, s = re.search(r'Duration: (\d+):(\d+):([\d.]+)', info).groups()
+    return int(h) * 3600 + int(m) * 60 + float(s), re.findall(r'Stream #\S+: (Video|Audio)', info)
+
+
+def _media_deps():
+    for module in ('moviepy', 'pysrt', 'whisper'):
+        pytest.importorskip(module)
+
+
+@pytest.fixture
+def story(tmp_path, monkeypatch):
+    _media_deps()
+    import soundfile as sf
+    from media import MediaGenerator, VideoClip
+
+    # Outputs and caches stay in tmp_path; media reads assets/ relative to the cwd
+    monkeypatch.chdir(tmp_path)
+    os.symlink(os.path.join(ROOT, 'assets'), tmp_path / 'assets')
+    # Every frame must go through FFmpegFrameWriter, never MoviePy's per-frame writer
+    monkeypatch.setattr(VideoClip, 'write_videofile', lambda *a, **k: pytest.fail("write_videofile used"))
+    images = []
+    for i in range(3):
+        path = tmp_path / f"img{i}.jpg"
+        noise = np.random.default_rng(i).integers(0, 255, (90, 160, 3), dtype=np.uint8)
+        Image.fromarray(noise).resize((1600, 900)).save(path)
+        images.append(str(path))
+    rate = 24000
+    voice = tmp_path / 'voice.wav'
+    sf.write(voice, (0.2 * np.sin(2 * np.pi * 220 * np.arange(rate * 6) / rate)).astype(np.float32), rate)
+    srt = tmp_path / 'voice.srt'
+    srt.write_text("1\n00:00:00,000 --> 00:00:02,500\nXin chào các bạn\n\n"
+                   "2\n00:00:02,500 --> 00:00:05,500\nTin nóng hôm nay\n", encoding='utf-8')
+    media = MediaGenerator(load_tts=False)
+    media.image_cache.cache_dir = str(tmp_path / 'image-cache')
+    os.makedirs(media.image_cache.cache_dir)
+    media.set_render_mode('preview')
+    return media, images, str(voice), str(srt), tmp_path
+
+
+@pytest.mark.parametrize('intro, duration', [(None, 6.0), (2.0, 8.0)])
+def test_compose_renders_through_frame_writer(story, intro, duration):
+    media, images, voice, srt, tmp_path = story
+    output = str(tmp_path / 'out.mp4')
+    media.compose_video(images, voice, srt, output, 6.0, title="Giá vàng tăng mạnh", intro_duration=intro)
+    seconds, streams = _probe(output)
+    assert abs(seconds - duration) < 0.2
+    assert streams == ['Video', 'Audio']
+
+
+def test_per_frame_intro_fallback(story, monkeypatch):
+    import media as media_module
+    media, images, voice, srt, tmp_path = story
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("still encode unavailable")
+
+    monkeypatch.setattr(media_module, 'encode_still', fail)
+    output = str(tmp_path / 'fallback.mp4')
+    media.compose_video(images, voice, srt, output, 6.0, title="Giá vàng", intro_duration=2.0)
+    seconds, streams = _probe(output)
+    assert abs(seconds - 8.0) < 0.2 and streams == ['Video', 'Audio']
+
+
+def test_fading_intro_fades_to_black():
+    _media_deps()
+    from media import MediaGenerator
+    intro = np.full((4, 4, 3), 200, dtype=np.uint8)
+    render = MediaGenerator._fading_intro(intro, 2.0)
+    out = np.empty_like(intro)
+    render(0.0, out)
+    assert (out == 200).all()
+    render(1.75, out)
+    assert (out == 100).all()
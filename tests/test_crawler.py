@@ -0,0 +1,71 @@
+import os
+import time
+import queue
+import pytest
+
+pytest.importorskip('aiohttp')
+from crawler import AsyncCrawler, JobQueueSink
+from jobqueue import SQLiteJobQueue
+from stubs import FakeNewsSite
+
+
+@pytest.fixture
+def site():
+    with FakeNewsSite(articles=6, images_per_article=3) as stub:
+        stub.register_fixture_site()
+        yield stub
+
+
+def test_harvest_discovers_and_crawls_listing(site, tmp_path):
+    crawler = AsyncCrawler(output_dir=str(tmp_path), min_interval=0)
+    articles = crawler.run([f"{site.url}/listing"])
+    assert sorted(a['url'] for a in articles) == sorted(site.article_url(i) for i in range(6))
+    assert all(a['title'].startswith("Bản tin thử nghiệm") and a['content'] for a in articles)
+
+
+def test_harvest_dedups_by_canonical_url(site, tmp_path):
+    crawler = AsyncCrawler(output_dir=str(tmp_path), min_interval=0)
+    listing = f"{site.url}/listing"
+    assert len(crawler.run([listing, listing + "?page=1"])) == 6
+    assert crawler.run([listing]) == []
+
+
+def test_harvest_limit_and_job_queue(site, tmp_path):
+    jobs = queue.Queue()
+    articles = AsyncCrawler(output_dir=str(tmp_path), min_interval=0).run([f"{site.url}/listing"], jobs, limit=2)
+    assert len(articles) == 2 and jobs.qsize() == 2
+
+
+def test_per_host_request_spacing(site, tmp_path):
+    crawler = AsyncCrawler(output_dir=str(tmp_path), per_host=4, min_interval=0.05)
+    start = time.perf_counter()
+    crawler.run([f"{site.url}/listing"], limit=2)
+    assert time.perf_counter() - start >= (site.hits - 1) * 0.05
+
+
+def test_per_host_concurrency(tmp_path):
+    with FakeNewsSite(articles=4, images_per_article=0, latency=0.2) as slow:
+        slow.register_fixture_site()
+        crawler = AsyncCrawler(output_dir=str(tmp_path), per_host=1, min_interval=0)
+        start = time.perf_counter()
+        assert len(crawler.run([f"{slow.url}/listing"])) == 4
+        assert time.perf_counter() - start >= 4 * 0.2
+
+
+def test_images_are_selected_and_saved(site, tmp_path):
+    article = AsyncCrawler(output_dir=str(tmp_path), min_interval=0).run([f"{site.url}/listing"], limit=1)[0]
+    stats = article['image_stats']
+    # The 24px icon is dropped by the size probe; the three figures are kept
+    assert stats['candidates'] == 4 and stats['too_small'] == 1 and stats['selected'] == 3
+    assert len(article['images']) == 3
+    assert all(os.path.exists(p) and p.startswith(str(tmp_path)) for p in article['images'])
+
+
+def test_job_queue_sink_enqueues_video_jobs(site, tmp_path):
+    job_queue = SQLiteJobQueue(str(tmp_path / 'queue.db'))
+    sink = JobQueueSink(job_queue, {'mode': 'preview'}, priority=0)
+    AsyncCrawler(output_dir=str(tmp_path), min_interval=0).run([f"{site.url}/listing"], sink, limit=3)
+    assert job_queue.stats()['pending'] == 3
+    job = job_queue.lease('w1')
+    assert job['options'] == {'mode': 'preview'} and job['priority'] == 0
+    assert job['url'] in [site.article_url(i) for i in range(6)]
@@ -0,0 +1,93 @@
+import random
+import threading
+import time
+import pytest
+from dedup import DuplicateIndex
+
+WORDS = ("giá vàng tăng mạnh sáng nay trong nước thế giới ngân hàng nhà nước thị trường nhà đầu tư "
+         "chứng khoán bất động sản lãi suất tỷ giá xuất khẩu nông sản doanh nghiệp chính phủ").split()
+DAY = 86400
+
+
+def _article(url, seed, words=200):
+    rng = random.Random(seed)
+    return {'url': url, 'title': f"Bài {seed}", 'content': ' '.join(rng.choice(WORDS) for _ in range(words))}
+
+
+def _edited(article, url, changes=5):
+    words = article['content'].split()
+    for i in range(changes):
+        words[i * 37] = 'khác'
+    return dict(article, url=url, content=' '.join(words))
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DuplicateIndex(str(tmp_path / 'dedup.db'))
+    yield index
+    index.close()
+
+
+def test_near_copy_is_a_duplicate_and_other_stories_are_not(index):
+    original = _article('https://vnexpress.net/a-1.html', 1)
+    assert index.check(original) is None
+    match = index.check(_edited(original, 'https://tuoitre.vn/b-2.htm'))
+    assert match['url'] == original['url'] and match['similarity'] >= index.threshold
+    assert index.check(_article('https://tuoitre.vn/c-3.htm', 2)) is None
+    # Duplicates are reported, not stored
+    assert index.stats()['articles'] == 2
+
+
+def test_matches_only_within_the_window(tmp_path):
+    index = DuplicateIndex(str(tmp_path / 'dedup.db'), window_days=1)
+    original = _article('https://vnexpress.net/a-1.html', 1)
+    now = time.time()
+    index.check(original, now=now - 2 * DAY)
+    assert index.check(_edited(original, 'https://tuoitre.vn/b-2.htm'), now=now) is None
+    assert index.check(_edited(original, 'https://dantri.com.vn/c-3.htm', changes=3), now=now)['url'] == \
+        'https://tuoitre.vn/b-2.htm'
+
+
+def test_reprocessing_the_same_url_is_not_a_duplicate(index):
+    article = _article('https://vnexpress.net/a-1.html', 1)
+    assert index.check(article) is None
+    assert index.check(article) is None
+    assert index.query(index._text(article), exclude_url=article['url']) == []
+    assert [m['url'] for m in index.query(index._text(article))] == [article['url']]
+    assert index.stats()['articles'] == 1
+
+
+def test_prune_removes_old_articles_and_their_bands(index):
+    index.add(_article('https://vnexpress.net/old.html', 1), now=time.time() - 40 * DAY)
+    index.add(_article('https://vnexpress.net/new.html', 2))
+    assert index.prune(30) == 1
+    assert index.stats()['articles'] == 1
+    with index._tx() as db:
+        assert db.execute("SELECT COUNT(DISTINCT article_id) FROM bands").fetchone()[0] == 1
+
+
+def test_reopening_with_other_minhash_parameters_fails(tmp_path):
+    DuplicateIndex(str(tmp_path / 'dedup.db')).close()
+    DuplicateIndex(str(tmp_path / 'dedup.db'), window_days=7).close()
+    with pytest.raises(ValueError, match="different MinHash parameters"):
+        DuplicateIndex(str(tmp_path / 'dedup.db'), num_perm=64)
+
+
+def test_concurrent_checks_of_one_story_record_it_once(tmp_path):
+    original = _article('https://vnexpress.net/a-1.html', 1)
+    copies = [_edited(original, f"https://site{i}.vn/a.html", changes=i) for i in range(1, 7)]
+    indexes = [DuplicateIndex(str(tmp_path / 'dedup.db')) for _ in copies]
+    results = [None] * len(copies)
+
+    def run(i):
+        results[i] = indexes[i].check(copies[i])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(copies))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(result is None for result in results) == 1
+    assert indexes[0].stats()['articles'] == 1
+    for index in indexes:
+        index.close()
@@ -0,0 +1,41 @@
+import os
+import json
+import glob
+import pytest
+from conftest import FIXTURES
+from extractive import compress, estimate_tokens, benchmark, _load_fixture
+
+ARTICLES = sorted(glob.glob(os.path.join(FIXTURES, 'articles', '*.txt')))
+RESULTS = os.path.join(FIXTURES, 'articles', 'precompress_results.json')
+
+
+@pytest.mark.parametrize('path', ARTICLES, ids=os.path.basename)
+def test_compress_keeps_sentences_in_order_within_budget(path):
+    article = _load_fixture(path)
+    result = compress(article['content'], 2000)
+    assert result['kept'] < result['total']
+    assert result['tokens_after'] <= 2000
+    assert estimate_tokens(result['text']) <= 2000
+    positions = [article['content'].index(s) for s in result['text'].split('. ') if s]
+    assert positions == sorted(positions)
+
+
+def test_short_text_is_unchanged():
+    text = "Câu thứ nhất khá ngắn. Câu thứ hai cũng ngắn."
+    assert compress(text, 2000)['text'] == text
+
+
+def test_recorded_results_match_fixtures():
+    pytest.importorskip('torch')
+    pytest.importorskip('transformers')
+    with open(RESULTS, encoding='utf-8') as f:
+        recorded = {os.path.basename(r['article']): r for r in json.load(f)['articles']}
+    assert sorted(recorded) == [os.path.basename(p) for p in ARTICLES]
+
+    for row in benchmark(ARTICLES):
+        expected = recorded[os.path.basename(row['article'])]
+        assert row['words'] == expected['words']
+        for label in ('chunked', 'precompressed'):
+            assert row[label]['calls'] == expected[label]['calls']
+        assert row['precompressed']['calls'] <= 2
+        assert row['precompressed']['prompt_tokens'] < row['chunked']['prompt_tokens']
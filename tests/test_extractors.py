@@ -0,0 +1,54 @@
+import os
+import pytest
+from conftest import FIXTURES
+from extractors import SiteExtractor, benchmark, get_extractor, get_site
+
+PAGES = {
+    'vnexpress': ('vnexpress_article.html', 'https://vnexpress.net/lai-suat-dieu-hanh-du-kien-giam-4790001.html'),
+    'tienphong': ('tienphong_article.html', 'https://tienphong.vn/ha-noi-them-tuyen-xe-buyt-dien-post1650001.tpo'),
+}
+
+
+def _page(site):
+    name, url = PAGES[site]
+    with open(os.path.join(FIXTURES, 'pages', name), 'rb') as f:
+        return f.read(), url
+
+
+@pytest.mark.parametrize('site', sorted(PAGES))
+def test_region_parse_matches_full_parse(site):
+    content, url = _page(site)
+    extractor = get_extractor(url)
+    assert extractor.name == site
+    article = extractor.parse(content, url)
+    assert article == extractor.parse(content, url, partial=False)
+    assert article['title'] and article['description']
+    assert len(article['content'].split()) > 300
+    assert article['image_urls'] and all(u.startswith('https://') for u in article['image_urls'])
+    assert article['canonical_url'] == url
+
+
+def test_vnexpress_picks_widest_srcset_candidate():
+    content, url = _page('vnexpress')
+    images = get_extractor(url).parse(content, url)['image_urls']
+    assert len(images) == 4
+    assert all('w=1020' in u for u in images)
+
+
+def test_benchmark_with_site_argument(tmp_path):
+    content, _ = _page('tienphong')
+    # A saved page without a canonical link can only be benchmarked with --site
+    page = tmp_path / 'saved.html'
+    page.write_bytes(content.replace(b'rel="canonical"', b'rel="alternate"'))
+    with pytest.raises(ValueError):
+        benchmark([str(page)], repeat=1)
+    pytest.importorskip('bs4')
+    results = benchmark([str(page)], repeat=1, site='tienphong')
+    assert set(results) == {'bs4_html_parser', 'lxml_full', 'lxml_region'}
+
+
+def test_unknown_site_and_abstract_base():
+    with pytest.raises(ValueError):
+        get_site('nosuchsite')
+    with pytest.raises(TypeError):
+        SiteExtractor()
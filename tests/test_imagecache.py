@@ -0,0 +1,57 @@
+import os
+import shutil
+import numpy as np
+from PIL import Image
+from imagecache import ImageCache
+
+
+def _image(path, seed=0, size=(640, 360)):
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 255, (9, 16, 3), dtype=np.uint8)).resize(size).save(path, quality=90)
+    return str(path)
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ImageCache(str(tmp_path / 'cache'))
+    img = _image(tmp_path / 'a.jpg')
+    first = cache.background(img, 108, 192)
+    second = cache.background(img, 108, 192)
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert isinstance(second, np.memmap) and np.array_equal(first, second)
+    cache.cover(img, 108, 192)
+    assert cache.misses == 2
+
+
+def test_renamed_file_hits_by_content(tmp_path):
+    cache = ImageCache(str(tmp_path / 'cache'))
+    img = _image(tmp_path / 'a.jpg')
+    cache.foreground(img, 320, 180)
+    renamed = shutil.copy(img, tmp_path / 'renamed.jpg')
+    cache.foreground(renamed, 320, 180)
+    assert (cache.misses, cache.hits) == (1, 1)
+    other = _image(tmp_path / 'b.jpg', seed=1)
+    cache.foreground(other, 320, 180)
+    assert cache.misses == 2
+
+
+def test_lru_eviction_above_budget(tmp_path):
+    # Room for two 320x180 RGB foregrounds (plus .npy headers), not three
+    cache = ImageCache(str(tmp_path / 'cache'), max_bytes=2 * 320 * 180 * 3 + 1024)
+    paths = [_image(tmp_path / f'{i}.jpg', seed=i) for i in range(3)]
+    for i, path in enumerate(paths):
+        cache.foreground(path, 320, 180)
+        entry = [n for n in os.listdir(cache.cache_dir) if n.startswith(cache._content_hash(path))][0]
+        os.utime(os.path.join(cache.cache_dir, entry), (1000 + i, 1000 + i))
+    cache.foreground(paths[2], 320, 180)
+    names = os.listdir(cache.cache_dir)
+    assert len(names) == 2
+    assert not any(n.startswith(cache._content_hash(paths[0])) for n in names)
+
+
+def test_hash_memo_is_bounded(tmp_path):
+    cache = ImageCache(str(tmp_path / 'cache'), max_hashes=2)
+    paths = [_image(tmp_path / f'{i}.jpg', seed=i) for i in range(4)]
+    for path in paths:
+        cache._content_hash(path)
+    assert len(cache._hashes) == 2
+    assert [k[0] for k in cache._hashes] == [os.path.abspath(p) for p in paths[2:]]
@@ -0,0 +1,29 @@
+import pytest
+from imageselect import parse_srcset, pick_source
+
+
+@pytest.mark.parametrize('srcset', [
+    'a.jpg 300w,b.jpg 1080w',
+    'a.jpg 300w, b.jpg 1080w',
+    '  a.jpg   300w ,\n  b.jpg 1080w,  ',
+])
+def test_compact_and_spaced_lists(srcset):
+    assert parse_srcset(srcset) == [('a.jpg', 300.0, 'w'), ('b.jpg', 1080.0, 'w')]
+
+
+def test_commas_inside_urls_are_kept():
+    srcset = ('https://cdn.example/x.jpg?w=480,h=0,q=100 480w,'
+              'https://cdn.example/x.jpg?w=1020,h=0,q=100 1020w')
+    assert parse_srcset(srcset) == [('https://cdn.example/x.jpg?w=480,h=0,q=100', 480.0, 'w'),
+                                    ('https://cdn.example/x.jpg?w=1020,h=0,q=100', 1020.0, 'w')]
+
+
+def test_density_and_missing_descriptors():
+    assert parse_srcset('a.jpg, b.jpg 2x') == [('a.jpg', None, ''), ('b.jpg', 2.0, 'x')]
+    assert parse_srcset('a.jpg,, b.jpg 1.5x') == [('a.jpg', None, ''), ('b.jpg', 1.5, 'x')]
+    assert parse_srcset('') == []
+
+
+def test_pick_source_uses_closest_width_from_compact_srcset():
+    img = {'srcset': '/img/a.jpg 300w,/img/b.jpg 1080w,/img/c.jpg 2400w', 'src': '/img/a.jpg'}
+    assert pick_source(img, 'https://news.example/article.html') == 'https://news.example/img/b.jpg'
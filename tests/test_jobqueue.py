@@ -0,0 +1,100 @@
+import time
+import multiprocessing
+import pytest
+from jobqueue import JobQueue, SQLiteJobQueue
+
+PROCESSES = 4
+JOBS = 200
+
+
+def _drain(path, worker_id, leased):
+    '''Lease and complete jobs until the queue is empty; report every leased id.'''
+    queue = SQLiteJobQueue(path)
+    while True:
+        job = queue.lease(worker_id, lease_seconds=60)
+        if job is None:
+            return
+        leased.put((worker_id, job['id']))
+        assert queue.complete(job['id'], worker_id)
+
+
+def test_processes_lease_each_job_exactly_once(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    queue = SQLiteJobQueue(path)
+    ids = {queue.enqueue(f"https://vnexpress.net/tin-{i}.html")['id'] for i in range(JOBS)}
+    ctx = multiprocessing.get_context('fork')
+    leased = ctx.Queue()
+    procs = [ctx.Process(target=_drain, args=(path, f"w{i}", leased)) for i in range(PROCESSES)]
+    for proc in procs:
+        proc.start()
+    results = [leased.get(timeout=60) for _ in range(JOBS)]
+    for proc in procs:
+        proc.join(timeout=60)
+        assert proc.exitcode == 0
+    job_ids = [job_id for _, job_id in results]
+    assert sorted(job_ids) == sorted(ids)
+    assert queue.stats() == {'pending': 0, 'leased': 0, 'done': JOBS, 'dead': 0}
+    assert all(queue.get(job_id)['attempts'] == 1 for job_id in ids)
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / 'queue.db'))
+    first = queue.enqueue("https://vnexpress.net/a-1.html", {'mode': 'preview'})
+    assert queue.enqueue("https://vnexpress.net/a-1.html", {'mode': 'preview'})['id'] == first['id']
+    assert queue.enqueue("https://vnexpress.net/a-1.html")['id'] != first['id']
+
+
+def test_expired_lease_is_released_to_another_worker(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / 'queue.db'))
+    job = queue.enqueue("https://vnexpress.net/a-1.html")
+    assert queue.lease('stalled', lease_seconds=0.1)['id'] == job['id']
+    assert queue.lease('other') is None
+    time.sleep(0.15)
+    released = queue.lease('other')
+    assert released['id'] == job['id'] and released['attempts'] == 2
+    # The stalled worker lost the lease: its heartbeat and completion are refused
+    assert not queue.heartbeat(job['id'], 'stalled')
+    assert not queue.complete(job['id'], 'stalled')
+    assert queue.heartbeat(job['id'], 'other')
+    assert queue.complete(job['id'], 'other', {'video_path': 'v.mp4'})
+    assert queue.get(job['id'])['result'] == {'video_path': 'v.mp4'}
+
+
+def test_failures_back_off_exponentially(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / 'queue.db'), backoff_base=0.2)
+    job = queue.enqueue("https://vnexpress.net/a-1.html", max_attempts=5)
+    delays = []
+    for attempt in range(3):
+        leased = None
+        while leased is None:
+            leased = queue.lease('w')
+            time.sleep(0.01)
+        start = time.time()
+        assert queue.fail(job['id'], 'w', f"error {attempt}") == 'pending'
+        delays.append(queue.get(job['id'])['available_at'] - start)
+        assert queue.lease('w') is None
+    for attempt, delay in enumerate(delays):
+        expected = 0.2 * 2 ** attempt
+        assert 0.75 * expected <= delay <= 1.25 * expected
+
+
+def test_dead_letter_after_max_attempts(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / 'queue.db'), backoff_base=0)
+    failing = queue.enqueue("https://vnexpress.net/a-1.html", max_attempts=2)
+    for expected in ('pending', 'dead'):
+        assert queue.fail(queue.lease('w')['id'], 'w', 'render failed') == expected
+    # A lease that expires on its last attempt is dead-lettered as well
+    stalled = queue.enqueue("https://vnexpress.net/a-2.html", max_attempts=1)
+    assert queue.lease('w', lease_seconds=0.05)['id'] == stalled['id']
+    time.sleep(0.1)
+    assert queue.lease('w') is None
+    dead = queue.dead_letters()
+    assert [j['id'] for j in dead] == [failing['id'], stalled['id']]
+    assert dead[0]['error'] == 'render failed' and dead[1]['error'] == 'lease expired'
+    assert queue.requeue_dead() == 2
+    assert queue.stats()['pending'] == 2
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        JobQueue()
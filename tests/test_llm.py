@@ -0,0 +1,89 @@
+import pytest
+from llm import OllamaClient, ThinkingAborted
+from stubs import FakeOllama
+
+REQUIRED = ('model', 'prompt', 'keep_alive', 'system', 'think', 'options')
+
+
+@pytest.fixture
+def ollama():
+    with FakeOllama(words=120, require=REQUIRED) as stub:
+        yield stub
+
+
+def test_generate_sends_keep_alive_system_think_and_budget(ollama):
+    client = OllamaClient(ollama.url, ollama.model, system="Bạn là biên tập viên.", keep_alive="15m")
+    text = client.generate("Tóm tắt bài báo sau đây về giá vàng trong nước hôm nay.", target_words=20)
+    assert text
+    body = ollama.requests[-1]
+    assert body['keep_alive'] == "15m"
+    assert body['system'] == "Bạn là biên tập viên."
+    assert body['think'] is False
+    assert body['options']['num_predict'] == client.token_budget(20)
+
+
+def test_warmup_loads_once_and_prefills_system(ollama):
+    client = OllamaClient(ollama.url, ollama.model, system="Bạn là biên tập viên.")
+    client.warmup()
+    client.generate("Tóm tắt bài báo sau đây về giá xăng dầu trong nước.", target_words=10)
+    client.generate("Tóm tắt bài báo sau đây về lãi suất điều hành.", target_words=10)
+    assert ollama.loads == 1
+    warmup = ollama.requests[0]
+    assert warmup['system'] == client.system and warmup['options'] == {"num_predict": 1}
+    assert client.last_metrics['load_s'] in (None, 0)
+
+
+def test_pinned_keeps_model_loaded_then_restores_keep_alive():
+    # The keep_alive-only request that restores the setting carries no system/think/options
+    ollama = FakeOllama(words=120, require=('model', 'prompt', 'keep_alive')).start()
+    client = OllamaClient(ollama.url, ollama.model, system="Bạn là biên tập viên.", keep_alive="5m")
+    with client.pinned():
+        client.generate("Tóm tắt bài báo sau đây về xe buýt điện ở Hà Nội.", target_words=10)
+        assert ollama.requests[-1]['keep_alive'] == -1
+    assert client.keep_alive == "5m"
+    restore = ollama.requests[-1]
+    assert restore['keep_alive'] == "5m" and restore['prompt'] == ""
+    assert ollama.loaded
+    ollama.stop()
+
+
+def test_pinned_restores_keep_alive_when_server_is_gone():
+    stub = FakeOllama().start()
+    client = OllamaClient(stub.url, stub.model, keep_alive="5m", timeout=1)
+    with client.pinned():
+        stub.stop()
+    assert client.keep_alive == "5m"
+
+
+def test_stops_early_at_target_words_and_sentence_end():
+    with FakeOllama(words=400) as ollama:
+        client = OllamaClient(ollama.url, ollama.model)
+        text = client.generate("Tin tức kinh tế hôm nay có nhiều điểm đáng chú ý cho nhà đầu tư.",
+                               options={"num_predict": 2000}, target_words=30)
+    metrics = client.last_metrics
+    assert metrics['stopped_early']
+    assert 30 <= len(text.split()) < 60
+    assert text.endswith('.')
+    assert metrics['tokens'] < client.token_budget(30)
+    assert metrics['ttft'] is not None and metrics['ttft'] > 0
+    summary = client.summary()
+    assert summary['stopped_early'] == 1 and summary['avg_ttft'] == pytest.approx(metrics['ttft'])
+
+
+def test_inline_think_block_is_stripped():
+    with FakeOllama(words=40, think_tokens=20) as ollama:
+        client = OllamaClient(ollama.url, ollama.model, max_think_tokens=200)
+        text = client.generate("Tin tức kinh tế hôm nay có nhiều điểm đáng chú ý cho nhà đầu tư.")
+    assert text and '<think>' not in text and '</think>' not in text and 'suy nghĩ' not in text
+    assert client.last_metrics['think_tokens'] >= 20
+    assert not client.last_metrics['aborted_thinking']
+
+
+def test_runaway_thinking_is_aborted_and_raised():
+    with FakeOllama(words=40, think_tokens=500) as ollama:
+        client = OllamaClient(ollama.url, ollama.model, max_think_tokens=50)
+        with pytest.raises(ThinkingAborted, match="50 tokens"):
+            client.generate("Tin tức kinh tế hôm nay có nhiều điểm đáng chú ý cho nhà đầu tư.")
+    metrics = client.last_metrics
+    assert metrics['aborted_thinking'] and metrics['think_tokens'] == 51
+    assert client.summary()['calls'] == 1
@@ -0,0 +1,53 @@
+import pytest
+from server import JobService
+from loadtest import LoadTest, SyntheticGenerator, _LocalTarget, SERVICE_FINISHED_KEPT
+
+
+def _run(leak_kb):
+    service = JobService(lambda: SyntheticGenerator(scale=0.01, leak_kb=leak_kb), workers=2,
+                         lane_limits={'breaking': 1, 'backlog': 1000}, max_finished=SERVICE_FINISHED_KEPT)
+    service.start()
+    try:
+        test = LoadTest(_LocalTarget(service), ['https://example.test/a'], [36000], 3,
+                        sample_interval=0.05, warmup_jobs=3, seed=1)
+        return test.run(drain_timeout=30)
+    finally:
+        service.stop()
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_synthetic_run_completes_without_leak():
+    report = _run(leak_kb=0)
+    assert report['completed'] >= 10
+    assert report['failed'] == 0 and report['unfinished'] == 0
+    assert not report['leak_suspected'], report['rss_growth_mb_per_job']
+
+
+def test_leaking_generator_is_flagged():
+    report = _run(leak_kb=4096)
+    assert report['leak_suspected'], report['rss_growth_mb_per_job']
+
+
+def test_evicted_job_counts_as_finished():
+    service = JobService(lambda: SyntheticGenerator(scale=0.01), workers=1)
+    assert _LocalTarget(service).poll('missing') == {'status': 'evicted', 'events': []}
+
+
+def test_evicted_jobs_reported_outside_failures_and_leak_fit():
+    test = LoadTest(None, ['https://example.test/a'], [3600], 60, warmup_jobs=0)
+    # Flat RSS for collected jobs; evicted ones were noticed late, during an unrelated RSS spike
+    statuses = ['done'] * 6 + ['failed'] + ['evicted'] * 3
+    for i, status in enumerate(statuses):
+        rss = 900.0 + 100 * i if status == 'evicted' else 500.0
+        record = {'step': 0, 'submitted': i, 'finished': i + 1.0, 'status': status, 'rss_mb': rss,
+                  'stages': {} if status == 'evicted' else {'compose': 1.0}}
+        test.submitted[str(i)] = record
+        test.finished.append(dict(record, id=str(i)))
+    report = test.report()
+    assert (report['completed'], report['failed'], report['evicted'], report['unfinished']) == (6, 1, 3, 0)
+    assert report['rss_growth_mb_per_job'] == 0 and not report['leak_suspected']
+    assert report['stages']['compose']['p50'] == 1.0
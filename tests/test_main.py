@@ -0,0 +1,166 @@
+import os
+import re
+import json
+import shutil
+import subprocess
+import numpy as np
+import pytest
+from PIL import Image
+
+pytestmark = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg not on PATH")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _video_format(path):
+    '''(width, height, fps) of the video stream.'''
+    info = subprocess.run(['ffmpeg', '-i', path], capture_output=True, text=True).stderr
+    match = re.search(r'Video: .*?, (\d+)x(\d+).*?, ([\d.]+) fps', info)
+    return int(match.group(1)), int(match.group(2)), float(match.group(3))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    '''Run in tmp_path (output/ lands there) with the repository's assets linked in.'''
+    for module in ('moviepy', 'pysrt', 'whisper', 'transformers'):
+        pytest.importorskip(module)
+    monkeypatch.chdir(tmp_path)
+    os.symlink(os.path.join(ROOT, 'assets'), tmp_path / 'assets')
+    return tmp_path
+
+
+def _assets(tmp_path, seconds=3.0):
+    '''Images, a voice track and subtitles as a previous run would leave them.'''
+    import soundfile as sf
+    images = []
+    for i in range(2):
+        path = tmp_path / f"img{i}.jpg"
+        noise = np.random.default_rng(i).integers(0, 255, (90, 160, 3), dtype=np.uint8)
+        Image.fromarray(noise).resize((1600, 900)).save(path)
+        images.append(str(path))
+    rate = 24000
+    audio = tmp_path / 'voice.wav'
+    sf.write(audio, (0.2 * np.sin(2 * np.pi * 220 * np.arange(int(rate * seconds)) / rate)).astype(np.float32), rate)
+    srt = tmp_path / 'voice.srt'
+    srt.write_text("1\n00:00:00,000 --> 00:00:02,000\nTin nóng hôm nay\n", encoding='utf-8')
+    return images, str(audio), str(srt)
+
+
+def test_preview_then_final_from_summary_without_tts_or_whisper(workdir, monkeypatch):
+    from main import TikTokNewsGenerator
+    generator = TikTokNewsGenerator(render_only=True, intro_duration=1.0)
+    monkeypatch.setattr(generator.media, 'generate_audio', lambda *a, **k: pytest.fail("TTS re-run"))
+    monkeypatch.setattr(generator.media, 'generate_subtitles', lambda *a, **k: pytest.fail("Whisper re-run"))
+    images, audio, srt = _assets(workdir)
+    summary = workdir / 'story.json'
+    summary.write_text(json.dumps({'title': "Giá vàng tăng mạnh", 'images': images, 'audio_path': audio,
+                                   'subtitle_path': srt, 'duration_seconds': 3.0}), encoding='utf-8')
+
+    preview = generator.render_from_summary(str(summary), mode='preview')
+    assert preview.endswith('story_preview.mp4')
+    assert _video_format(preview) == (360, 640, 15)
+    assert json.loads(summary.read_text(encoding='utf-8'))['render_mode'] == 'preview'
+
+    final = generator.render_from_summary(str(summary), mode='final')
+    assert final.endswith('story.mp4')
+    assert _video_format(final) == (1080, 1920, 30)
+    data = json.loads(summary.read_text(encoding='utf-8'))
+    assert data['render_mode'] == 'final' and data['video_path'] == final
+    assert data['audio_path'] == audio and data['subtitle_path'] == srt
+
+
+def test_summary_without_render_assets_is_rejected(workdir):
+    from main import TikTokNewsGenerator
+    generator = TikTokNewsGenerator(render_only=True)
+    summary = workdir / 'text_only.json'
+    summary.write_text(json.dumps({'title': "Tin", 'body': "Nội dung"}), encoding='utf-8')
+    with pytest.raises(ValueError, match="no render assets"):
+        generator.render_from_summary(str(summary))
+
+
+def test_summary_with_expired_assets_names_them(workdir):
+    from main import TikTokNewsGenerator
+    generator = TikTokNewsGenerator(render_only=True)
+    images, audio, srt = _assets(workdir)
+    os.remove(images[1])
+    os.remove(srt)
+    summary = workdir / 'expired.json'
+    summary.write_text(json.dumps({'title': "Tin", 'images': images, 'audio_path': audio,
+                                   'subtitle_path': srt, 'duration_seconds': 3.0}), encoding='utf-8')
+    with pytest.raises(FileNotFoundError, match="no longer exist") as error:
+        generator.render_from_summary(str(summary))
+    assert srt in str(error.value) and images[1] in str(error.value) and audio not in str(error.value)
+
+
+class _StubProcessor:
+    '''NewsProcessor stand-in: fixed summary, no LLM or corrector.'''
+
+    class llm:
+        @staticmethod
+        def summary(since=None):
+            return {'calls': 0, 'avg_ttft': None}
+
+    def __init__(self):
+        self.calls = []
+        self.last_quality = {'sentences': 0}
+
+    def summarize(self, article):
+        self.calls.append('summarize')
+        return "Giá vàng trong nước tăng mạnh sáng nay."
+
+    def correct_text(self, text):
+        self.calls.append('correct')
+        return text
+
+    def refine_text(self, text):
+        self.calls.append('refine')
+        return text
+
+
+def test_variants_share_story_and_voice_tracks(workdir, monkeypatch):
+    from main import TikTokNewsGenerator
+    generator = TikTokNewsGenerator(render_only=True)
+    generator.processor = _StubProcessor()
+    media, calls = generator.media, {'tts': [], 'subtitles': [], 'compose': []}
+
+    def generate_audio(text, output_path, voice=None):
+        calls['tts'].append(voice)
+        open(output_path, 'wb').close()
+        return output_path
+
+    def generate_subtitles(audio_path, output_path, original_script=None):
+        calls['subtitles'].append(audio_path)
+        open(output_path, 'w').close()
+        return output_path
+
+    def compose_video(output_path, template=None, **kwargs):
+        calls['compose'].append((output_path, template, (media.width, media.height)))
+        media._prerendered(('intro', template, media.width, media.height), object)
+        open(output_path, 'wb').close()
+
+    monkeypatch.setattr(media, 'generate_audio', generate_audio)
+    monkeypatch.setattr(media, 'generate_subtitles', generate_subtitles)
+    monkeypatch.setattr(media, 'get_audio_duration', lambda path: 12.0)
+    monkeypatch.setattr(media, 'compose_video', compose_video)
+    images, _, _ = _assets(workdir)
+    article = {'title': "Giá vàng tăng mạnh", 'content': "Giá vàng tăng.", 'images': images}
+
+    result = generator.generate_variants('https://vnexpress.net/a-1.html', voices=['binh', 'ngoc'],
+                                         templates=[None, '2'], aspects=['9:16', '1:1'], output_name='story',
+                                         article=article, mode='preview')
+
+    assert generator.processor.calls == ['summarize', 'correct', 'refine']
+    assert calls['tts'] == ['binh', 'ngoc']
+    assert calls['subtitles'] == ['output/audio/story_binh.mp3', 'output/audio/story_ngoc.mp3']
+    assert len(calls['compose']) == len(set(calls['compose'])) == 8
+    assert {(t, size) for _, t, size in calls['compose']} == {(None, (360, 640)), ('2', (360, 640)),
+                                                              (None, (360, 360)), ('2', (360, 360))}
+    assert [(v['voice'], v['template'], v['aspect']) for v in result['variants']] == [
+        (voice, template, aspect) for voice in ('binh', 'ngoc') for template in (None, '2')
+        for aspect in ('9:16', '1:1')]
+    sharing = result['sharing']
+    assert {stage: s['runs'] for stage, s in sharing['stages'].items()} == {
+        'story': 1, 'tts': 2, 'subtitles': 2, 'compose': 8}
+    assert all(s['naive_runs'] == 8 for s in sharing['stages'].values())
+    assert sharing['prerender_misses'] == 4 and sharing['prerender_hits'] == 4
+    summary = json.loads((workdir / 'output' / 'summaries' / 'story.json').read_text(encoding='utf-8'))
+    assert len(summary['variants']) == 8 and summary['sharing']['variants'] == 8
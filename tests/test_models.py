@@ -0,0 +1,102 @@
+import pytest
+from models import ModelRegistry
+
+
+def _counting(result):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return loader, calls
+
+
+def test_loader_returning_none_is_not_retried():
+    registry = ModelRegistry()
+    loader, calls = _counting(None)
+    registry.register('tts', loader, stages=['tts'])
+    assert registry.get('tts') is None
+    assert registry.get('tts') is None
+    assert len(calls) == 1
+    assert registry.report()['models']['tts']['failed']
+
+
+def test_loader_exception_is_remembered_until_reload():
+    registry = ModelRegistry()
+    loader, calls = _counting(OSError("download failed"))
+    registry.register('whisper', loader, stages=['subtitles'])
+    with pytest.raises(OSError):
+        registry.get('whisper')
+    with pytest.raises(RuntimeError, match="download failed"):
+        registry.get('whisper')
+    assert len(calls) == 1
+    registry.entries['whisper'].loader = lambda: ('model',)
+    assert registry.reload('whisper') == ('model',)
+    assert registry.get('whisper') == ('model',)
+    assert registry.report()['models']['whisper']['loads'] == 1
+
+
+def test_successful_load_happens_once():
+    registry = ModelRegistry()
+    loader, calls = _counting(('tokenizer', 'model'))
+    registry.register('corrector', loader, stages=['correct'])
+    assert registry.get('corrector') == registry.get('corrector') == ('tokenizer', 'model')
+    assert len(calls) == 1 and registry.loaded('corrector')
+
+
+def test_registering_a_name_again_keeps_the_first_loader():
+    registry = ModelRegistry()
+    first, first_calls = _counting(('tts', 'binh'))
+    second, second_calls = _counting(('tts', 'ngoc'))
+    registry.register('tts', first, stages=['tts'])
+    registry.register('tts', second, stages=['tts'])
+    assert registry.get('tts') == ('tts', 'binh')
+    assert len(first_calls) == 1 and not second_calls
+
+
+MB = 1024**2
+
+
+def _loaded(budget, footprints):
+    '''Registry with fake models loaded in order (oldest first) and fixed footprints.'''
+    registry = ModelRegistry(budget)
+    stages = {'corrector': 'correct', 'tts': 'tts', 'whisper': 'subtitles'}
+    for i, (name, footprint) in enumerate(footprints.items()):
+        registry.register(name, lambda name=name: (name,), stages=[stages[name]])
+        registry.get(name)
+        registry.entries[name].footprint = footprint
+        registry.entries[name].last_used = i
+    return registry
+
+
+def test_prepare_unloads_least_recently_used_idle_models_until_the_stage_fits():
+    registry = _loaded(1536 * MB, {'corrector': 300 * MB, 'tts': 600 * MB, 'whisper': 400 * MB})
+    registry.prepare('subtitles')   # 1300 MB resident + 512 MB headroom > 1536 MB
+    assert not registry.loaded('corrector')
+    assert registry.loaded('tts') and registry.loaded('whisper')
+    assert registry.resident_bytes() == 1000 * MB
+
+
+def test_prepare_counts_the_stage_models_still_to_load():
+    registry = _loaded(1536 * MB, {'corrector': 300 * MB, 'tts': 600 * MB, 'whisper': 400 * MB})
+    registry.unload('whisper')
+    registry.prepare('tts')   # fits: 900 MB + 512 MB
+    assert registry.loaded('corrector') and registry.loaded('tts')
+    registry.prepare('subtitles')   # 900 MB + 512 MB headroom + 400 MB whisper to load
+    assert not registry.loaded('corrector') and registry.loaded('tts')
+    assert registry.get('whisper') == ('whisper',)
+    assert registry.report()['models']['whisper']['loads'] == 2
+
+
+def test_prepare_keeps_the_stage_model_even_over_budget():
+    registry = _loaded(100 * MB, {'corrector': 300 * MB, 'tts': 600 * MB, 'whisper': 400 * MB})
+    registry.prepare('tts')
+    assert [name for name in registry.entries if registry.loaded(name)] == ['tts']
+
+
+def test_prepare_without_budget_keeps_everything():
+    registry = _loaded(None, {'corrector': 300 * MB, 'tts': 600 * MB, 'whisper': 400 * MB})
+    registry.prepare('compose')
+    assert all(registry.loaded(name) for name in registry.entries)
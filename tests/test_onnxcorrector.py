@@ -0,0 +1,21 @@
+import os
+import pytest
+from conftest import FIXTURES
+
+pytest.importorskip('onnxruntime')
+pytest.importorskip('transformers')
+from onnxcorrector import SOURCE_MODEL, EXPORT_DIR, is_exported, verify, _read_fixtures
+
+pytestmark = [
+    pytest.mark.skipif(not os.path.isdir(SOURCE_MODEL), reason="protonx-legal-tc not downloaded"),
+    pytest.mark.skipif(not is_exported(EXPORT_DIR), reason="ONNX corrector not exported"),
+]
+
+
+def test_onnx_matches_torch_per_sentence():
+    sentences = _read_fixtures(os.path.join(FIXTURES, 'corrector_sentences.txt'))
+    result = verify(sentences, SOURCE_MODEL, EXPORT_DIR)
+    assert result['sentences'] == len(sentences)
+    for row in result['mismatches']:
+        assert row['similarity'] >= 0.9, row
+    assert result['passed']
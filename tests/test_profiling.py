@@ -0,0 +1,136 @@
+import os
+import re
+import sys
+import json
+import time
+import pstats
+import threading
+from collections import Counter
+import pytest
+from profiling import StageProfiler, hot_functions, load_collapsed
+
+
+def render_into(seconds):
+    '''Busy loop named like a watched function.'''
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+def correct_batch(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sorted(range(500), key=lambda x: -x)
+
+
+def test_hot_functions_self_and_inclusive_shares():
+    stacks = Counter({
+        'compose;MainThread;main (main.py);render_into (media.py);blend (framewriter.py)': 6,
+        'compose;MainThread;main (main.py);render_into (media.py)': 2,
+        'tts;worker;run (ttspool.py);synthesize (ttspool.py)': 2,
+        'tts;worker': 5,  # no frames: counts toward the total only
+    })
+    summary = hot_functions(stacks, ['render_into', 'transcribe'], top=2)
+    assert summary['samples'] == 15
+    assert summary['top_self'] == [
+        {'function': 'blend (framewriter.py)', 'self_percent': 40.0, 'inclusive_percent': 40.0},
+        {'function': 'render_into (media.py)', 'self_percent': 13.3, 'inclusive_percent': 53.3},
+    ]
+    assert summary['highlighted'] == {'render_into (media.py)': {'inclusive_percent': 53.3, 'self_percent': 13.3}}
+    assert hot_functions(Counter())['samples'] == 0
+
+
+def test_load_collapsed_round_trips_and_sums_duplicates(tmp_path):
+    path = tmp_path / 'stacks.collapsed'
+    path.write_text("tts;worker;f (a.py);g (b c.py) 3\ncompose;MainThread;h (c.py) 4\n"
+                    "tts;worker;f (a.py);g (b c.py) 2\n\n", encoding='utf-8')
+    assert load_collapsed(str(path)) == Counter({'tts;worker;f (a.py);g (b c.py)': 5,
+                                                 'compose;MainThread;h (c.py)': 4})
+
+
+def test_two_stage_run_writes_profiles_stacks_and_report(tmp_path, capsys):
+    profiler = StageProfiler(str(tmp_path), interval=0.002)
+    profiler.stage('compose')
+    worker = threading.Thread(target=render_into, args=(0.3,), name='compose-worker')
+    worker.start()
+    render_into(0.1)
+    worker.join()
+    profiler.stage('correct')
+    correct_batch(0.2)
+    profiler.stage('rendered')
+    summary = profiler.finish()
+
+    files = sorted(os.listdir(profiler.output_dir))
+    assert files == ['compose.prof', 'correct.prof', 'stacks.collapsed', 'summary.json']
+    compose = pstats.Stats(os.path.join(profiler.output_dir, 'compose.prof'))
+    assert any(func == 'render_into' for _, _, func in compose.stats)
+    correct = pstats.Stats(os.path.join(profiler.output_dir, 'correct.prof'))
+    assert not any(func == 'render_into' for _, _, func in correct.stats)
+
+    lines = open(os.path.join(profiler.output_dir, 'stacks.collapsed'), encoding='utf-8').read().splitlines()
+    assert lines and all(re.fullmatch(r'(compose|correct);[^;]+(;[^;]+ \([^;]+\))* \d+', line) for line in lines)
+    stacks = load_collapsed(os.path.join(profiler.output_dir, 'stacks.collapsed'))
+    assert sum(stacks.values()) == summary['samples'] > 0
+    assert any(s.startswith('compose;compose-worker;') and 'render_into (test_profiling.py)' in s for s in stacks)
+    assert not any(s.startswith('correct;') and 'render_into' in s for s in stacks)
+
+    assert 'render_into (test_profiling.py)' in summary['highlighted']
+    assert summary['highlighted']['render_into (test_profiling.py)']['inclusive_percent'] > 0
+    assert set(summary['wall_seconds']) == {'compose', 'correct'}
+    assert summary['wall_seconds']['compose'] >= 0.3
+    assert json.load(open(os.path.join(profiler.output_dir, 'summary.json'), encoding='utf-8')) == summary
+    assert "Watched functions" in capsys.readouterr().out
+
+
+def test_repeated_stage_accumulates_into_one_profile(tmp_path):
+    profiler = StageProfiler(str(tmp_path), interval=0.002)
+    for _ in range(2):
+        profiler.stage('compose')
+        render_into(0.05)
+        profiler.stage('rendered')
+    summary = profiler.finish()
+    assert list(summary['wall_seconds']) == ['compose'] and summary['wall_seconds']['compose'] >= 0.1
+    compose = pstats.Stats(os.path.join(profiler.output_dir, 'compose.prof'))
+    assert next(v for k, v in compose.stats.items() if k[2] == 'render_into')[1] == 2
+
+
+def test_no_stage_writes_nothing(tmp_path):
+    profiler = StageProfiler(str(tmp_path / 'profiles'))
+    assert profiler.finish() == {}
+    assert not os.path.exists(tmp_path / 'profiles')
+
+
+def test_main_without_profile_installs_nothing(tmp_path, monkeypatch):
+    for module in ('moviepy', 'pysrt', 'whisper', 'transformers'):
+        pytest.importorskip(module)
+    import main
+    created = []
+
+    class Generator:
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+            self.profiler = main.StageProfiler(kwargs['profile_dir']) if kwargs['profile_dir'] else None
+            self.media = type('Media', (), {'close': lambda self: None})()
+            created.append(self)
+
+        def render_from_summary(self, summary_json, mode, output_name):
+            main.TikTokNewsGenerator._progress(self, None, 'compose')
+            assert sys.getprofile() is None
+            assert 'stage-profiler' not in {t.name for t in threading.enumerate()}
+            return 'video.mp4'
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, 'TikTokNewsGenerator', Generator)
+    monkeypatch.setattr(sys, 'argv', ['main.py', '--render-from', 'story.json'])
+    main.main()
+    assert created[0].kwargs['profile_dir'] is None and created[0].profiler is None
+    assert not os.path.exists(tmp_path / 'output' / 'profiles')
+
+    monkeypatch.setattr(sys, 'argv', ['main.py', '--render-from', 'story.json', '--profile'])
+    created.clear()
+    monkeypatch.setattr(Generator, 'render_from_summary', lambda self, *a, **k: 'video.mp4')
+    main.main()
+    assert created[0].kwargs['profile_dir'] == 'output/profiles'
+    assert isinstance(created[0].profiler, main.StageProfiler)
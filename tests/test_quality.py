@@ -0,0 +1,121 @@
+import glob
+import os
+import pytest
+from conftest import FIXTURES
+from quality import QualityGate, regions, split_sentences
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEXICON = os.path.join(ROOT, 'models', 'vi_lexicon.txt')
+FIXES = {'tôt': 'tốt', 'hoc': 'học', 'Nôi': 'Nội', 'nhiêu': 'nhiều', 'nghi': 'nghị', 'dung': 'dụng',
+         'viên': 'viện', 'huyêt': 'huyết', 'nhe': 'nhẹ'}
+
+
+@pytest.fixture(scope='module')
+def gate():
+    return QualityGate(LEXICON)
+
+
+def _corrector_sentences():
+    with open(os.path.join(FIXTURES, 'corrector_sentences.txt'), encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _article_sentences():
+    sentences = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, 'articles', '*.txt'))):
+        with open(path, encoding='utf-8') as f:
+            sentences.extend(split_sentences(f.read()))
+    return sentences
+
+
+def test_every_corrector_fixture_sentence_is_flagged(gate):
+    unflagged = [s for s in _corrector_sentences() if not gate.issues(s)]
+    assert unflagged == []
+
+
+def test_clean_fixture_articles_are_not_flagged(gate):
+    sentences = _article_sentences()
+    assert len(sentences) > 500
+    assert [s for s in sentences if gate.issues(s)] == []
+
+
+def test_word_with_a_missing_tone_mark_is_flagged(gate):
+    assert gate.issues("Người dân nên sử dung điện tiết kiệm.") == ["missing tone mark: sử dung (sử dụng?)"]
+    assert gate.issues("Người dân nên sử dụng điện tiết kiệm.") == []
+    # Same syllables with a different (not missing) tone are left to the other checks
+    assert gate.missing_tones(['các', 'bạn']) == []
+
+
+def test_lexicon_is_authoritative(gate):
+    assert gate.is_syllable('học') and gate.is_syllable('dụng')
+    assert not gate.is_syllable('hoc') and not gate.is_syllable('huyêt')
+    # Well-formed but not a syllable of the language
+    assert not gate.is_syllable('nhoanh')
+
+
+def test_phonotactics_without_a_lexicon():
+    gate = QualityGate(lexicon_path=None)
+    assert gate.is_syllable('học') and gate.is_syllable('tốt') and gate.is_syllable('nghi')
+    # Stop finals take only the acute or dot-below tone
+    assert not gate.is_syllable('hoc') and not gate.is_syllable('tôt') and not gate.is_syllable('hòc')
+    assert not gate.is_syllable('khng')
+
+
+def test_regions():
+    assert regions([]) == []
+    assert regions([False, False]) == []
+    assert regions([True, True]) == [(0, 2)]
+    assert regions([False, True, True, False, True]) == [(1, 3), (4, 5)]
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    pytest.importorskip('transformers')
+    from core import NewsProcessor
+    from stubs import FakeOllama
+    ollama = FakeOllama().start()
+    processor = NewsProcessor(ollama_url=ollama.url, output_dir=str(tmp_path / 'images'), load_corrector=False)
+    processor.quality_gate = QualityGate(LEXICON)
+    calls = {'corrector': [], 'refiner': []}
+
+    def corrector(text):
+        calls['corrector'].append(text)
+        return ' '.join(FIXES.get(word, word) for word in text.split())
+
+    def refiner(text):
+        calls['refiner'].append(text)
+        return text
+
+    monkeypatch.setattr(processor, '_run_corrector', corrector)
+    monkeypatch.setattr(processor, '_run_refiner', refiner)
+    yield processor, calls
+    ollama.stop()
+
+
+def test_only_flagged_regions_are_corrected_and_refined(processor):
+    processor, calls = processor
+    clean = _article_sentences()[:3]
+    # Sentences with one or two missing tone marks (not fully unaccented ones)
+    typos = [s for s in _corrector_sentences()
+             if not any('diacritics' in issue for issue in processor.quality_gate.issues(s))][:3]
+    text = ' '.join([clean[0], typos[0], typos[1], clean[1], typos[2], clean[2]])
+
+    corrected = processor.correct_text(text)
+    assert calls['corrector'] == [f"{typos[0]} {typos[1]}", typos[2]]
+    sentences = split_sentences(corrected)
+    assert [sentences[0], sentences[3], sentences[5]] == clean
+    assert not any(processor.quality_gate.issues(s) for s in sentences)
+
+    # The refiner sees exactly the sentences the corrector rewrote
+    assert processor.refine_text(corrected) == corrected
+    assert calls['refiner'] == [' '.join(sentences[1:3]), sentences[4]]
+    assert processor.last_quality == {'sentences': 6, 'corrected': 3, 'refined': 3,
+                                      'skipped_correct': 3, 'skipped_refine': 3}
+
+
+def test_clean_text_skips_corrector_and_refiner(processor):
+    processor, calls = processor
+    text = ' '.join(_article_sentences()[:4])
+    assert processor.refine_text(processor.correct_text(text)) == text
+    assert calls == {'corrector': [], 'refiner': []}
+    assert processor.last_quality['skipped_correct'] == processor.last_quality['skipped_refine'] == 4
@@ -0,0 +1,119 @@
+import threading
+import time
+import scheduler as scheduler_module
+from scheduler import ResourceScheduler
+
+
+def _scheduler(cores=4, cuda=False, **kwargs):
+    scheduler = ResourceScheduler(cores=cores, **kwargs)
+    scheduler.has_cuda = cuda
+    return scheduler
+
+
+class _FakeTorch:
+    '''Records set_num_threads calls.'''
+
+    def __init__(self, threads):
+        self.threads = threads
+        self.calls = []
+
+    def get_num_threads(self):
+        return self.threads
+
+    def set_num_threads(self, threads):
+        self.threads = threads
+        self.calls.append(threads)
+
+
+def _enter(scheduler, stage, entered, release):
+    def run():
+        with scheduler.stage(stage) as lease:
+            entered.append(lease)
+            release.wait(5)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_exclusive_stage_runs_one_lease_at_a_time():
+    scheduler = _scheduler(cores=8)
+    release, entered = threading.Event(), []
+    first = _enter(scheduler, 'tts', entered, release)
+    second = _enter(scheduler, 'tts', entered, release)
+    time.sleep(0.1)
+    assert len(entered) == 1 and scheduler.free == 4
+    with scheduler.stage('compose') as lease:
+        assert lease.threads == 4
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert len(entered) == 2 and scheduler.free == 8 and scheduler.active['tts'] == 0
+
+
+def test_cpu_stage_waits_for_a_free_core():
+    scheduler = _scheduler(cores=4)
+    release, entered = threading.Event(), []
+    first = _enter(scheduler, 'compose', entered, release)
+    time.sleep(0.1)
+    assert [lease.threads for lease in entered] == [4] and scheduler.free == 0
+    second = _enter(scheduler, 'compose', entered, release)
+    time.sleep(0.1)
+    assert len(entered) == 1
+    release.set()
+    first.join(5)
+    time.sleep(0.1)
+    assert len(entered) == 2 and entered[1].threads == 4 and entered[1].waited > 0.05
+    assert scheduler.waits['compose'][1] == entered[1].waited
+    second.join(5)
+    assert scheduler.free == 4
+
+
+def test_grant_is_budget_capped_by_free_cores():
+    scheduler = _scheduler(cores=6)
+    with scheduler.stage('compose') as first:
+        with scheduler.stage('compose') as second:
+            assert (first.threads, second.threads, scheduler.free) == (4, 2, 0)
+    with scheduler.stage('compose') as lease:
+        assert lease.threads == 4
+    assert scheduler.free == 6
+    assert ResourceScheduler(cores=2).budget('tts') == 2
+
+
+def test_gpu_stages_share_one_device_slot():
+    scheduler = _scheduler(cores=4, cuda=True, gpu_stages=['correct', 'tts'])
+    devices = [scheduler.device_for(s) for s in ('correct', 'tts', 'subtitles', 'compose')]
+    assert devices == ['cuda', 'cuda', 'cpu', 'cpu']
+    release, entered = threading.Event(), []
+    first = _enter(scheduler, 'correct', entered, release)
+    time.sleep(0.1)
+    second = _enter(scheduler, 'tts', entered, release)
+    time.sleep(0.1)
+    assert [(l.stage, l.device, l.threads) for l in entered] == [('correct', 'cuda', 1)]
+    assert scheduler.free_gpu == 0 and scheduler.free == 3
+    with scheduler.stage('subtitles') as lease:
+        assert (lease.device, lease.threads) == ('cpu', 3)
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert [l.stage for l in entered] == ['correct', 'tts']
+    assert scheduler.free_gpu == 1 and scheduler.free == 4
+
+
+def test_torch_threads_follow_smallest_grant_and_are_restored(monkeypatch):
+    scheduler = _scheduler(cores=6)
+    fake = _FakeTorch(threads=16)
+    monkeypatch.setattr(scheduler_module, 'torch', fake, raising=False)
+    monkeypatch.setattr(scheduler_module, 'TORCH_AVAILABLE', True)
+    tts = scheduler.stage('tts')
+    assert tts.__enter__().threads == 4 and fake.threads == 4
+    with scheduler.stage('compose') as compose:
+        assert compose.threads == 2 and fake.threads == 4
+    correct = scheduler.stage('correct')
+    assert correct.__enter__().threads == 2 and fake.threads == 2
+    tts.__exit__(None, None, None)
+    assert fake.threads == 2 and scheduler._torch_grants == [2]
+    with scheduler.stage('subtitles') as lease:
+        assert lease.threads == 4 and fake.threads == 2
+    correct.__exit__(None, None, None)
+    assert fake.threads == 16 and fake.calls == [4, 2, 16]
+    assert scheduler._torch_grants == [] and scheduler.free == 6
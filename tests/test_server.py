@@ -0,0 +1,149 @@
+import sys
+import json
+import time
+import types
+import threading
+import pytest
+import requests
+from llm import OllamaClient
+from server import JobService, ServiceUnavailable, create_server
+from stubs import FakeOllama
+
+
+class OllamaGenerator:
+    '''Generator that summarizes through Ollama and writes the summary JSON the service reads.'''
+
+    def __init__(self, ollama_url):
+        self.llm = OllamaClient(ollama_url, "qwen3-vl:4b")
+
+    def generate_video(self, news_url, output_name=None, mode='final', progress=None):
+        progress('summarize', {})
+        body = self.llm.generate(f"Tóm tắt bài báo {news_url}. Giá vàng tăng mạnh trong phiên sáng nay.",
+                                 target_words=40)
+        summary = f"output/summaries/{output_name}.json"
+        with open(summary, 'w', encoding='utf-8') as f:
+            json.dump({'body': body, 'video_path': summary}, f, ensure_ascii=False)
+        progress('rendered', {})
+        return summary
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'output' / 'summaries').mkdir(parents=True)
+    ollama = FakeOllama(words=60).start()
+    service = JobService(lambda: OllamaGenerator(ollama.url), workers=2).start()
+    httpd = create_server(service, port=0)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield service, f"http://127.0.0.1:{httpd.server_address[1]}", ollama
+    httpd.shutdown()
+    httpd.server_close()
+    service.stop()
+    ollama.stop()
+
+
+def _wait(base, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = requests.get(f"{base}/jobs/{job_id}", timeout=5).json()
+        if status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_runs_against_fake_ollama(service, tmp_path):
+    _, base, ollama = service
+    response = requests.post(f"{base}/jobs", json={'url': 'https://vnexpress.net/a-1.html', 'lane': 'breaking',
+                                                   'options': {'output_name': 'ban tin'}}, timeout=5)
+    assert response.status_code == 202
+    job_id = response.json()['id']
+    status = _wait(base, job_id)
+    assert status['status'] == 'done', status['error']
+    assert status['result']['summary'] == f"output/summaries/ban_tin_{job_id}.json"
+    events = [json.loads(line)['stage'] for line in
+              requests.get(f"{base}/jobs/{job_id}/events", timeout=5).text.splitlines()]
+    assert events == ['queued', 'started', 'summarize', 'rendered', 'done']
+    assert ollama.requests and ollama.requests[-1]['model'] == 'qwen3-vl:4b'
+    video = requests.get(f"{base}/jobs/{job_id}/artifacts/video", timeout=5)
+    assert video.status_code == 200 and json.loads(video.content)['body']
+
+
+def test_output_name_cannot_escape_output_dir(service, tmp_path):
+    svc, base, _ = service
+    ids = [requests.post(f"{base}/jobs", json={'url': 'https://vnexpress.net/a-1.html',
+                                               'options': {'output_name': '../../x'}}, timeout=5).json()['id']
+           for _ in range(2)]
+    names = [svc.get(job_id).output_name for job_id in ids]
+    for job_id, name in zip(ids, names):
+        assert _wait(base, job_id)['status'] == 'done'
+        assert name == f"x_{job_id}"
+    assert len(set(names)) == 2
+    assert not (tmp_path.parent / 'x.json').exists()
+    assert sorted(p.name for p in (tmp_path / 'output' / 'summaries').iterdir()) == sorted(f"{n}.json" for n in names)
+
+
+def test_finished_jobs_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'output' / 'summaries').mkdir(parents=True)
+    ollama = FakeOllama(words=20).start()
+    svc = JobService(lambda: OllamaGenerator(ollama.url), max_finished=3).start()
+    try:
+        jobs = [svc.submit('https://vnexpress.net/a-1.html') for _ in range(6)]
+        deadline = time.time() + 10
+        while svc.metrics()['completed'] < 6 and time.time() < deadline:
+            time.sleep(0.05)
+        assert svc.get(jobs[-1].id) is not None
+        assert svc.get(jobs[0].id) is None
+        assert svc.metrics()['jobs_tracked'] == 3
+        svc.job_ttl = 0
+        assert svc.get(jobs[-1].id) is None
+    finally:
+        svc.stop()
+        ollama.stop()
+
+
+def test_worker_init_failure_is_reported():
+    def broken():
+        raise OSError("model files missing")
+
+    svc = JobService(broken, workers=2)
+    with pytest.raises(RuntimeError, match="model files missing"):
+        svc.start()
+    with pytest.raises(ServiceUnavailable):
+        svc.submit('https://vnexpress.net/a-1.html')
+
+
+def test_queued_jobs_fail_when_no_worker_starts():
+    started = []
+
+    def slow_broken():
+        started.append(True)
+        time.sleep(0.2)
+        raise OSError("no GPU")
+
+    svc = JobService(slow_broken, workers=1).start(wait=False)
+    job = svc.submit('https://vnexpress.net/a-1.html')
+    deadline = time.time() + 5
+    while job.status == 'queued' and time.time() < deadline:
+        time.sleep(0.02)
+    assert job.status == 'failed' and 'no GPU' in job.error
+    assert svc.metrics()['queue_depth']['backlog'] == 0
+
+
+def test_default_workers_share_one_model_registry(monkeypatch):
+    loads, generators = [], []
+
+    class Generator:
+        def __init__(self, models):
+            models.register('whisper', lambda: loads.append(1) or object(), stages=['subtitles'])
+            self.models, self.whisper = models, models.get('whisper')
+            generators.append(self)
+
+    monkeypatch.setitem(sys.modules, 'main', types.SimpleNamespace(TikTokNewsGenerator=Generator))
+    svc = JobService(workers=3).start()
+    try:
+        assert len(generators) == 3 and len(loads) == 1
+        assert all(g.models is svc.models and g.whisper is generators[0].whisper for g in generators)
+    finally:
+        svc.stop()
@@ -0,0 +1,29 @@
+import shutil
+import pytest
+
+pytestmark = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg not installed")
+
+
+def _check(**kwargs):
+    for module in ('moviepy', 'pysrt', 'whisper'):
+        pytest.importorskip(module)
+    from timeline import rss_ceiling_check
+    return rss_ceiling_check(**kwargs)
+
+
+def test_segments_open_one_at_a_time():
+    # 12 images over one minute, subtitle cues every 3 s that never overlap
+    result = _check(minutes=1, images=12, size=(270, 480), fps=5, max_rss_mb=1500)
+    assert result['passed'], result
+    assert result['segments_opened'] == 12
+    assert result['max_resident'] == 2
+
+
+@pytest.mark.slow
+def test_long_render_stays_under_rss_ceiling_at_production_resolution():
+    # Full 10-minute, 100-image check; a low frame rate and ultrafast keep the encode cheap
+    result = _check(minutes=10, images=100, size=(1080, 1920), fps=5, max_rss_mb=1500, preset='ultrafast')
+    assert result['passed'], result
+    assert result['rss_peak_mb'] - result['rss_start_mb'] < 400
+    assert result['segments_opened'] == 100
+    assert result['max_resident'] <= 2
@@ -0,0 +1,92 @@
+import os
+import threading
+from functools import partial
+import numpy as np
+import pytest
+from ttspool import TTSPool, SAMPLE_RATE, split_script
+from scheduler import ResourceScheduler
+from stubs import FakeSynthesizer, broken_synthesizer
+
+
+@pytest.mark.parametrize('cores, workers, expected', [
+    (4, None, (2, 2)),
+    (1, None, (1, 1)),
+    (8, 2, (2, 2)),
+    (3, 3, (3, 1)),
+])
+def test_pool_fits_core_budget(cores, workers, expected):
+    pool = TTSPool(workers=workers, cores=cores)
+    assert (pool.workers, pool.threads) == expected
+    assert pool.workers * pool.threads <= max(cores, pool.workers)
+
+
+def test_pool_sized_from_scheduler_tts_budget():
+    scheduler = ResourceScheduler(cores=16)
+    pool = TTSPool(cores=scheduler.budget('tts'))
+    assert pool.workers * pool.threads == scheduler.budget('tts') == 4
+
+
+def _units(audio, units, voice, gap=0.1):
+    '''Split pool output into (pid, code) per unit, checking lengths and silence between units.'''
+    silence, pos, found = int(gap * SAMPLE_RATE), 0, []
+    for i, unit in enumerate(units):
+        length = 1 + 10 * len(unit.split())
+        piece = audio[pos:pos + length]
+        assert np.all(piece[1:] == np.float32(FakeSynthesizer.code(unit, voice)))
+        found.append(int(piece[0]))
+        pos += length
+        if i < len(units) - 1:
+            assert not audio[pos:pos + silence].any()
+            pos += silence
+    assert pos == len(audio)
+    return found
+
+
+def _shm_segments():
+    return {name for name in os.listdir('/dev/shm') if name.startswith('psm_')} if os.path.isdir('/dev/shm') else set()
+
+
+SCRIPT = ' '.join(f"Đây là câu thử nghiệm số {i} của bản tin với nhiều từ để tách thành các nhóm." for i in range(12))
+
+
+def test_pool_synthesizes_in_order_across_workers():
+    before = _shm_segments()
+    with TTSPool(workers=2, cores=2, backend=partial(FakeSynthesizer, delay=0.05)) as pool:
+        units = split_script(SCRIPT)
+        assert len(units) >= 4
+        results = {}
+
+        def run(voice):
+            results[voice] = pool.synthesize(SCRIPT, voice)
+
+        threads = [threading.Thread(target=run, args=(voice,)) for voice in ('binh', 'ngoc')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pids = _units(results['binh'], units, 'Binh') + _units(results['ngoc'], units, 'Ngoc')
+        assert set(pids) == {proc.pid for proc in pool._procs}
+        assert pool.synthesize('', 'binh').size == 0
+    assert _shm_segments() <= before
+
+
+def test_worker_error_fails_the_job_and_pool_keeps_serving():
+    with TTSPool(workers=1, cores=1, backend=FakeSynthesizer) as pool:
+        with pytest.raises(RuntimeError, match="ValueError: cannot synthesize"):
+            pool.synthesize("Câu đầu tiên. Câu này FAIL.", 'binh')
+        audio = pool.synthesize("Câu tiếp theo vẫn chạy.", 'binh')
+        _units(audio, ["Câu tiếp theo vẫn chạy."], 'Binh')
+
+
+def test_dead_worker_fails_the_job():
+    pool = TTSPool(workers=1, cores=1, backend=FakeSynthesizer).start()
+    try:
+        with pytest.raises(RuntimeError, match="worker process exited"):
+            pool.synthesize("Worker EXIT giữa chừng.", 'binh')
+    finally:
+        pool.close()
+
+
+def test_backend_load_failure_is_reported_at_start():
+    with pytest.raises(RuntimeError, match="TTS worker init failed: backbone weights missing"):
+        TTSPool(workers=1, cores=1, backend=broken_synthesizer).start()